@@ -10,6 +10,10 @@ Entity Setting - movie_cast 기반 동의어 추출 및 OpenSearch 저장 파이
 2. review 경로의 refined_transcript를 청크로 분할
 3. 청크에서 동의어 추출
 4. OpenSearch에서 엔티티 검색 후 동의어 추가
+
+참고:
+  2-entity_extraction_from_chunk의 `extraction_entity.py --with-synonyms`는 같은 청크에서
+  동의어와 entity/relationship을 한 번의 LLM 호출로 추출하므로 이 파이프라인을 대체할 수 있습니다.
 """
 import json, glob, os, sys
 
@@ -0,0 +1,153 @@
+"""
+Bedrock 클라이언트 풀
+- bedrock-runtime boto3 클라이언트를 리전별로 하나만 만들어 공유 (boto3 client는 thread-safe)
+- BedrockModel / Agent는 스레드별로 재사용 (호출마다 클라이언트 생성 + TLS 핸드셰이크 제거)
+- max_pool_connections를 동시 호출 수에 맞춘 botocore Config
+- complete(): 대화 기록 없이 프롬프트 1개만 보내는 단발 호출 + 입력/출력 토큰 집계
+"""
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+from strands import Agent
+from strands.models import BedrockModel
+
+
+DEFAULT_REGION = "us-west-2"
+
+# 동시 Bedrock 호출 수 (ThreadPoolExecutor workers 등) - 커넥션 풀 크기로 사용
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get('BEDROCK_MAX_CONCURRENCY', '50'))
+
+_runtime_clients = {}
+_runtime_clients_lock = threading.Lock()
+_thread_local = threading.local()
+_token_stats = {'calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'max_input_tokens': 0}
+_token_stats_lock = threading.Lock()
+
+
+def get_bedrock_client_config(max_pool_connections: int = BEDROCK_MAX_CONCURRENCY) -> Config:
+    """동시성에 맞춘 커넥션 풀 + keep-alive + adaptive 재시도 설정"""
+    return Config(
+        max_pool_connections=max_pool_connections,
+        tcp_keepalive=True,
+        connect_timeout=10,
+        read_timeout=300,
+        retries={'max_attempts': 5, 'mode': 'adaptive'}
+    )
+
+
+def get_bedrock_runtime_client(region_name: str = None):
+    """리전별 공유 bedrock-runtime 클라이언트 (임베딩 등 직접 invoke_model 용)"""
+    region_name = region_name or os.environ.get("AWS_DEFAULT_REGION", DEFAULT_REGION)
+    client = _runtime_clients.get(region_name)
+    if client is None:
+        # boto3 클라이언트 생성 자체는 thread-safe하지 않으므로 lock
+        with _runtime_clients_lock:
+            client = _runtime_clients.get(region_name)
+            if client is None:
+                client = boto3.session.Session().client(
+                    service_name='bedrock-runtime',
+                    region_name=region_name,
+                    config=get_bedrock_client_config()
+                )
+                _runtime_clients[region_name] = client
+    return client
+
+
+def get_bedrock_model(model_id: str = None, region_name: str = None, temperature: float = None) -> BedrockModel:
+    """
+    현재 스레드의 BedrockModel을 반환합니다 (설정 조합별로 한 번만 생성).
+    None인 인자는 strands 기본값을 사용합니다.
+    """
+    models = getattr(_thread_local, 'models', None)
+    if models is None:
+        models = _thread_local.models = {}
+
+    key = (model_id, region_name, temperature)
+    model = models.get(key)
+    if model is None:
+        model_kwargs = {'boto_client_config': get_bedrock_client_config()}
+        if model_id is not None:
+            model_kwargs['model_id'] = model_id
+        if region_name is not None:
+            model_kwargs['region_name'] = region_name
+        if temperature is not None:
+            model_kwargs['temperature'] = temperature
+        model = BedrockModel(**model_kwargs)
+        models[key] = model
+    return model
+
+
+def get_agent(model_id: str = None, region_name: str = None, temperature: float = None) -> Agent:
+    """
+    현재 스레드의 Agent를 재사용하여 반환합니다.
+    이전 호출의 대화 기록은 비우므로 매 호출은 새 Agent와 동일하게 동작합니다.
+    풀 Agent는 callback_handler=None - 기본 PrintingCallbackHandler가 여러 스레드의 응답을 stdout에 섞어 찍지 않도록 합니다.
+    """
+    agents = getattr(_thread_local, 'agents', None)
+    if agents is None:
+        agents = _thread_local.agents = {}
+
+    key = (model_id, region_name, temperature)
+    agent = agents.get(key)
+    if agent is None:
+        agent = Agent(model=get_bedrock_model(model_id, region_name, temperature), callback_handler=None)
+        agents[key] = agent
+    else:
+        agent.messages.clear()
+    return agent
+
+
+def _usage_snapshot(agent: Agent) -> dict:
+    """Agent에 누적된 토큰 사용량 (strands EventLoopMetrics.accumulated_usage)"""
+    metrics = getattr(agent, 'event_loop_metrics', None)
+    return dict(getattr(metrics, 'accumulated_usage', None) or {})
+
+
+def _record_token_usage(before: dict, after: dict):
+    input_tokens = after.get('inputTokens', 0) - before.get('inputTokens', 0)
+    output_tokens = after.get('outputTokens', 0) - before.get('outputTokens', 0)
+    with _token_stats_lock:
+        _token_stats['calls'] += 1
+        _token_stats['input_tokens'] += input_tokens
+        _token_stats['output_tokens'] += output_tokens
+        _token_stats['max_input_tokens'] = max(_token_stats['max_input_tokens'], input_tokens)
+
+
+def complete(prompt: str, model_id: str = None, region_name: str = None, temperature: float = None):
+    """
+    대화 기록 없이 prompt 하나만 보내고 응답(AgentResult)을 반환합니다.
+    같은 Agent로 반복 호출하면 이전 질문/답변이 매번 다시 전송되므로, 루프 안에서는 이 함수를 사용합니다.
+    호출별 입력/출력 토큰은 get_token_stats()로 확인할 수 있습니다.
+    """
+    agent = get_agent(model_id, region_name, temperature)
+    before = _usage_snapshot(agent)
+    try:
+        return agent(prompt)
+    finally:
+        _record_token_usage(before, _usage_snapshot(agent))
+        agent.messages.clear()
+
+
+def get_token_stats() -> dict:
+    """complete() 호출 수 / 누적 입력·출력 토큰 / 호출당 평균·최대 입력 토큰"""
+    with _token_stats_lock:
+        stats = dict(_token_stats)
+    stats['avg_input_tokens'] = stats['input_tokens'] / stats['calls'] if stats['calls'] else 0.0
+    return stats
+
+
+def reset_token_stats():
+    with _token_stats_lock:
+        for key in _token_stats:
+            _token_stats[key] = 0
+
+
+def print_token_stats(label: str = "Bedrock"):
+    stats = get_token_stats()
+    if not stats['calls']:
+        return
+    print(f"🪙 {label}: {stats['calls']} calls | input {stats['input_tokens']:,} tokens "
+          f"(avg {stats['avg_input_tokens']:,.0f}, max {stats['max_input_tokens']:,}) | "
+          f"output {stats['output_tokens']:,} tokens")
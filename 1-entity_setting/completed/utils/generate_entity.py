@@ -4,8 +4,12 @@
 """
 from datetime import datetime
 from pathlib import Path
-from strands import Agent
-from strands.models import BedrockModel
+from utils.bedrock_pool import get_agent
+
+# 기본 설정
+DEFAULT_MODEL_ID = "global.anthropic.claude-opus-4-5-20251101-v1:0"
+DEFAULT_REGION = "us-west-2"
+DEFAULT_TEMPERATURE = 0.3
 
 
 def load_synonym_prompt() -> str:
@@ -28,13 +32,8 @@ def extract_synonym(payload: dict) -> str:
     Returns:
         str: LLM 응답 (동의어 목록)
     """
-    bedrock_model = BedrockModel(
-        model_id="global.anthropic.claude-opus-4-5-20251101-v1:0",
-        region_name="us-west-2",
-        temperature=0.3,
-    )
-
-    agent = Agent(model=bedrock_model)
+    # 스레드별로 재사용되는 Agent (대화 기록은 비워진 상태)
+    agent = get_agent(DEFAULT_MODEL_ID, DEFAULT_REGION, DEFAULT_TEMPERATURE)
         
     movie_context = payload.get("movie_context", "")
     movie_chunk = payload.get("movie_chunk", "")
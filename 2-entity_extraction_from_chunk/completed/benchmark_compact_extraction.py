@@ -0,0 +1,173 @@
+"""
+Compact Extraction Format Benchmark
+- 기존 tuple 형식 (graph_extraction.md) vs compact 형식 (graph_extraction_compact.md)
+- offline: chunk JSON의 레코드(없으면 프롬프트 예시)를 두 형식으로 직렬화하여 출력 길이 비교 + compact 파싱 왕복 검증
+- live: 실제 Bedrock 호출로 출력 토큰 수(outputTokens)와 지연 시간 비교
+
+Usage:
+    python benchmark_compact_extraction.py            # offline만
+    python benchmark_compact_extraction.py --live 5   # 앞 5개 chunk로 live 비교
+"""
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.parse_utils import parse_extraction_output, parse_compact_extraction_output
+from benchmark_parse_extraction import records_to_output
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+CHUNK_DIR = SCRIPT_DIR / "step" / "chunkings"
+PROMPT_PATH = SCRIPT_DIR / "prompts" / "graph_extraction.md"
+
+
+def records_to_compact_output(entities: list, relationships: list) -> str:
+    """파싱된 레코드를 compact 형식으로 직렬화합니다."""
+    lines = []
+    ids = {}
+    for e in entities:
+        key = (e["entity_name"], e["entity_type"])
+        if key in ids:
+            continue
+        ids[key] = str(len(ids) + 1)
+        lines.append(f'E|{ids[key]}|{e["entity_name"]}|{e["entity_type"]}|{e["entity_description"]}')
+    for r in relationships:
+        source = ids.get((r["source_entity"], r["source_type"]))
+        target = ids.get((r["target_entity"], r["target_type"]))
+        if source is None or target is None:
+            continue
+        lines.append(f'R|{source}|{target}|{r["relationship_description"]}|{r["relationship_strength"]}')
+    return "\n".join(lines) + "\n<END>"
+
+
+def load_chunks() -> list:
+    chunks = []
+    if CHUNK_DIR.exists():
+        for json_file in sorted(CHUNK_DIR.glob("*.json")):
+            if json_file.name == "all_chunks.json":
+                continue
+            with open(json_file, 'r', encoding='utf-8') as f:
+                chunks.append(json.load(f))
+    if chunks:
+        print(f"📂 Chunks: {len(chunks)}개 ({CHUNK_DIR})")
+        return chunks
+
+    # chunk가 없으면 프롬프트 예시(Text/Output)를 chunk 형태로 사용
+    prompt = PROMPT_PATH.read_text(encoding='utf-8')
+    for text, output in re.findall(r'Text:\n(.*?)\n\nOutput:\n(.*?<END>)', prompt, re.DOTALL):
+        with contextlib.redirect_stdout(io.StringIO()):
+            entities, relationships = parse_extraction_output(output)
+        chunks.append({
+            'chunk_id': f"prompt_example_{len(chunks) + 1}",
+            'user_query': text.strip(),
+            'entities': entities,
+            'relationships': relationships
+        })
+    print(f"📂 프롬프트 예시: {len(chunks)}개")
+    return chunks
+
+
+def benchmark_offline(chunks: list):
+    print(f"\n{'='*60}")
+    print("📏 Offline: 출력 길이 비교 (기존 chunk 레코드 재직렬화)")
+    print('='*60)
+
+    tuple_chars = compact_chars = 0
+    tuple_bytes = compact_bytes = 0
+    records = mismatched = 0
+    for chunk in chunks:
+        entities = chunk.get('entities', [])
+        relationships = chunk.get('relationships', [])
+        if not entities:
+            continue
+        tuple_out = records_to_output(entities, relationships)
+        compact_out = records_to_compact_output(entities, relationships)
+        tuple_chars += len(tuple_out)
+        compact_chars += len(compact_out)
+        tuple_bytes += len(tuple_out.encode('utf-8'))
+        compact_bytes += len(compact_out.encode('utf-8'))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = parse_extraction_output(tuple_out)
+            actual = parse_compact_extraction_output(compact_out)
+        records += len(expected[0]) + len(expected[1])
+        if len(expected[1]) != len(actual[1]) or len(expected[0]) != len(actual[0]):
+            mismatched += 1
+
+    if not tuple_chars:
+        print("   ⚠️ entities가 있는 chunk가 없습니다 (extraction_entity.py 먼저 실행)")
+        return
+
+    print(f"   records: {records:,}")
+    print(f"   tuple  : {tuple_chars:>10,} chars | {tuple_bytes:>10,} bytes")
+    print(f"   compact: {compact_chars:>10,} chars | {compact_bytes:>10,} bytes")
+    print(f"   절감   : {(1 - compact_chars / tuple_chars) * 100:.1f}% chars")
+    print(f"   왕복 파싱 불일치 chunk: {mismatched}")
+
+
+def benchmark_live(chunks: list, limit: int):
+    from utils.bedrock_pool import get_token_stats
+    from utils.generate_entity import extract_entities
+
+    print(f"\n{'='*60}")
+    print(f"⏱️ Live: Bedrock 출력 토큰/지연 비교 ({limit} chunks)")
+    print('='*60)
+
+    totals = {
+        'tuple': {'tokens': 0, 'seconds': 0.0, 'entities': 0, 'relationships': 0},
+        'compact': {'tokens': 0, 'seconds': 0.0, 'entities': 0, 'relationships': 0},
+    }
+    for chunk in chunks[:limit]:
+        payload = {"user_query": chunk.get('user_query', '')}
+        for name, compact, parse in (
+            ('tuple', False, parse_extraction_output),
+            ('compact', True, parse_compact_extraction_output),
+        ):
+            # 풀 Agent의 accumulated_usage는 이전 호출까지 누적되므로 호출 전후 집계 차이로 이번 호출 토큰만 계산
+            output_tokens_before = get_token_stats()['output_tokens']
+            start = time.perf_counter()
+            result = extract_entities(payload, compact=compact)
+            elapsed = time.perf_counter() - start
+            output_tokens = get_token_stats()['output_tokens'] - output_tokens_before
+            with contextlib.redirect_stdout(io.StringIO()):
+                entities, relationships = parse(result)
+            t = totals[name]
+            t['tokens'] += output_tokens
+            t['seconds'] += elapsed
+            t['entities'] += len(entities)
+            t['relationships'] += len(relationships)
+        print(f"   {chunk.get('chunk_id', 'unknown')}: "
+              f"tuple {totals['tuple']['tokens']} / compact {totals['compact']['tokens']} tokens (누적)")
+
+    print(f"\n   {'format':<10}{'out_tokens':>12}{'seconds':>10}{'entities':>10}{'rels':>8}")
+    for name, t in totals.items():
+        print(f"   {name:<10}{t['tokens']:>12,}{t['seconds']:>10.1f}{t['entities']:>10}{t['relationships']:>8}")
+    if totals['tuple']['tokens']:
+        saved = 1 - totals['compact']['tokens'] / totals['tuple']['tokens']
+        print(f"   출력 토큰 절감: {saved * 100:.1f}%")
+    if totals['tuple']['seconds']:
+        saved = 1 - totals['compact']['seconds'] / totals['tuple']['seconds']
+        print(f"   지연 시간 절감: {saved * 100:.1f}%")
+
+
+def run_benchmark():
+    chunks = load_chunks()
+    if not chunks:
+        print("⚠️ 벤치마크할 chunk가 없습니다")
+        return
+    benchmark_offline(chunks)
+
+    if "--live" in sys.argv:
+        idx = sys.argv.index("--live")
+        limit = int(sys.argv[idx + 1]) if len(sys.argv) > idx + 1 else 3
+        benchmark_live(chunks, limit)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,193 @@
+"""
+Extraction Parser Benchmark
+- parse_extraction_output (전체 응답 후 파싱) vs ExtractionStreamParser (스트리밍 증분 파싱)
+- 처리량, 첫 레코드까지의 스트림 진행률, 출력 형태 변형에 대한 견고성 비교
+
+Recorded output 소스 (우선순위):
+1. ./step/recorded_outputs/*.txt (extraction_entity.py의 record_dir로 저장한 LLM 원본 응답)
+2. ./step/chunkings/*.json 의 entities/relationships를 프롬프트 형식으로 재구성
+3. prompts/graph_extraction.md 의 예시 출력
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.parse_utils import parse_extraction_output, ExtractionStreamParser
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+RECORDED_DIR = SCRIPT_DIR / "step" / "recorded_outputs"
+CHUNK_DIR = SCRIPT_DIR / "step" / "chunkings"
+PROMPT_PATH = SCRIPT_DIR / "prompts" / "graph_extraction.md"
+
+REPEAT = 20
+SEED = 42
+
+
+def records_to_output(entities: list, relationships: list) -> str:
+    """파싱된 레코드를 프롬프트 출력 형식으로 다시 직렬화합니다."""
+    lines = []
+    for e in entities:
+        lines.append(f'("entity"|{e["entity_name"]}|{e["entity_type"]}|{e["entity_description"]})')
+    for r in relationships:
+        lines.append(
+            f'("relationship"|{r["source_entity"]}|{r["source_type"]}|{r["target_entity"]}|'
+            f'{r["target_type"]}|{r["relationship_description"]}|{r["relationship_strength"]})'
+        )
+    return "##\n".join(lines) + "<END>"
+
+
+def load_recorded_outputs() -> list:
+    """벤치마크 대상 출력 문자열 리스트를 로드합니다."""
+    if RECORDED_DIR.exists():
+        outputs = [p.read_text(encoding='utf-8') for p in sorted(RECORDED_DIR.glob("*.txt"))]
+        if outputs:
+            print(f"📂 Recorded outputs: {len(outputs)}개 ({RECORDED_DIR})")
+            return outputs
+
+    if CHUNK_DIR.exists():
+        outputs = []
+        for json_file in sorted(CHUNK_DIR.glob("*.json")):
+            if json_file.name == "all_chunks.json":
+                continue
+            with open(json_file, 'r', encoding='utf-8') as f:
+                chunk = json.load(f)
+            if chunk.get('entities') or chunk.get('relationships'):
+                outputs.append(records_to_output(chunk.get('entities', []), chunk.get('relationships', [])))
+        if outputs:
+            print(f"📂 Chunk 레코드에서 재구성한 출력: {len(outputs)}개 ({CHUNK_DIR})")
+            return outputs
+
+    prompt = PROMPT_PATH.read_text(encoding='utf-8')
+    outputs = [m.strip() for m in re.findall(r'Output:\n(.*?<END>)', prompt, re.DOTALL)]
+    print(f"📂 프롬프트 예시 출력: {len(outputs)}개")
+    return outputs
+
+
+def split_into_tokens(text: str, rng: random.Random) -> list:
+    """모델 스트림을 흉내내어 1~8자 단위 조각으로 나눕니다."""
+    pieces = []
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 8)
+        pieces.append(text[i:i + n])
+        i += n
+    return pieces
+
+
+def run_batch(text: str):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse_extraction_output(text)
+
+
+def run_stream(pieces: list):
+    """스트리밍 파싱 결과와 첫 레코드가 나온 시점(스트림 진행률)을 반환합니다."""
+    parser = ExtractionStreamParser()
+    total_chars = sum(len(p) for p in pieces)
+    consumed = 0
+    first_record_at = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for piece in pieces:
+            consumed += len(piece)
+            if parser.feed(piece) and first_record_at is None:
+                first_record_at = consumed / total_chars
+        if parser.close() and first_record_at is None:
+            first_record_at = 1.0
+    return parser.entities, parser.relationships, first_record_at
+
+
+def benchmark_throughput(outputs: list, rng: random.Random):
+    print(f"\n{'='*60}")
+    print(f"⏱️ Throughput ({len(outputs)} outputs × {REPEAT} repeats)")
+    print('='*60)
+
+    token_streams = [split_into_tokens(o, rng) for o in outputs]
+    total_bytes = sum(len(o.encode('utf-8')) for o in outputs) * REPEAT
+
+    start = time.perf_counter()
+    batch_records = 0
+    for _ in range(REPEAT):
+        for o in outputs:
+            entities, relationships = run_batch(o)
+            batch_records += len(entities) + len(relationships)
+    batch_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stream_records = 0
+    first_positions = []
+    for _ in range(REPEAT):
+        for pieces in token_streams:
+            entities, relationships, first_at = run_stream(pieces)
+            stream_records += len(entities) + len(relationships)
+            if first_at is not None:
+                first_positions.append(first_at)
+    stream_elapsed = time.perf_counter() - start
+
+    for label, elapsed, records in (
+        ("batch  (parse_extraction_output)", batch_elapsed, batch_records),
+        ("stream (ExtractionStreamParser) ", stream_elapsed, stream_records),
+    ):
+        print(f"   {label}: {elapsed*1000:.1f}ms | "
+              f"{records/elapsed:,.0f} records/s | {total_bytes/elapsed/1024/1024:.2f} MB/s")
+
+    if first_positions:
+        avg_first = sum(first_positions) / len(first_positions)
+        print(f"   첫 레코드 emit 시점: 평균 스트림 {avg_first*100:.1f}% 지점 (batch는 항상 100%)")
+
+
+def make_variants(output: str) -> dict:
+    """모델이 실제로 내는 형식 흔들림을 재현한 변형들."""
+    body = output.replace("<END>", "")
+    return {
+        "original": output,
+        "newline_delimited": re.sub(r'##\s*', '\n', body),
+        "preamble_and_trailer": "다음은 추출 결과입니다:\n" + output + "\n\n(이상입니다.)",
+        "concatenated": re.sub(r'##\s*', '', body),
+        "parens_in_description": output.replace("|MOVIE_CHARACTER|", "|MOVIE_CHARACTER|(등장인물) "),
+        "truncated": output[: int(len(output) * 0.8)],
+    }
+
+
+def benchmark_robustness(outputs: list, rng: random.Random):
+    print(f"\n{'='*60}")
+    print("🧪 Robustness (원본 batch 파싱 결과 대비 회수한 레코드 수)")
+    print('='*60)
+
+    totals = {}
+    for output in outputs:
+        expected_entities, expected_relationships = run_batch(output)
+        expected = len(expected_entities) + len(expected_relationships)
+        if expected == 0:
+            continue
+        for name, variant in make_variants(output).items():
+            b_entities, b_relationships = run_batch(variant)
+            s_entities, s_relationships, _ = run_stream(split_into_tokens(variant, rng))
+            t = totals.setdefault(name, {'expected': 0, 'batch': 0, 'stream': 0})
+            t['expected'] += expected
+            t['batch'] += len(b_entities) + len(b_relationships)
+            t['stream'] += len(s_entities) + len(s_relationships)
+
+    print(f"   {'variant':<24}{'expected':>10}{'batch':>10}{'stream':>10}")
+    for name, t in totals.items():
+        print(f"   {name:<24}{t['expected']:>10}{t['batch']:>10}{t['stream']:>10}")
+
+
+def run_benchmark():
+    outputs = load_recorded_outputs()
+    if not outputs:
+        print("⚠️ 벤치마크할 출력이 없습니다")
+        return
+    rng = random.Random(SEED)
+    benchmark_throughput(outputs, rng)
+    benchmark_robustness(outputs, rng)
+
+
+if __name__ == "__main__":
+    run_benchmark()
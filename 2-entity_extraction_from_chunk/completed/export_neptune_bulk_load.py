@@ -0,0 +1,347 @@
+"""
+Neptune Analytics Bulk Load Exporter
+- step/chunkings의 추출/resolve된 chunk를 메모리에서 집계하여 import용 vertex/edge 파일을 생성
+- data/neptune_graph_import/*.zip 과 같은 스키마 (Vertex_<LABEL>_<n>, Edge_<LABEL>_<n>)
+- pyarrow가 있으면 Parquet, 없으면 openCypher CSV로 저장
+- 전체 재구축 시 save_to_neptune_fast.py의 수천 개 MERGE 대신 한 번의 import task로 적재
+
+Flow:
+1. Read chunks from step/chunkings
+2. aggregate_chunks로 엔티티/관계를 코퍼스 단위로 집계
+3. Vertex (REVIEWER, MOVIE, __Chunk__, 엔티티 label별) / Edge (HAS_CHUNK, WRITTEN_BY, MENTIONS, RELATIONSHIP) 파일 생성
+
+Usage:
+    python export_neptune_bulk_load.py                          # step/neptune_bulk_load 에 파일 생성
+    python export_neptune_bulk_load.py --csv                    # pyarrow가 있어도 CSV로 생성
+    python export_neptune_bulk_load.py import <s3_uri> <role_arn>
+        # 생성된 파일을 S3에 올리고 Neptune Analytics import task 시작 (그래프는 비어 있어야 함)
+
+DESCRIPTION_STORAGE=mentions 이면 엔티티 description을 노드 대신 chunk별 MENTIONS 엣지에 씁니다 (neptune_con과 같은 설정).
+
+주의: chunk의 OpenSearch 인덱싱(chunks 인덱스)은 포함하지 않습니다.
+"""
+import csv
+import json
+import os
+import re
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.chunk_aggregation import aggregate_chunks, print_aggregate_stats, format_chunk_ids
+from neptune.query_templates import is_entity_label
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+CHUNK_DIR = SCRIPT_DIR / "step" / "chunkings"
+OUTPUT_DIR = SCRIPT_DIR / "step" / "neptune_bulk_load"
+
+# 파일당 최대 row 수 (Vertex_<LABEL>_0, _1, ...)
+ROWS_PER_FILE = 100000
+
+# 재실행해도 같은 ~id가 나오도록 고정 namespace로 uuid5 생성
+ID_NAMESPACE = uuid.UUID("6f1c2b1e-7d0a-4c59-9a57-3f3c0b8e2d41")
+
+# Vertex 속성 컬럼 순서 (~id, ~label, embedding 제외) - label별로 실제 값이 있는 컬럼만 사용
+# 예: MOVIE는 {id} 노드와 {name} 엔티티가 함께 있으므로 neptune_id, name, description, id
+VERTEX_PROPERTIES = ['neptune_id', 'name', 'description', 'id', 'text']
+EDGE_PROPERTIES = {
+    'RELATIONSHIP': ['strength', 'description', 'chunk_ids'],
+    'MENTIONS': ['description'],
+}
+DOUBLE_PROPERTIES = {'strength'}
+
+# neptune.neptune_con.DESCRIPTION_STORAGE와 같은 환경변수 (export는 Neptune 접속 없이 실행되므로 직접 읽음)
+DESCRIPTION_STORAGE = os.environ.get('DESCRIPTION_STORAGE', 'node').lower()
+
+
+def read_chunks_from_dir(chunk_dir: Path) -> list:
+    chunks = []
+    if not chunk_dir.exists():
+        print(f"⚠️ Directory not found: {chunk_dir}")
+        return chunks
+    for json_file in sorted(chunk_dir.glob("*.json")):
+        if json_file.name == "all_chunks.json":
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            chunks.append(json.load(f))
+    return chunks
+
+
+def stable_id(*parts) -> str:
+    """label + key로 결정적인 ~id 생성"""
+    return str(uuid.uuid5(ID_NAMESPACE, "\x1f".join(parts)))
+
+
+def make_neptune_id(name: str, entity_type: str, vertex_id: str) -> str:
+    """cyper_queries.generate_neptune_id와 같은 형식 (이름_타입_8자리), 접미사는 ~id에서 결정적으로 생성"""
+    clean_name = re.sub(r'[^\w가-힣]', '_', name)
+    clean_name = re.sub(r'_+', '_', clean_name).strip('_')
+    return f"{clean_name}_{entity_type}_{vertex_id.replace('-', '')[:8]}"
+
+
+def build_graph(aggregate: dict) -> tuple:
+    """
+    집계 결과를 label별 vertex / edge row로 변환합니다.
+
+    Returns:
+        tuple: ({label: [vertex_row]}, {label: [edge_row]})
+    """
+    vertices = {}
+    edges = {}
+
+    def add_vertex(label, vertex_id, **props):
+        vertices.setdefault(label, []).append({'~id': vertex_id, '~label': label, **props})
+
+    def add_edge(label, from_id, to_id, **props):
+        edge_id = stable_id('edge', label, from_id, to_id)
+        edges.setdefault(label, []).append({'~id': edge_id, '~from': from_id, '~to': to_id, '~label': label, **props})
+
+    reviewer_ids = {}
+    for reviewer in aggregate['reviewers']:
+        reviewer_ids[reviewer] = stable_id('REVIEWER.id', reviewer)
+        add_vertex('REVIEWER', reviewer_ids[reviewer], id=reviewer,
+                   neptune_id=make_neptune_id(reviewer, 'REVIEWER', reviewer_ids[reviewer]))
+
+    # REVIEWER / MOVIE {id} 노드는 텍스트에서 추출된 {name} 엔티티와 별도 노드 (MERGE 파이프라인과 동일)
+    movie_ids = {}
+    for movie_id in aggregate['movies']:
+        movie_ids[movie_id] = stable_id('MOVIE.id', movie_id)
+        add_vertex('MOVIE', movie_ids[movie_id], id=movie_id,
+                   neptune_id=make_neptune_id(movie_id, 'MOVIE', movie_ids[movie_id]))
+
+    chunk_ids = {}
+    for chunk in aggregate['chunks']:
+        chunk_id = chunk['chunk_id']
+        if chunk_id in chunk_ids:
+            continue
+        chunk_ids[chunk_id] = stable_id('__Chunk__', chunk_id)
+        add_vertex('__Chunk__', chunk_ids[chunk_id], id=chunk_id, text=chunk['text'],
+                   neptune_id=make_neptune_id(chunk_id, '__Chunk__', chunk_ids[chunk_id]))
+        add_edge('HAS_CHUNK', movie_ids[chunk['movie_id']], chunk_ids[chunk_id])
+        add_edge('WRITTEN_BY', chunk_ids[chunk_id], reviewer_ids[chunk['reviewer']])
+
+    entity_ids = {}
+    invalid = 0
+    for (entity_type, entity_name), entity in aggregate['entities'].items():
+        if not is_entity_label(entity_type):
+            # MERGE 파이프라인과 같이 허용되지 않은 label은 만들지 않음 (관계도 끝점 없음으로 제외됨)
+            invalid += 1
+            continue
+        vertex_id = entity_ids[(entity_name, entity_type)] = stable_id(entity_type, entity_name)
+        # Neptune은 배열 속성을 지원하지 않으므로 JSON 문자열로 저장
+        if DESCRIPTION_STORAGE == 'mentions':
+            add_vertex(entity_type, vertex_id,
+                       name=entity_name,
+                       neptune_id=make_neptune_id(entity_name, entity_type, vertex_id))
+            for chunk_id, descriptions in entity['chunk_descriptions'].items():
+                add_edge('MENTIONS', chunk_ids[chunk_id], vertex_id,
+                         description=json.dumps(descriptions, ensure_ascii=False))
+            continue
+
+        add_vertex(entity_type, vertex_id,
+                   name=entity_name,
+                   description=json.dumps(entity['descriptions'], ensure_ascii=False),
+                   neptune_id=make_neptune_id(entity_name, entity_type, vertex_id))
+        for chunk_id in entity['chunk_ids']:
+            add_edge('MENTIONS', chunk_ids[chunk_id], vertex_id)
+
+    missing = 0
+    for (source, source_type, target, target_type), rel in aggregate['relationships'].items():
+        from_id = entity_ids.get((source, source_type))
+        to_id = entity_ids.get((target, target_type))
+        if from_id is None or to_id is None:
+            # 엔티티로 추출되지 않은 이름을 참조하는 관계 (MERGE 파이프라인에서도 MATCH 실패로 빠짐)
+            missing += 1
+            continue
+        add_edge('RELATIONSHIP', from_id, to_id,
+                 strength=rel['strength'],
+                 description=json.dumps(rel['descriptions'], ensure_ascii=False),
+                 chunk_ids=format_chunk_ids(rel['chunk_descriptions']))
+
+    if invalid:
+        print(f"   ⚠️ 허용되지 않은 entity_type 엔티티 제외: {invalid}개")
+    if missing:
+        print(f"   ⚠️ 양 끝 엔티티가 없는 관계 제외: {missing}개")
+    return vertices, edges
+
+
+def vertex_columns(rows: list) -> list:
+    return [c for c in VERTEX_PROPERTIES if any(c in r for r in rows)]
+
+
+def edge_columns(label: str, rows: list) -> list:
+    return [c for c in EDGE_PROPERTIES.get(label, []) if any(c in r for r in rows)]
+
+
+def iter_batches(rows: list):
+    for part, start in enumerate(range(0, len(rows), ROWS_PER_FILE)):
+        yield part, rows[start:start + ROWS_PER_FILE]
+
+
+def write_parquet(output_dir: Path, vertices: dict, edges: dict) -> list:
+    """import zip과 같은 Parquet 스키마로 저장 (~label은 vertex에서 list<string>)"""
+    written = []
+    for label, rows in vertices.items():
+        columns = vertex_columns(rows)
+        fields = [pa.field('~id', pa.string()), pa.field('~label', pa.list_(pa.string())),
+                  pa.field('embedding', pa.list_(pa.float32()))]
+        fields += [pa.field(c, pa.string()) for c in columns]
+        schema = pa.schema(fields)
+        for part, batch in iter_batches(rows):
+            data = {
+                '~id': [r['~id'] for r in batch],
+                '~label': [[label] for _ in batch],
+                'embedding': [None for _ in batch],
+            }
+            for c in columns:
+                data[c] = [r.get(c) for r in batch]
+            path = output_dir / f"Vertex_{label}_{part}.parquet"
+            pq.write_table(pa.table(data, schema=schema), path)
+            written.append(path)
+
+    for label, rows in edges.items():
+        columns = edge_columns(label, rows)
+        fields = [pa.field(c, pa.string()) for c in ('~id', '~from', '~to', '~label')]
+        fields += [pa.field(c, pa.float64() if c in DOUBLE_PROPERTIES else pa.string()) for c in columns]
+        schema = pa.schema(fields)
+        for part, batch in iter_batches(rows):
+            data = {c: [r[c] for r in batch] for c in ('~id', '~from', '~to', '~label')}
+            for c in columns:
+                data[c] = [r.get(c) for r in batch]
+            path = output_dir / f"Edge_{label}_{part}.parquet"
+            pq.write_table(pa.table(data, schema=schema), path)
+            written.append(path)
+    return written
+
+
+def write_csv(output_dir: Path, vertices: dict, edges: dict) -> list:
+    """openCypher CSV 형식으로 저장 (속성 헤더에 :String / :Double 타입 표기)"""
+    written = []
+
+    def header(column):
+        return f"{column}:Double" if column in DOUBLE_PROPERTIES else f"{column}:String"
+
+    for label, rows in vertices.items():
+        columns = vertex_columns(rows)
+        for part, batch in iter_batches(rows):
+            path = output_dir / f"Vertex_{label}_{part}.csv"
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['~id', '~label'] + [header(c) for c in columns])
+                for r in batch:
+                    writer.writerow([r['~id'], label] + ['' if r.get(c) is None else r[c] for c in columns])
+            written.append(path)
+
+    for label, rows in edges.items():
+        columns = edge_columns(label, rows)
+        for part, batch in iter_batches(rows):
+            path = output_dir / f"Edge_{label}_{part}.csv"
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['~id', '~from', '~to', '~label'] + [header(c) for c in columns])
+                for r in batch:
+                    writer.writerow([r['~id'], r['~from'], r['~to'], label] +
+                                    ['' if r.get(c) is None else r[c] for c in columns])
+            written.append(path)
+    return written
+
+
+def clear_output_directory(output_dir: Path):
+    if output_dir.exists():
+        for file in list(output_dir.glob("*.parquet")) + list(output_dir.glob("*.csv")):
+            file.unlink()
+
+
+def export_bulk_load(chunk_dir: Path = CHUNK_DIR, output_dir: Path = OUTPUT_DIR, use_csv: bool = False) -> list:
+    """
+    chunk store를 집계하여 Neptune Analytics import 파일을 생성합니다.
+
+    Returns:
+        list: 생성된 파일 경로
+    """
+    print("=" * 60)
+    print("📦 Neptune Analytics Bulk Load Export")
+    print("=" * 60)
+
+    chunks = read_chunks_from_dir(chunk_dir)
+    print(f"📝 Loaded Chunks: {len(chunks)}")
+    if not chunks:
+        print("⚠️ No chunks found to export")
+        return []
+
+    aggregate = aggregate_chunks(chunks)
+    print_aggregate_stats(aggregate, chunks)
+
+    vertices, edges = build_graph(aggregate)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    clear_output_directory(output_dir)
+
+    if pa is None and not use_csv:
+        print("   ℹ️ pyarrow가 없어 openCypher CSV로 저장합니다 (pip install pyarrow 시 Parquet)")
+        use_csv = True
+    written = write_csv(output_dir, vertices, edges) if use_csv else write_parquet(output_dir, vertices, edges)
+
+    print(f"\n{'='*60}")
+    for label, rows in vertices.items():
+        print(f"   Vertex {label:<20} {len(rows):>8,}")
+    for label, rows in edges.items():
+        print(f"   Edge   {label:<20} {len(rows):>8,}")
+    print(f"✅ {len(written)} files → {output_dir} ({'CSV' if use_csv else 'Parquet'})")
+    return written
+
+
+def start_import(s3_uri: str, role_arn: str, output_dir: Path = OUTPUT_DIR):
+    """
+    생성된 파일을 S3에 업로드하고 Neptune Analytics import task를 시작합니다.
+    import task는 빈 그래프에만 적재할 수 있습니다 (delete_all_nodes_and_relationships 먼저 실행).
+    """
+    import boto3
+    from neptune.neptune_con import get_neptune_client, NEPTUNE_GRAPH_ID, AWS_REGION
+
+    files = sorted(list(output_dir.glob("*.parquet")) + list(output_dir.glob("*.csv")))
+    if not files:
+        print(f"⚠️ 업로드할 파일이 없습니다: {output_dir}")
+        return None
+
+    bucket, _, prefix = s3_uri.replace("s3://", "", 1).partition("/")
+    prefix = prefix.rstrip("/")
+    s3 = boto3.client('s3', region_name=AWS_REGION)
+    for path in files:
+        key = f"{prefix}/{path.name}" if prefix else path.name
+        s3.upload_file(str(path), bucket, key)
+        print(f"   ⬆️ s3://{bucket}/{key}")
+
+    is_parquet = files[0].suffix == ".parquet"
+    import_kwargs = {
+        'graphIdentifier': NEPTUNE_GRAPH_ID,
+        'source': f"s3://{bucket}/{prefix}/" if prefix else f"s3://{bucket}/",
+        'roleArn': role_arn,
+        'format': 'PARQUET' if is_parquet else 'OPEN_CYPHER',
+        'failOnError': True,
+    }
+    if is_parquet:
+        import_kwargs['parquetType'] = 'COLUMNAR'
+
+    response = get_neptune_client().start_import_task(**import_kwargs)
+    print(f"🚀 Import task: {response.get('taskId')} ({response.get('status')})")
+    return response
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "import":
+        if len(sys.argv) < 4:
+            print("Usage: python export_neptune_bulk_load.py import <s3_uri> <role_arn>")
+            sys.exit(1)
+        start_import(sys.argv[2], sys.argv[3])
+    else:
+        export_bulk_load(use_csv="--csv" in sys.argv[1:])
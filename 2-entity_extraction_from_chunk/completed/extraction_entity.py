@@ -4,12 +4,44 @@ Flow:
 1. Read chunks from ./step/chunkings
 2. Extract entities from chunk (LLM)
 3. Save entities and relationships back to JSON
+4. Record per-chunk status in the run journal (./step/run_journal/extraction.jsonl)
+
+Usage:
+    python extraction_entity.py            # 전체 처리 (저널 초기화)
+    python extraction_entity.py --resume   # done이 아닌 chunk만 처리
+    python extraction_entity.py status     # 진행 상황 출력
+    python extraction_entity.py --compact  # compact 출력 형식 사용 (출력 토큰 절감)
+    python extraction_entity.py --with-synonyms
+        # 동의어 + entity/relationship을 한 번의 LLM 호출로 추출
+        # 동의어는 OpenSearch entities 인덱스에 병합, 그래프 레코드는 chunk JSON에 저장
+        # (1-entity_setting의 synonym_setting_from_cast.py 호출을 대체, --compact와 함께 사용 불가)
 """
 import json
 import os
+import sys
+import traceback
 from pathlib import Path
-from utils.parse_utils import parse_extraction_output
-from utils.generate_entity import extract_entities
+from utils.parse_utils import (
+    parse_extraction_output,
+    parse_compact_extraction_output,
+    parse_combined_extraction_output
+)
+from utils.generate_entity import (
+    extract_entities,
+    extract_entities_and_synonyms,
+    stream_extract_entities
+)
+from utils.helper import load_movie_contexts
+from utils.run_journal import RunJournal, STATUS_IN_FLIGHT, STATUS_DONE, STATUS_FAILED
+from utils.synonym import clean_entities_whitespace, process_entity_synonym
+
+DEFAULT_JOURNAL_PATH = "./step/run_journal/extraction.jsonl"
+
+# movie_cast 디렉토리 (chunking.py와 동일)
+DEFAULT_CAST_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.pardir, os.pardir, "data", "raw_csv", "workshop"
+))
 
 
 def read_chunks_from_dir(chunk_dir: str = "./step/chunkings") -> list:
@@ -59,22 +91,139 @@ def save_chunk_with_entities(chunk_data: dict) -> str:
     # _filepath 필드 제거 (내부용)
     save_data = {k: v for k, v in chunk_data.items() if k != '_filepath'}
     
-    with open(filepath, 'w', encoding='utf-8') as f:
+    # 임시 파일에 쓴 뒤 교체 - 쓰는 도중 죽어도 원본 chunk 파일이 깨지지 않음
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(save_data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
     
     print(f"   💾 Saved: {filepath}")
     return filepath
 
 
+def save_raw_output(chunk_data: dict, raw_output: str, record_dir: str) -> str:
+    """
+    LLM 원본 응답을 텍스트 파일로 저장합니다 (파서 벤치마크용 recorded output).
+    """
+    Path(record_dir).mkdir(parents=True, exist_ok=True)
+    filepath = os.path.join(record_dir, f"{chunk_data.get('chunk_id', 'unknown')}.txt")
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(raw_output)
+    return filepath
+
+
+def print_streamed_record(record: dict):
+    """스트리밍 중 완성된 레코드를 바로 출력합니다."""
+    if record["record_type"] == "entity":
+        print(f"   ➕ entity: {record['entity_name']} ({record['entity_type']})")
+    else:
+        print(f"   ➕ relationship: {record['source_entity']} → {record['target_entity']}")
+
+
+def route_synonyms_to_opensearch(opensearch_client, synonyms: list, applied: dict, stats: dict):
+    """
+    추출된 동의어를 OpenSearch 엔티티에 병합합니다.
+    같은 영화의 chunk들은 같은 동의어를 반복해서 내므로, 이번 실행에서 이미 반영한 동의어만 있으면 건너뜁니다.
+    
+    Args:
+        opensearch_client: OpenSearch 클라이언트
+        synonyms: [{"entity_name", "entity_type", "synonyms"}]
+        applied: {entity_name: set(synonyms)} - 이번 실행에서 반영한 동의어
+        stats: 동의어 처리 통계
+    
+    Raises:
+        RuntimeError: 검색 / 업데이트에 실패한 동의어가 있을 때 (나머지는 모두 처리한 뒤)
+                      → 호출부에서 chunk를 failed로 기록하고 --resume 때 다시 반영
+    """
+    failures = []
+    for entity_data in clean_entities_whitespace(synonyms):
+        entity_name = entity_data['entity_name']
+        new_synonyms = set(entity_data['synonyms'])
+        if new_synonyms <= applied.get(entity_name, set()):
+            stats['skipped'] += 1
+            continue
+
+        result = process_entity_synonym(opensearch_client, entity_data)
+        if result['status'] == 'not_found':
+            stats['not_found'] += 1
+        elif result['updated']:
+            stats['updated'] += 1
+            applied[entity_name] = set(result['merged_synonyms'])
+        else:
+            stats['failed'] += 1
+            failures.append(f"{entity_name}: {result.get('error', result['status'])}")
+    
+    if failures:
+        raise RuntimeError(f"동의어 반영 실패 {len(failures)}건 - " + "; ".join(failures))
+
+
+def get_chunk_key(chunk: dict) -> str:
+    """저널 key - chunk_id가 없으면 파일명을 사용"""
+    return chunk.get('chunk_id') or Path(chunk['_filepath']).stem
+
+
+def print_journal_status(journal_path: str = DEFAULT_JOURNAL_PATH, chunk_dir: str = "./step/chunkings"):
+    """저널 기준 진행 상황을 출력합니다."""
+    if not Path(journal_path).exists():
+        print(f"   ⚠️ Journal not found: {journal_path}")
+        return
+
+    journal = RunJournal(journal_path)
+    chunk_keys = [get_chunk_key(c) for c in read_chunks_from_dir(chunk_dir)]
+    # 읽기 전용: 새 chunk는 저널에 기록하지 않고 pending으로만 집계
+    summary = journal.summary(chunk_keys)
+
+    print(f"\n{'='*60}")
+    print(f"📊 Extraction Run Status ({journal_path})")
+    print('='*60)
+    print(f"   Total: {summary['total']} | Attempts: {summary['attempts']}")
+    print(f"   ✅ done: {summary['done']}  ⏳ pending: {summary['pending']}  "
+          f"🔄 in_flight: {summary['in_flight']}  ❌ failed: {summary['failed']}")
+    if summary['total']:
+        print(f"   Progress: {summary['done'] / summary['total'] * 100:.1f}%")
+    if summary['in_flight']:
+        print("   ⚠️ in_flight chunk는 이전 실행이 중단된 것입니다 (--resume 시 재처리)")
+    for entry in journal.failed_entries():
+        print(f"   ❌ {entry['key']} (attempts={entry['attempts']}): {entry.get('error', '')[:200]}")
+
+
 def run_entity_extraction_pipeline(
-    chunk_dir: str = "./step/chunkings"
+    chunk_dir: str = "./step/chunkings",
+    stream: bool = False,
+    record_dir: str = None,
+    resume: bool = False,
+    journal_path: str = DEFAULT_JOURNAL_PATH,
+    compact: bool = False,
+    with_synonyms: bool = False,
+    cast_dir: str = DEFAULT_CAST_DIR
 ):
     """
     ./step/chunkings에서 chunk 파일들을 읽어 엔티티/관계를 추출하고 원본 파일에 덮어씁니다.
     
     Args:
         chunk_dir: chunk JSON 파일들이 있는 디렉토리
+        stream: True면 스트리밍 파서로 레코드가 닫히는 즉시 처리
+        record_dir: LLM 원본 응답을 저장할 디렉토리 (stream=False일 때만, 벤치마크용)
+        resume: True면 저널에서 done이 아닌 chunk만 처리
+        journal_path: chunk별 상태를 기록할 저널 파일 경로
+        compact: True면 compact 출력 형식으로 추출 (stream=False일 때만)
+        with_synonyms: True면 동의어와 그래프 레코드를 한 번의 호출로 추출하고 동의어는 OpenSearch에 병합
+                       (compact / stream과 함께 쓸 수 없음)
+        cast_dir: with_synonyms에서 영화 컨텍스트를 만들 movie_cast 디렉토리
+
+    Raises:
+        ValueError: with_synonyms와 compact / stream을 함께 지정한 경우
     """
+    if with_synonyms and (compact or stream):
+        raise ValueError("with_synonyms는 compact / stream 출력 형식과 함께 사용할 수 없습니다.")
+
+    # 새 실행이면 이전 저널을 비우고 시작
+    if not resume and Path(journal_path).exists():
+        os.remove(journal_path)
+    journal = RunJournal(journal_path)
+
     # chunk 파일들 읽기
     chunks = read_chunks_from_dir(chunk_dir)
     print(f"   📝 Loaded Chunks: {len(chunks)}")
@@ -83,32 +232,91 @@ def run_entity_extraction_pipeline(
         print("   ⚠️ No chunks found to process")
         return
     
+    journal.register(get_chunk_key(c) for c in chunks)
+    if resume:
+        remaining = set(journal.remaining(get_chunk_key(c) for c in chunks))
+        print(f"   ⏭️ Resume: skip {len(chunks) - len(remaining)} done, process {len(remaining)}")
+        chunks = [c for c in chunks if get_chunk_key(c) in remaining]
+    
+    if with_synonyms:
+        from opensearch.opensearch_con import get_opensearch_client
+        opensearch_client = get_opensearch_client()
+        movie_contexts = load_movie_contexts(cast_dir)
+        applied_synonyms = {}
+        synonym_stats = {'updated': 0, 'skipped': 0, 'not_found': 0, 'failed': 0}
+        print(f"   🎬 Movie contexts: {len(movie_contexts)}")
+    
+    failed = 0
     for j, chunk in enumerate(chunks, 1):
+        key = get_chunk_key(chunk)
         print(f"\n   --- Chunk {j}/{len(chunks)} ---")
         print(f"   📄 ID: {chunk.get('chunk_id', 'unknown')}")
         print(f"   📝 Chunk: {chunk.get('user_query', '')[:400]}...")
         
-        # Step 1: LLM으로 엔티티/관계 추출
-        print(f"\n   --- Chunk Reformation ---")
+        journal.mark(key, STATUS_IN_FLIGHT, filepath=chunk['_filepath'])
+        try:
+            # Step 1: LLM으로 엔티티/관계 추출
+            print(f"\n   --- Chunk Reformation ---")
 
-        result = extract_entities({"user_query": chunk.get('user_query', '')})
-        entities, relationships = parse_extraction_output(result)
-        
-        # chunk에 엔티티/관계 추가
-        chunk["entities"] = entities
-        chunk["relationships"] = relationships
-        
-        print(f"   ✅ Entities: {len(entities)}, Relationships: {len(relationships)}")
+            payload = {"user_query": chunk.get('user_query', '')}
+            synonyms = None
+            if with_synonyms:
+                payload["movie_context"] = movie_contexts.get(chunk.get('movie_id'), "")
+                result = extract_entities_and_synonyms(payload)
+                if record_dir:
+                    save_raw_output(chunk, str(result), record_dir)
+                entities, relationships, synonyms = parse_combined_extraction_output(result)
+            elif stream:
+                entities, relationships = stream_extract_entities(payload, on_record=print_streamed_record)
+            else:
+                result = extract_entities(payload, compact=compact)
+                if record_dir:
+                    save_raw_output(chunk, str(result), record_dir)
+                if compact:
+                    entities, relationships = parse_compact_extraction_output(result)
+                else:
+                    entities, relationships = parse_extraction_output(result)
+            
+            # chunk에 엔티티/관계 추가
+            chunk["entities"] = entities
+            chunk["relationships"] = relationships
+            
+            print(f"   ✅ Entities: {len(entities)}, Relationships: {len(relationships)}")
+            
+            # Step 2: 동의어는 OpenSearch 엔티티에 병합
+            # (검색 / 업데이트 오류면 route_synonyms_to_opensearch가 예외 → chunk 파일을 쓰지 않고 failed 처리)
+            if synonyms:
+                print(f"   🔤 Synonyms: {len(synonyms)}")
+                route_synonyms_to_opensearch(opensearch_client, synonyms, applied_synonyms, synonym_stats)
+            
+            # Step 3: 원본 파일에 덮어쓰기
+            save_chunk_with_entities(chunk)
+        except Exception as e:
+            failed += 1
+            journal.mark(key, STATUS_FAILED, filepath=chunk['_filepath'], error=f"{type(e).__name__}: {e}")
+            print(f"   ❌ Failed: {key} - {e}")
+            traceback.print_exc()
+            continue
         
-        # Step 2: 원본 파일에 덮어쓰기
-        save_chunk_with_entities(chunk)
-        print(f"   💾 Saved: {chunk.get('_filepath')}")
+        journal.mark(key, STATUS_DONE, filepath=chunk['_filepath'],
+                     entities=len(entities), relationships=len(relationships))
     
     print(f"\n{'='*60}")
-    print(f"✅ Entity extraction completed for {len(chunks)} chunks")
+    print(f"✅ Entity extraction completed for {len(chunks) - failed} chunks (failed: {failed})")
+    if with_synonyms:
+        print(f"   🔤 Synonyms - updated: {synonym_stats['updated']}, skipped: {synonym_stats['skipped']}, "
+              f"not_found: {synonym_stats['not_found']}, failed: {synonym_stats['failed']}")
+    if failed:
+        print(f"   💡 실패한 chunk 재처리: python extraction_entity.py --resume")
 
 
 if __name__ == "__main__":
-    run_entity_extraction_pipeline(
-        chunk_dir="./step/chunkings"
-    )
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        print_journal_status(DEFAULT_JOURNAL_PATH, chunk_dir="./step/chunkings")
+    else:
+        run_entity_extraction_pipeline(
+            chunk_dir="./step/chunkings",
+            resume="--resume" in sys.argv[1:],
+            compact="--compact" in sys.argv[1:],
+            with_synonyms="--with-synonyms" in sys.argv[1:]
+        )
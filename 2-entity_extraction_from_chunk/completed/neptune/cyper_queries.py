@@ -1,8 +1,17 @@
 """
 Neptune Cypher 쿼리 유틸리티
 """
-from neptune.neptune_con import execute_cypher
-from opensearch.opensearch_search import save_chunk_to_opensearch
+from neptune.neptune_con import (
+    execute_cypher,
+    execute_cypher_strict,
+    DESCRIPTION_STORAGE,
+    DESCRIPTION_STORAGE_MENTIONS,
+    iter_cypher,
+    NEPTUNE_PAGE_SIZE
+)
+from opensearch.chunk_index_writer import enqueue_chunk_index
+from neptune.query_templates import register_template, is_entity_label, ALLOWED_LABELS
+from utils.chunk_aggregation import aggregate_relationship_pairs
 import uuid
 import re
 import json
@@ -29,15 +38,18 @@ def generate_neptune_id(name, entity_type):
     return neptune_id
 
 
+ENTITY_EXISTS = register_template('entity_exists', """
+    MATCH (n:{label} {{name: $entity_name}})
+    RETURN count(n) AS count
+    """)
+
+
 def check_entity_exists(entity_name, entity_type):
     """
     Check if an entity already exists in Neptune.
     Returns True if exists, False otherwise.
     """
-    find_query = f"""
-    MATCH (n:{entity_type} {{name: $entity_name}})
-    RETURN count(n) AS count
-    """
+    find_query = ENTITY_EXISTS.render(label=entity_type)
     result = execute_cypher(find_query, entity_name=entity_name)
     if result and 'results' in result and result['results']:
         return result['results'][0].get('count', 0) > 0
@@ -60,6 +72,19 @@ def check_relationship_exists(entity1, entity2):
     return False
 
 
+ENTITY_FIND = register_template('entity_find', """
+    MATCH (n:{label} {{name: $entity_name}})
+    RETURN n.description AS description, n.neptune_id AS neptune_id
+    """)
+
+ENTITY_SET_AND_MENTION = register_template('entity_set_and_mention', """
+    MATCH (c:__Chunk__ {{id: $chunk_id}})
+    MERGE (n:{label} {{name: $entity_name}})
+    SET n.description = $descriptions, n.neptune_id = $neptune_id
+    MERGE (n)<-[:MENTIONS]-(c)
+    """)
+
+
 def import_nodes_with_dynamic_label(entities, movie_id, reviewer_id, chunk_id, text, chunk_hash):
     """
     Import nodes with dynamic labels by grouping entities by type.
@@ -74,7 +99,8 @@ def import_nodes_with_dynamic_label(entities, movie_id, reviewer_id, chunk_id, t
     chunk_neptune_id = generate_neptune_id(chunk_id, "__Chunk__")
     
     #### def save_chunk 
-    save_chunk_to_opensearch(chunk_hash, chunk_id, text)
+    # 임베딩/색인은 write-behind 큐에서 처리 (그래프 쓰기가 임베딩을 기다리지 않음)
+    enqueue_chunk_index(chunk_hash, chunk_id, text)
 
     base_query = """
     MERGE (r:REVIEWER {id: $reviewer_id})
@@ -109,11 +135,12 @@ def import_nodes_with_dynamic_label(entities, movie_id, reviewer_id, chunk_id, t
     
     # Create or update entities with accumulated descriptions and neptune_id
     for (entity_type, entity_name), new_descriptions in entity_map.items():
+        if not is_entity_label(entity_type):
+            print(f"⚠️ 허용되지 않은 entity_type 건너뜀: {entity_type} ({entity_name})")
+            continue
+
         # First, try to get existing entity (including neptune_id)
-        find_query = f"""
-        MATCH (n:{entity_type} {{name: $entity_name}})
-        RETURN n.description AS description, n.neptune_id AS neptune_id
-        """
+        find_query = ENTITY_FIND.render(label=entity_type)
         existing = execute_cypher(find_query, entity_name=entity_name)
         
         # Merge existing descriptions with new ones
@@ -154,12 +181,7 @@ def import_nodes_with_dynamic_label(entities, movie_id, reviewer_id, chunk_id, t
             neptune_id = existing_neptune_id
         
         # Create/update entity and link to chunk with neptune_id
-        query = f"""
-        MATCH (c:__Chunk__ {{id: $chunk_id}})
-        MERGE (n:{entity_type} {{name: $entity_name}})
-        SET n.description = $descriptions, n.neptune_id = $neptune_id
-        MERGE (n)<-[:MENTIONS]-(c)
-        """
+        query = ENTITY_SET_AND_MENTION.render(label=entity_type)
         result = execute_cypher(query, chunk_id=chunk_id, 
                                entity_name=entity_name, descriptions=descriptions_str, 
                                neptune_id=neptune_id)
@@ -169,6 +191,286 @@ def import_nodes_with_dynamic_label(entities, movie_id, reviewer_id, chunk_id, t
     return {'results': results, 'stats': stats}
 
 
+def merge_chunk_base_nodes(movie_id, reviewer_id, chunk_id, text, strict=False):
+    """
+    REVIEWER / MOVIE / __Chunk__ 노드와 HAS_CHUNK, WRITTEN_BY 관계를 MERGE합니다.
+    """
+    base_query = """
+    MERGE (r:REVIEWER {id: $reviewer_id})
+    ON CREATE SET r.neptune_id = $reviewer_neptune_id
+    MERGE (m:MOVIE {id: $movie_id})
+    ON CREATE SET m.neptune_id = $movie_neptune_id
+    MERGE (m)-[:HAS_CHUNK]->(c:__Chunk__ {id: $chunk_id})
+    ON CREATE SET c.neptune_id = $chunk_neptune_id
+    SET c.text = $text
+    MERGE (c)-[:WRITTEN_BY]->(r)
+    """
+    run = execute_cypher_strict if strict else execute_cypher
+    return run(base_query, movie_id=movie_id, reviewer_id=reviewer_id,
+               chunk_id=chunk_id, text=text,
+               reviewer_neptune_id=generate_neptune_id(reviewer_id, "REVIEWER"),
+               movie_neptune_id=generate_neptune_id(movie_id, "MOVIE"),
+               chunk_neptune_id=generate_neptune_id(chunk_id, "__Chunk__"))
+
+
+UPSERT_ENTITY_ROWS = register_template('upsert_entity_rows', """
+    UNWIND $rows AS row
+    MATCH (c:__Chunk__ {{id: $chunk_id}})
+    OPTIONAL MATCH (existing:{label} {{name: row.name}})
+    WITH row, c, count(existing) > 0 AS is_existing
+    MERGE (n:{label} {{name: row.name}})
+    ON CREATE SET n.neptune_id = row.neptune_id
+    ON MATCH SET n.neptune_id = coalesce(n.neptune_id, row.neptune_id)
+    WITH row, c, n, is_existing
+    OPTIONAL MATCH (n)<-[seen:MENTIONS]-(c)
+    WITH row, c, n, is_existing, count(seen) > 0 AS replayed
+    SET n.description = CASE
+        WHEN replayed THEN n.description
+        WHEN n.description IS NULL OR n.description = '[]' THEN row.descriptions
+        ELSE substring(n.description, 0, size(n.description) - 1) + ', ' + substring(row.descriptions, 1)
+    END
+    MERGE (n)<-[:MENTIONS]-(c)
+    RETURN row.name AS name, is_existing
+    """)
+
+UPSERT_ENTITY_ROWS_MENTIONS = register_template('upsert_entity_rows_mentions', """
+    UNWIND $rows AS row
+    MATCH (c:__Chunk__ {{id: $chunk_id}})
+    OPTIONAL MATCH (existing:{label} {{name: row.name}})
+    WITH row, c, count(existing) > 0 AS is_existing
+    MERGE (n:{label} {{name: row.name}})
+    ON CREATE SET n.neptune_id = row.neptune_id
+    ON MATCH SET n.neptune_id = coalesce(n.neptune_id, row.neptune_id)
+    MERGE (n)<-[m:MENTIONS]-(c)
+    SET m.description = row.descriptions
+    RETURN row.name AS name, is_existing
+    """)
+
+
+def upsert_entity_rows(label, rows, chunk_id, strict=False):
+    """
+    같은 label의 엔티티들을 한 번의 UNWIND 쿼리로 upsert하고 chunk에 MENTIONS로 연결합니다.
+
+    description은 JSON 문자열 리스트이므로 서버에서 문자열로 이어붙입니다:
+        '["a", "b"]' + '["c"]' → '["a", "b", "c"]'
+    이 chunk의 MENTIONS가 이미 있으면 (이전 시도에서 기록됨) 이어붙이지 않으므로 재시도해도 중복되지 않습니다.
+    다른 chunk가 같은 문장을 가져온 경우는 mention마다 그대로 이어붙입니다.
+    DESCRIPTION_STORAGE=mentions이면 노드는 건드리지 않고 이 chunk의 descriptions를 MENTIONS 엣지에 저장합니다.
+
+    Args:
+        label: 엔티티 label (entity_type)
+        rows: [{'name', 'neptune_id', 'descriptions' (JSON 문자열, 1개 이상)}]
+        chunk_id: MENTIONS를 연결할 __Chunk__ id
+        strict: True면 실패 시 예외를 올림, False면 None 반환
+
+    Returns:
+        execute_cypher 결과 - results: [{'name', 'is_existing'}]
+    """
+    if DESCRIPTION_STORAGE == DESCRIPTION_STORAGE_MENTIONS:
+        query = UPSERT_ENTITY_ROWS_MENTIONS.render(label=label)
+    else:
+        query = UPSERT_ENTITY_ROWS.render(label=label)
+    if strict:
+        return execute_cypher_strict(query, rows=rows, chunk_id=chunk_id)
+    return execute_cypher(query, rows=rows, chunk_id=chunk_id)
+
+
+def import_nodes_batched(entities, movie_id, reviewer_id, chunk_id, text, chunk_hash):
+    """
+    import_nodes_with_dynamic_label의 배치 버전.
+    엔티티를 label별로 묶어 label당 UNWIND 쿼리 1번으로 저장합니다 (엔티티당 조회 + 저장 2번 → label당 1번).
+    description 병합은 서버에서 수행하므로 동시에 같은 엔티티를 쓰는 워커끼리 description을 덮어쓰지 않습니다.
+
+    Returns:
+        dict: {'results': [...], 'stats': {'existing': int, 'new': int, 'total': int}}
+
+    Raises:
+        쿼리 실패 시 execute_cypher_strict의 예외 (호출 측에서 에러 코드로 재시도 여부 판단)
+    """
+    # 임베딩/색인은 write-behind 큐에서 처리 (그래프 쓰기가 임베딩을 기다리지 않음)
+    enqueue_chunk_index(chunk_hash, chunk_id, text)
+
+    merge_chunk_base_nodes(movie_id, reviewer_id, chunk_id, text, strict=True)
+
+    # label → name → descriptions
+    rows_by_label = {}
+    for entity in entities:
+        entity_type = entity.get('entity_type', 'UNKNOWN')
+        entity_name = entity.get('entity_name', '')
+        if not is_entity_label(entity_type):
+            print(f"⚠️ 허용되지 않은 entity_type 건너뜀: {entity_type} ({entity_name})")
+            continue
+        rows_by_label.setdefault(entity_type, {}).setdefault(entity_name, []).append(
+            entity.get('entity_description', '')
+        )
+
+    results = []
+    stats = {'existing': 0, 'new': 0, 'total': 0}
+
+    for label, descriptions_by_name in rows_by_label.items():
+        rows = [
+            {
+                'name': name,
+                'neptune_id': generate_neptune_id(name, label),
+                # Neptune은 배열 속성을 지원하지 않으므로 JSON 문자열로 저장
+                'descriptions': json.dumps(descriptions, ensure_ascii=False)
+            }
+            for name, descriptions in descriptions_by_name.items()
+        ]
+        result = upsert_entity_rows(label, rows, chunk_id, strict=True)
+
+        for row in result.get('results', []):
+            stats['existing' if row.get('is_existing') else 'new'] += 1
+            stats['total'] += 1
+            results.append({'entity_name': row.get('name'), 'is_existing': row.get('is_existing')})
+
+    return {'results': results, 'stats': stats}
+
+
+def merge_chunk_rows(rows, strict=False):
+    """
+    merge_chunk_base_nodes의 배치 버전 - 여러 chunk의 REVIEWER / MOVIE / __Chunk__ 노드를 UNWIND 1번으로 MERGE합니다.
+
+    Args:
+        rows: [{'chunk_id', 'movie_id', 'reviewer_id', 'text',
+                'chunk_neptune_id', 'movie_neptune_id', 'reviewer_neptune_id'}]
+    """
+    query = """
+    UNWIND $rows AS row
+    MERGE (r:REVIEWER {id: row.reviewer_id})
+    ON CREATE SET r.neptune_id = row.reviewer_neptune_id
+    MERGE (m:MOVIE {id: row.movie_id})
+    ON CREATE SET m.neptune_id = row.movie_neptune_id
+    MERGE (m)-[:HAS_CHUNK]->(c:__Chunk__ {id: row.chunk_id})
+    ON CREATE SET c.neptune_id = row.chunk_neptune_id
+    SET c.text = row.text
+    MERGE (c)-[:WRITTEN_BY]->(r)
+    RETURN row.chunk_id AS chunk_id
+    """
+    if strict:
+        return execute_cypher_strict(query, rows=rows)
+    return execute_cypher(query, rows=rows)
+
+
+def build_chunk_rows(chunks):
+    """aggregate_chunks의 chunks 항목을 merge_chunk_rows용 row로 변환합니다."""
+    return [
+        {
+            'chunk_id': chunk['chunk_id'],
+            'movie_id': chunk['movie_id'],
+            'reviewer_id': chunk['reviewer'],
+            'text': chunk['text'],
+            'chunk_neptune_id': generate_neptune_id(chunk['chunk_id'], "__Chunk__"),
+            'movie_neptune_id': generate_neptune_id(chunk['movie_id'], "MOVIE"),
+            'reviewer_neptune_id': generate_neptune_id(chunk['reviewer'], "REVIEWER")
+        }
+        for chunk in chunks
+    ]
+
+
+def build_mention_rows(chunk_descriptions):
+    """{chunk_id: [description]} → [{'chunk_id', 'descriptions' (JSON 문자열)}] (Neptune은 배열 속성을 지원하지 않음)"""
+    return [
+        {'chunk_id': chunk_id, 'descriptions': json.dumps(descriptions, ensure_ascii=False)}
+        for chunk_id, descriptions in chunk_descriptions.items()
+        if descriptions
+    ]
+
+
+UPSERT_AGGREGATED_ENTITY_ROWS = register_template('upsert_aggregated_entity_rows', """
+    UNWIND $rows AS row
+    OPTIONAL MATCH (existing:{label} {{name: row.name}})
+    WITH row, count(existing) > 0 AS is_existing
+    MERGE (n:{label} {{name: row.name}})
+    ON CREATE SET n.neptune_id = row.neptune_id
+    ON MATCH SET n.neptune_id = coalesce(n.neptune_id, row.neptune_id)
+    WITH n, row, is_existing
+    UNWIND row.mentions AS mention
+    MATCH (c:__Chunk__ {{id: mention.chunk_id}})
+    OPTIONAL MATCH (n)<-[seen:MENTIONS]-(c)
+    WITH n, row, is_existing, c, mention, count(seen) = 0 AS is_new
+    MERGE (n)<-[:MENTIONS]-(c)
+    WITH n, row, is_existing, count(c) AS mentions,
+         collect(CASE WHEN is_new THEN mention.descriptions END) AS new_descriptions
+    WITH n, row, is_existing, mentions,
+         reduce(acc = '', d IN new_descriptions | acc + ', ' + substring(d, 1, size(d) - 2)) AS appended
+    SET n.description = CASE
+        WHEN appended = '' THEN n.description
+        WHEN n.description IS NULL OR n.description = '[]' THEN '[' + substring(appended, 2) + ']'
+        ELSE substring(n.description, 0, size(n.description) - 1) + appended + ']'
+    END
+    RETURN row.name AS name, is_existing, mentions
+    """)
+
+UPSERT_AGGREGATED_ENTITY_ROWS_MENTIONS = register_template('upsert_aggregated_entity_rows_mentions', """
+    UNWIND $rows AS row
+    OPTIONAL MATCH (existing:{label} {{name: row.name}})
+    WITH row, count(existing) > 0 AS is_existing
+    MERGE (n:{label} {{name: row.name}})
+    ON CREATE SET n.neptune_id = row.neptune_id
+    ON MATCH SET n.neptune_id = coalesce(n.neptune_id, row.neptune_id)
+    WITH n, row, is_existing
+    UNWIND row.mentions AS mention
+    MATCH (c:__Chunk__ {{id: mention.chunk_id}})
+    MERGE (n)<-[m:MENTIONS]-(c)
+    SET m.description = mention.descriptions
+    RETURN row.name AS name, is_existing, count(c) AS mentions
+    """)
+
+
+def upsert_aggregated_entity_rows(label, rows, strict=False):
+    """
+    코퍼스 단위로 집계된 엔티티를 label당 UNWIND 1번으로 upsert하고, 출처 chunk 전체에 MENTIONS로 연결합니다.
+    엔티티당 쓰기가 1번이므로 mention마다 description 문자열을 다시 쓰지 않습니다.
+    아직 MENTIONS가 없는 chunk의 descriptions만 이어붙이므로 재실행해도 중복되지 않습니다 (upsert_entity_rows와 같은 기준).
+    DESCRIPTION_STORAGE=mentions이면 chunk별 descriptions를 각 MENTIONS 엣지에 저장합니다.
+
+    Args:
+        label: 엔티티 label (entity_type)
+        rows: [{'name', 'neptune_id', 'mentions': [{'chunk_id', 'descriptions' (JSON 문자열)}]}]
+
+    Returns:
+        execute_cypher 결과 - results: [{'name', 'is_existing', 'mentions'}]
+    """
+    if DESCRIPTION_STORAGE == DESCRIPTION_STORAGE_MENTIONS:
+        query = UPSERT_AGGREGATED_ENTITY_ROWS_MENTIONS.render(label=label)
+    else:
+        query = UPSERT_AGGREGATED_ENTITY_ROWS.render(label=label)
+    if strict:
+        return execute_cypher_strict(query, rows=rows)
+    return execute_cypher(query, rows=rows)
+
+
+def build_aggregated_entity_rows(entities):
+    """
+    aggregate_chunks의 entities를 label별 upsert row로 변환합니다.
+
+    Returns:
+        dict: {label: [{'name', 'neptune_id', 'mentions': [{'chunk_id', 'descriptions'}]}]}
+    """
+    rows_by_label = {}
+    skipped = {}
+    for (label, name), data in entities.items():
+        if not is_entity_label(label):
+            skipped[label] = skipped.get(label, 0) + 1
+            continue
+        rows_by_label.setdefault(label, []).append({
+            'name': name,
+            'neptune_id': generate_neptune_id(name, label),
+            'mentions': build_mention_rows(data['chunk_descriptions'])
+        })
+    if skipped:
+        print(f"   ⚠️ 허용되지 않은 entity_type 건너뜀: {skipped}")
+    return rows_by_label
+
+
+RELATIONSHIP_CREATE = register_template('relationship_create', """
+    MATCH (s:{source_label} {{name: $entity1}})
+    MATCH (t:{target_label} {{name: $entity2}})
+    CREATE (s)-[r:RELATIONSHIP {{description: $descriptions, strength: $strength}}]->(t)
+    """)
+
+
 def import_relationships_with_dynamic_label(relationships):
     """
     Import relationships ensuring only one relationship exists between any two entities.
@@ -207,6 +509,9 @@ def import_relationships_with_dynamic_label(relationships):
     
     # Process each unique pair once
     for (entity1, entity2, type1, type2), data in relationship_pairs.items():
+        if not is_entity_label(type1) or not is_entity_label(type2):
+            print(f"⚠️ 허용되지 않은 entity_type 건너뜀: {entity1}({type1}) - {entity2}({type2})")
+            continue
         new_descriptions = data['descriptions']
         strength = data['strength']
         
@@ -254,11 +559,7 @@ def import_relationships_with_dynamic_label(relationships):
         # Create one relationship
         descriptions_str = json.dumps(unique_descriptions, ensure_ascii=False)
         
-        create_query = f"""
-        MATCH (s:{type1} {{name: $entity1}})
-        MATCH (t:{type2} {{name: $entity2}})
-        CREATE (s)-[r:RELATIONSHIP {{description: $descriptions, strength: $strength}}]->(t)
-        """
+        create_query = RELATIONSHIP_CREATE.render(source_label=type1, target_label=type2)
         result = execute_cypher(create_query, entity1=entity1, entity2=entity2, 
                       descriptions=descriptions_str, strength=strength)
         results.append({'result': result, 'source': entity1, 'target': entity2, 'is_existing': is_existing})
@@ -266,15 +567,111 @@ def import_relationships_with_dynamic_label(relationships):
     return {'results': results, 'stats': stats}
 
 
+UPSERT_RELATIONSHIP_ROWS = register_template('upsert_relationship_rows', """
+    UNWIND $rows AS row
+    MATCH (s:{source_label} {{name: row.source}})
+    MATCH (t:{target_label} {{name: row.target}})
+    OPTIONAL MATCH (s)-[existing:RELATIONSHIP]->(t)
+    WITH s, t, row, count(existing) > 0 AS is_existing
+    MERGE (s)-[r:RELATIONSHIP]->(t)
+    WITH r, row, is_existing,
+         [m IN row.mentions WHERE r.chunk_ids IS NULL OR NOT r.chunk_ids CONTAINS ('|' + m.chunk_id + '|')] AS new_mentions
+    WITH r, row, is_existing, new_mentions,
+         reduce(acc = '', m IN new_mentions | acc + ', ' + substring(m.descriptions, 1, size(m.descriptions) - 2)) AS appended
+    SET r.description = CASE
+            WHEN appended = '' THEN r.description
+            WHEN r.description IS NULL OR r.description = '[]' THEN '[' + substring(appended, 2) + ']'
+            ELSE substring(r.description, 0, size(r.description) - 1) + appended + ']'
+        END,
+        r.chunk_ids = coalesce(r.chunk_ids, '|') + reduce(acc = '', m IN new_mentions | acc + m.chunk_id + '|'),
+        r.strength = CASE
+            WHEN r.strength IS NULL OR r.strength < row.strength THEN row.strength
+            ELSE r.strength
+        END
+    RETURN row.source AS source, row.target AS target, is_existing
+    """)
+
+
+def upsert_relationship_rows(source_label, target_label, rows, strict=False):
+    """
+    같은 label 쌍의 관계들을 한 번의 UNWIND 쿼리로 upsert합니다.
+    양 끝 노드를 label + name으로 찾고 (무방향 name 매칭 없음), 정규화된 방향으로 MERGE합니다.
+    description은 chunk 단위로 서버에서 이어붙이고, 이어붙인 chunk id를 r.chunk_ids('|c1|c2|')에 기록합니다.
+    이미 기록된 chunk의 descriptions는 다시 붙이지 않으므로 재시도 / 재실행해도 중복되지 않습니다.
+    strength는 큰 값을 유지합니다.
+
+    Args:
+        source_label / target_label: 양 끝 노드 label
+        rows: [{'source', 'target', 'mentions': [{'chunk_id', 'descriptions' (JSON 문자열)}], 'strength'}]
+        strict: True면 실패 시 예외를 올림 (충돌 감지용), False면 None 반환
+
+    Returns:
+        execute_cypher 결과 - results: [{'source', 'target', 'is_existing'}]
+        (양 끝 노드가 없는 row는 결과에서 빠짐)
+    """
+    query = UPSERT_RELATIONSHIP_ROWS.render(source_label=source_label, target_label=target_label)
+    if strict:
+        return execute_cypher_strict(query, rows=rows)
+    return execute_cypher(query, rows=rows)
+
+
+def import_relationships_batched(relationships, chunk_id):
+    """
+    import_relationships_with_dynamic_label의 배치 버전.
+    쌍마다 조회 → DELETE → CREATE 하던 것을 label 쌍당 UNWIND MERGE 쿼리 1번으로 처리합니다.
+    label로 고정된 MATCH만 사용하므로 여러 워커가 동시에 실행할 수 있습니다.
+    chunk_id는 재시도 시 description 중복을 막는 키로 관계에 기록됩니다.
+
+    Returns:
+        dict: {'results': [...], 'stats': {'existing': int, 'new': int, 'total': int, 'missing': int}}
+
+    Raises:
+        쿼리 실패 시 execute_cypher_strict의 예외 (호출 측에서 에러 코드로 재시도 여부 판단)
+    """
+    rows_by_labels = {}
+    skipped = 0
+    pairs = aggregate_relationship_pairs(relationships, chunk_id=chunk_id)
+    for (source, source_type, target, target_type), data in pairs.items():
+        if not is_entity_label(source_type) or not is_entity_label(target_type):
+            # legacy 형식(타입 없음) / 허용되지 않은 타입은 label로 고정할 수 없으므로 건너뜀
+            skipped += 1
+            continue
+        rows_by_labels.setdefault((source_type, target_type), []).append({
+            'source': source,
+            'target': target,
+            'mentions': build_mention_rows(data['chunk_descriptions']),
+            'strength': data['strength']
+        })
+
+    results = []
+    stats = {'existing': 0, 'new': 0, 'total': 0, 'missing': skipped}
+
+    for (source_label, target_label), rows in rows_by_labels.items():
+        result = upsert_relationship_rows(source_label, target_label, rows, strict=True)
+
+        saved = result.get('results', [])
+        stats['missing'] += len(rows) - len(saved)
+        for row in saved:
+            stats['existing' if row.get('is_existing') else 'new'] += 1
+            stats['total'] += 1
+            results.append({'source': row.get('source'), 'target': row.get('target'),
+                            'is_existing': row.get('is_existing')})
+
+    return {'results': results, 'stats': stats}
+
+
+ENTITY_SUMMARY_SET = register_template('entity_summary_set', """
+    MATCH (n:{label})
+    WHERE n.name = $entity_name
+    SET n.summary = $summary
+    RETURN n.name AS name, labels(n) AS labels
+    """)
+
+
 def save_entity_summary(entity_name, summary, entity_type=None):
     """Save entity summary to Neptune graph."""
     if entity_type:
-        query = f"""
-        MATCH (n:{entity_type})
-        WHERE n.name = $entity_name
-        SET n.summary = $summary
-        RETURN n.name AS name, labels(n) AS labels
-        """
+        query = ENTITY_SUMMARY_SET.render(label=entity_type)
     else:
         query = """
         MATCH (n)
@@ -285,21 +682,36 @@ def save_entity_summary(entity_name, summary, entity_type=None):
     return execute_cypher(query, entity_name=entity_name, summary=summary)
 
 
-def get_all_nodes():
-    """Get all nodes with their labels and properties."""
+def iter_all_nodes(page_size=NEPTUNE_PAGE_SIZE):
+    """Yield all nodes with their labels and properties, paged by node id."""
     query = """
     MATCH (n)
-    RETURN labels(n) AS labels, properties(n) AS properties
+    WHERE id(n) > $cursor
+    RETURN id(n) AS node_id, labels(n) AS labels, properties(n) AS properties
+    ORDER BY node_id
+    LIMIT $limit
     """
-    return execute_cypher(query)
+    return iter_cypher(query, page_size, cursor_key='node_id')
 
 
-def get_all_nodes_by_label(label):
-    """Get all nodes of a specific label."""
-    query = f"""
+def get_all_nodes():
+    """Get all nodes with their labels and properties."""
+    try:
+        return {'results': list(iter_all_nodes())}
+    except Exception as e:
+        print(f"❌ 노드 조회 실패: {e}")
+        return None
+
+
+NODES_BY_LABEL = register_template('nodes_by_label', """
     MATCH (n:{label})
     RETURN n
-    """
+    """, labels=ALLOWED_LABELS)
+
+
+def get_all_nodes_by_label(label):
+    """Get all nodes of a specific label."""
+    query = NODES_BY_LABEL.render(label=label)
     return execute_cypher(query)
 
 
@@ -391,12 +803,15 @@ def delete_all_relationships():
     return execute_cypher(query)
 
 
-def delete_nodes_by_label(label):
-    """Delete all nodes with a specific label and their relationships."""
-    query = f"""
+DELETE_NODES_BY_LABEL = register_template('delete_nodes_by_label', """
     MATCH (n:{label})
     DETACH DELETE n
-    """
+    """, labels=ALLOWED_LABELS)
+
+
+def delete_nodes_by_label(label):
+    """Delete all nodes with a specific label and their relationships."""
+    query = DELETE_NODES_BY_LABEL.render(label=label)
     return execute_cypher(query)
 
 
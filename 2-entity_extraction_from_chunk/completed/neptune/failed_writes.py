@@ -0,0 +1,199 @@
+"""
+Neptune 쓰기 재시도 + 실패 배치 저널
+- 재시도 여부는 에러 코드(neptune_con.is_retryable_error)로 판단, 지수 backoff + full jitter
+- 끝내 실패한 배치는 종류(kind)와 다시 쓰는 데 필요한 payload, 에러 분류와 함께 디스크 저널에 기록
+- replay로 저널의 실패 배치만 다시 실행 (전체 재적재 없이 복구)
+- chunk 벡터 색인(OpenSearch) 실패 배치도 같은 저널에 기록 (kind=chunk_index)
+"""
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+
+from neptune.neptune_con import get_error_code, is_retryable_error, RETRYABLE_ERROR_CODES
+from neptune.cyper_queries import (
+    import_nodes_batched,
+    import_relationships_batched,
+    merge_chunk_rows,
+    upsert_aggregated_entity_rows,
+    upsert_relationship_rows
+)
+from opensearch.chunk_index_writer import index_chunks
+from utils.chunk_aggregation import resolve_chunk_entities, resolve_chunk_relationships
+from utils.run_journal import RunJournal, STATUS_DONE, STATUS_FAILED, STATUS_IN_FLIGHT
+
+# 실행 위치와 무관하게 chunk를 읽는 곳(SCRIPT_DIR / step)과 같은 step 디렉토리를 사용
+SCRIPT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_FAILED_JOURNAL_PATH = str(SCRIPT_DIR / "step" / "run_journal" / "neptune_failed.jsonl")
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+
+# 배치 종류
+KIND_CHUNK_ENTITIES = "chunk_entities"            # payload: {'filepath'}
+KIND_CHUNK_RELATIONSHIPS = "chunk_relationships"  # payload: {'filepath'}
+KIND_CHUNK_ROWS = "chunk_rows"                    # payload: {'rows'}
+KIND_ENTITY_ROWS = "entity_rows"                  # payload: {'label', 'rows'}
+KIND_RELATIONSHIP_ROWS = "relationship_rows"      # payload: {'source_label', 'target_label', 'rows'}
+KIND_CHUNK_INDEX = "chunk_index"                  # payload: {'chunks': [{'chunk_hash', 'chunk_id', 'text'}]} (OpenSearch)
+
+
+def backoff_delay(attempt: int) -> float:
+    """attempt번째 재시도 전 대기 시간 (full jitter: 0 ~ min(cap, base * 2^(attempt-1)))"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** (attempt - 1))))
+
+
+def call_with_backoff(label: str, fn, *args, max_retries: int = MAX_RETRIES, retry_on=is_retryable_error, **kwargs):
+    """
+    fn을 실행하고, 재시도 가능한 에러(retry_on)면 지수 backoff + jitter 후 다시 시도합니다.
+    재시도할 수 없는 에러이거나 max_retries를 넘으면 마지막 예외를 그대로 올립니다.
+    """
+    for attempt in range(1, max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if not retry_on(e) or attempt == max_retries:
+                raise
+            wait = backoff_delay(attempt)
+            print(f"⚠️ {label} | {get_error_code(e)}, {wait:.2f}s 후 재시도 ({attempt}/{max_retries})")
+            time.sleep(wait)
+
+
+def _load_chunk(filepath: str) -> dict:
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_chunk_entities(filepath):
+    chunk = _load_chunk(filepath)
+    return import_nodes_batched(
+        resolve_chunk_entities(chunk), chunk.get('movie_id', ''), chunk.get('reviewer', ''),
+        chunk.get('chunk_id', ''), chunk.get('user_query', ''), chunk.get('chunk_hash', '')
+    )
+
+
+def _write_chunk_relationships(filepath):
+    chunk = _load_chunk(filepath)
+    return import_relationships_batched(resolve_chunk_relationships(chunk), chunk.get('chunk_id', ''))
+
+
+# kind → payload를 받아 다시 쓰는 함수 (모두 실패 시 예외를 올림)
+REPLAY_WRITERS = {
+    KIND_CHUNK_ENTITIES: lambda p: _write_chunk_entities(p['filepath']),
+    KIND_CHUNK_RELATIONSHIPS: lambda p: _write_chunk_relationships(p['filepath']),
+    KIND_CHUNK_ROWS: lambda p: merge_chunk_rows(p['rows'], strict=True),
+    KIND_ENTITY_ROWS: lambda p: upsert_aggregated_entity_rows(p['label'], p['rows'], strict=True),
+    KIND_RELATIONSHIP_ROWS: lambda p: upsert_relationship_rows(
+        p['source_label'], p['target_label'], p['rows'], strict=True
+    ),
+    KIND_CHUNK_INDEX: lambda p: index_chunks(p['chunks']),
+}
+
+
+# replay 순서: __Chunk__ 노드(chunk_rows)를 먼저 쓰고, 그 chunk를 MATCH하는 엔티티 mention은 그 뒤에 씀
+REPLAY_ORDER = [KIND_CHUNK_ROWS, KIND_CHUNK_ENTITIES, KIND_ENTITY_ROWS,
+                KIND_CHUNK_RELATIONSHIPS, KIND_RELATIONSHIP_ROWS, KIND_CHUNK_INDEX]
+
+
+def batch_key(kind: str, payload: dict) -> str:
+    """payload 내용으로 결정되는 저널 key (같은 배치가 다시 실패하면 같은 entry를 갱신)"""
+    digest = hashlib.sha1(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+    return f"{kind}:{digest[:16]}"
+
+
+class FailedWriteJournal:
+    """
+    실패한 Neptune 쓰기 배치의 디스크 저널 (RunJournal 위에 kind / payload / 에러 분류를 기록).
+    """
+
+    def __init__(self, path=DEFAULT_FAILED_JOURNAL_PATH):
+        self.journal = RunJournal(path)
+
+    def record_failure(self, kind: str, payload: dict, error: Exception, key: str = None) -> str:
+        return self.record_failed_batch(kind, payload, get_error_code(error), str(error),
+                                        retryable=is_retryable_error(error), key=key)
+
+    def record_failed_batch(self, kind: str, payload: dict, error_code: str, error: str,
+                            retryable: bool = None, key: str = None) -> str:
+        """예외 객체 없이 에러 코드/메시지로 기록 (샤딩 writer의 실패 배치 등)"""
+        key = key or batch_key(kind, payload)
+        if retryable is None:
+            retryable = error_code in RETRYABLE_ERROR_CODES
+        self.journal.mark(
+            key, STATUS_FAILED,
+            kind=kind, payload=payload,
+            error_code=error_code, retryable=retryable,
+            error=error[:500]
+        )
+        return key
+
+    def record_success(self, key: str):
+        """이전에 실패로 기록된 key가 성공하면 done으로 닫음 (기록이 없으면 아무것도 안 함)"""
+        if self.journal.get(key) is not None and self.journal.status_of(key) != STATUS_DONE:
+            self.journal.mark(key, STATUS_DONE)
+
+    def failed_entries(self) -> list:
+        return self.journal.failed_entries()
+
+    def summary(self) -> dict:
+        """kind / error_code별 실패 개수"""
+        by_kind, by_code = {}, {}
+        for entry in self.failed_entries():
+            by_kind[entry.get('kind')] = by_kind.get(entry.get('kind'), 0) + 1
+            by_code[entry.get('error_code')] = by_code.get(entry.get('error_code'), 0) + 1
+        return {**self.journal.summary(), 'by_kind': by_kind, 'by_error_code': by_code}
+
+    def run(self, kind: str, payload: dict, label: str = None, key: str = None):
+        """
+        배치를 backoff 재시도로 실행하고, 끝내 실패하면 저널에 기록한 뒤 None을 반환합니다.
+        """
+        key = key or batch_key(kind, payload)
+        try:
+            result = call_with_backoff(label or key, REPLAY_WRITERS[kind], payload)
+        except Exception as e:
+            self.record_failure(kind, payload, e, key=key)
+            print(f"❌ {label or key} | {get_error_code(e)}: {str(e)[:200]} → 실패 저널에 기록")
+            return None
+        self.record_success(key)
+        return result
+
+    def replay(self) -> dict:
+        """
+        저널의 실패 배치를 REPLAY_ORDER 순서로 다시 실행합니다.
+        chunk_rows 배치가 다시 실패하면 entity_rows는 실행하지 않고 failed로 남깁니다
+        (없는 __Chunk__에 대한 mention이 조용히 빠지지 않도록).
+        """
+        order = {kind: i for i, kind in enumerate(REPLAY_ORDER)}
+        entries = sorted(self.failed_entries(), key=lambda e: order.get(e.get('kind'), len(order)))
+        stats = {'replayed': len(entries), 'done': 0, 'failed': 0}
+        print(f"🔁 Replay: 실패 배치 {len(entries)}개")
+        chunk_rows_failed = False
+        for i, entry in enumerate(entries, 1):
+            key, kind = entry['key'], entry.get('kind')
+            if kind not in REPLAY_WRITERS:
+                print(f"⚠️ [{i}/{len(entries)}] {key} | 알 수 없는 kind: {kind}")
+                stats['failed'] += 1
+                continue
+            if kind == KIND_ENTITY_ROWS and chunk_rows_failed:
+                print(f"⏭️ [{i}/{len(entries)}] {key} | chunk_rows 재시도 실패 → 다음 replay로 미룸")
+                stats['failed'] += 1
+                continue
+            self.journal.mark(key, STATUS_IN_FLIGHT, kind=kind, payload=entry['payload'])
+            if self.run(kind, entry['payload'], label=f"[{i}/{len(entries)}] {key}", key=key) is None:
+                stats['failed'] += 1
+                chunk_rows_failed = chunk_rows_failed or kind == KIND_CHUNK_ROWS
+            else:
+                stats['done'] += 1
+                print(f"✅ [{i}/{len(entries)}] {key}")
+        return stats
+
+
+def print_failed_journal_status(journal: FailedWriteJournal):
+    summary = journal.summary()
+    print(f"📒 실패 저널: {journal.journal.path}")
+    print(f"   전체 {summary['total']} | done {summary['done']} | failed {summary['failed']}")
+    for kind, count in summary['by_kind'].items():
+        print(f"   - {kind}: {count}")
+    for code, count in summary['by_error_code'].items():
+        print(f"   - {code}: {count}")
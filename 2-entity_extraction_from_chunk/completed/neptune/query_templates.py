@@ -0,0 +1,107 @@
+"""
+Cypher 쿼리 템플릿 레지스트리
+- openCypher는 label을 파라미터로 받을 수 없어 label마다 쿼리 텍스트가 달라짐
+- 허용된 label 조합에 대해서만 쿼리 텍스트를 미리 만들어 두고, 나머지 값은 모두 $파라미터로 전달
+  → 엔진이 보는 쿼리 형태가 (템플릿 × 허용 label) 개로 고정되어 plan 캐시를 재사용
+- LLM 출력의 entity_type이 그대로 쿼리에 들어가지 않도록 허용 목록으로 검증
+- 템플릿 / label 조합별 사용 횟수를 기록
+"""
+import itertools
+import re
+import threading
+
+# graph_extraction.md의 entity_type 목록 + 파이프라인이 만드는 시스템 label
+ENTITY_LABELS = ('MOVIE', 'ACTOR', 'MOVIE_STAFF', 'MOVIE_CHARACTER', 'REVIEWER')
+SYSTEM_LABELS = ('__Chunk__',)
+ALLOWED_LABELS = ENTITY_LABELS + SYSTEM_LABELS
+
+_PLACEHOLDER_PATTERN = re.compile(r'(?<!\{)\{(\w+)\}(?!\})')
+
+
+class UnknownLabelError(ValueError):
+    """허용 목록에 없는 label로 쿼리를 만들려고 할 때"""
+
+
+def is_allowed_label(label) -> bool:
+    return label in ALLOWED_LABELS
+
+
+def is_entity_label(label) -> bool:
+    """추출된 엔티티 / 관계 끝점으로 쓸 수 있는 label (시스템 label 제외, ENTITY_LABELS 템플릿으로 렌더 가능)"""
+    return label in ENTITY_LABELS
+
+
+def validate_label(label) -> str:
+    if not is_allowed_label(label):
+        raise UnknownLabelError(f"허용되지 않은 label: {label!r} (허용: {', '.join(ALLOWED_LABELS)})")
+    return label
+
+
+class QueryTemplate:
+    """
+    label 자리표시자({label}, {source_label} 등)를 가진 쿼리 템플릿.
+    허용 label의 모든 조합을 등록 시점에 미리 렌더링해 둡니다.
+    나머지 중괄호는 f-string과 같이 {{ }}로 씁니다.
+    """
+
+    def __init__(self, name: str, template: str, labels=ENTITY_LABELS):
+        self.name = name
+        self.placeholders = tuple(dict.fromkeys(_PLACEHOLDER_PATTERN.findall(template)))
+        self._rendered = {
+            combo: template.format(**dict(zip(self.placeholders, combo)))
+            for combo in itertools.product(labels, repeat=len(self.placeholders))
+        }
+        self.hits = {}
+        self._lock = threading.Lock()
+
+    def render(self, **labels) -> str:
+        """
+        미리 만들어 둔 쿼리 텍스트를 반환합니다.
+
+        Raises:
+            UnknownLabelError: 허용되지 않은 label
+        """
+        combo = tuple(labels.get(p) for p in self.placeholders)
+        query = self._rendered.get(combo)
+        if query is None:
+            for label in combo:
+                validate_label(label)
+            raise UnknownLabelError(f"{self.name}: {combo}는 이 템플릿에 등록되지 않은 label 조합입니다")
+        with self._lock:
+            self.hits[combo] = self.hits.get(combo, 0) + 1
+        return query
+
+
+_templates = {}
+
+
+def register_template(name: str, template: str, labels=ENTITY_LABELS) -> QueryTemplate:
+    """템플릿을 등록하고 반환합니다 (모듈 로드 시 1번)."""
+    query_template = QueryTemplate(name, template, labels)
+    _templates[name] = query_template
+    return query_template
+
+
+def get_template_stats() -> dict:
+    """템플릿별 사용된 label 조합 수 / 호출 수"""
+    stats = {}
+    for name, template in _templates.items():
+        hits = dict(template.hits)
+        stats[name] = {
+            'prebuilt': len(template._rendered),
+            'shapes_used': len(hits),
+            'calls': sum(hits.values()),
+            'hits': hits
+        }
+    return stats
+
+
+def print_template_stats():
+    stats = {name: s for name, s in get_template_stats().items() if s['calls']}
+    if not stats:
+        return
+    shapes = sum(s['shapes_used'] for s in stats.values())
+    calls = sum(s['calls'] for s in stats.values())
+    print(f"🧩 Query templates: {calls} calls / {shapes} distinct query shapes")
+    for name, s in stats.items():
+        print(f"   {name:<32} calls {s['calls']:>7,} | shapes {s['shapes_used']}/{s['prebuilt']}")
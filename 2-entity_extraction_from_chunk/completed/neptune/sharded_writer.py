@@ -0,0 +1,222 @@
+"""
+충돌 없는 샤딩 병렬 관계 쓰기
+- 관계(정규화된 엔티티 쌍)를 wave 단위로 나누고, 각 wave 안에서 모든 노드가 한 샤드에만 속하도록 배정
+- 샤드마다 writer 스레드 1개가 자기 큐를 label 쌍별 UNWIND 배치로 기록 → 같은 노드를 두 워커가 동시에 수정하지 않음
+- 두 끝점이 서로 다른 샤드에 이미 묶인 관계는 다음 wave로 미룸
+- 그래도 발생한 충돌(ConcurrentModification)은 집계하고 다음 wave에서 재시도
+"""
+import queue
+import threading
+import zlib
+
+from neptune.neptune_con import get_error_code, is_conflict_error, is_retryable_error
+from neptune.failed_writes import call_with_backoff
+from neptune.cyper_queries import upsert_relationship_rows, build_mention_rows
+from neptune.query_templates import is_entity_label
+from utils.chunk_aggregation import aggregate_relationship_pairs
+
+DEFAULT_BATCH_SIZE = 50
+MAX_CONFLICT_ROUNDS = 5
+
+
+def _shard_of(node, num_shards):
+    """프로세스와 무관하게 같은 값이 나오는 노드 해시 샤드"""
+    return zlib.crc32("\x1f".join(node).encode('utf-8')) % num_shards
+
+
+def schedule_waves(pair_keys, num_shards):
+    """
+    관계들을 wave별 샤드에 배정합니다.
+    한 wave 안에서 각 노드는 최대 한 샤드에만 등장하므로 샤드끼리는 노드를 공유하지 않습니다.
+
+    Args:
+        pair_keys: (source_name, source_type, target_name, target_type) 리스트
+        num_shards: writer 수
+
+    Returns:
+        list: waves - 각 wave는 num_shards개의 pair_key 리스트
+    """
+    waves = []
+    pending = list(pair_keys)
+    while pending:
+        owner = {}
+        shards = [[] for _ in range(num_shards)]
+        deferred = []
+        for key in pending:
+            source, target = key[:2], key[2:]
+            source_shard, target_shard = owner.get(source), owner.get(target)
+            if source_shard is None and target_shard is None:
+                shard = _shard_of(min(source, target), num_shards)
+            elif source_shard is None or target_shard is None or source_shard == target_shard:
+                shard = source_shard if source_shard is not None else target_shard
+            else:
+                # 두 끝점이 이미 다른 샤드 소유 → 이번 wave에서는 쓸 수 없음
+                deferred.append(key)
+                continue
+            owner[source] = owner[target] = shard
+            shards[shard].append(key)
+        waves.append(shards)
+        pending = deferred
+    return waves
+
+
+def _iter_label_batches(pair_keys, pairs, batch_size):
+    """샤드의 관계들을 label 쌍별 UNWIND row 배치로 나눕니다."""
+    rows_by_labels = {}
+    for key in pair_keys:
+        source, source_type, target, target_type = key
+        data = pairs[key]
+        rows_by_labels.setdefault((source_type, target_type), []).append((key, {
+            'source': source,
+            'target': target,
+            'mentions': build_mention_rows(data['chunk_descriptions']),
+            'strength': data['strength']
+        }))
+    for labels, keyed_rows in rows_by_labels.items():
+        for start in range(0, len(keyed_rows), batch_size):
+            yield labels, keyed_rows[start:start + batch_size]
+
+
+def _failed_batch(source_label, target_label, keys, rows, error):
+    """실패한 배치 - 다시 쓸 수 있도록 label 쌍과 UNWIND rows를 함께 보관"""
+    return {
+        'source_label': source_label, 'target_label': target_label,
+        'keys': keys, 'rows': rows,
+        'error_code': get_error_code(error), 'error': str(error)
+    }
+
+
+def _writer(shard_id, work_queue, pairs, batch_size, stats, stats_lock, conflicted, failed):
+    while True:
+        pair_keys = work_queue.get()
+        if pair_keys is None:
+            work_queue.task_done()
+            return
+        for (source_label, target_label), keyed_rows in _iter_label_batches(pair_keys, pairs, batch_size):
+            keys = [k for k, _ in keyed_rows]
+            rows = [r for _, r in keyed_rows]
+            try:
+                # 스로틀링 등 일시적 에러는 backoff 재시도, 충돌은 다음 wave로 재스케줄
+                result = call_with_backoff(
+                    f"[shard {shard_id}] {source_label}-{target_label}",
+                    upsert_relationship_rows, source_label, target_label, rows, strict=True,
+                    retry_on=lambda e: is_retryable_error(e) and not is_conflict_error(e)
+                )
+            except Exception as e:
+                with stats_lock:
+                    if is_conflict_error(e):
+                        stats['conflicts'] += 1
+                        conflicted.extend(keys)
+                    else:
+                        stats['errors'] += 1
+                        failed.append(_failed_batch(source_label, target_label, keys, rows, e))
+                print(f"⚠️ [shard {shard_id}] {source_label}-{target_label} {len(rows)} rows: {get_error_code(e)}")
+                continue
+
+            saved = result.get('results', [])
+            with stats_lock:
+                stats['batches'] += 1
+                stats['missing'] += len(rows) - len(saved)
+                for row in saved:
+                    stats['existing' if row.get('is_existing') else 'new'] += 1
+                    stats['total'] += 1
+        work_queue.task_done()
+
+
+def run_wave(shards, pairs, batch_size, stats, stats_lock):
+    """
+    한 wave를 샤드별 writer 큐로 실행하고 (conflicted_keys, failed_batches)를 반환합니다.
+    """
+    conflicted, failed = [], []
+    threads = []
+    for shard_id, pair_keys in enumerate(shards):
+        if not pair_keys:
+            continue
+        work_queue = queue.Queue()
+        work_queue.put(pair_keys)
+        work_queue.put(None)
+        thread = threading.Thread(
+            target=_writer,
+            args=(shard_id, work_queue, pairs, batch_size, stats, stats_lock, conflicted, failed),
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return conflicted, failed
+
+
+def write_relationships_sharded(chunk_relationships, num_shards, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    resolve된 관계 전체를 정규화된 쌍으로 집계한 뒤, 노드 충돌 없는 wave/샤드로 나누어 병렬 기록합니다.
+
+    Args:
+        chunk_relationships: [(chunk_id, resolve된 relationship 리스트)] - 모든 chunk
+                             (chunk_id는 재실행 시 description 중복을 막는 키)
+        num_shards: writer 스레드 수
+        batch_size: UNWIND 한 번에 보낼 row 수
+
+    Returns:
+        dict: {'stats': {...},
+               'failed': [{'source_label', 'target_label', 'keys', 'rows', 'error_code', 'error'}]}
+    """
+    pairs = {}
+    for chunk_id, relationships in chunk_relationships:
+        aggregate_relationship_pairs(relationships, chunk_id=chunk_id, pairs=pairs)
+    return write_pairs_sharded(pairs, num_shards, batch_size)
+
+
+def write_pairs_sharded(pairs, num_shards, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    이미 집계된 관계 쌍(aggregate_relationship_pairs / aggregate_chunks 결과)을 샤딩 병렬로 기록합니다.
+    쌍마다 쓰기는 1번입니다.
+    """
+    # 타입이 없거나 허용되지 않은 label은 쿼리로 고정할 수 없으므로 건너뜀
+    pair_keys = [k for k in pairs if is_entity_label(k[1]) and is_entity_label(k[3])]
+    skipped = len(pairs) - len(pair_keys)
+
+    stats = {
+        'pairs': len(pairs), 'waves': 0, 'batches': 0,
+        'total': 0, 'existing': 0, 'new': 0, 'missing': skipped,
+        'conflicts': 0, 'errors': 0, 'conflict_rounds': 0
+    }
+    stats_lock = threading.Lock()
+    failed = []
+
+    for round_idx in range(MAX_CONFLICT_ROUNDS + 1):
+        waves = schedule_waves(pair_keys, num_shards)
+        conflicted = []
+        for shards in waves:
+            sizes = [len(s) for s in shards]
+            print(f"🌊 wave {stats['waves'] + 1}: {sum(sizes)} pairs over {sum(1 for n in sizes if n)} shards "
+                  f"(max {max(sizes)})")
+            wave_conflicted, wave_failed = run_wave(shards, pairs, batch_size, stats, stats_lock)
+            conflicted.extend(wave_conflicted)
+            failed.extend(wave_failed)
+            stats['waves'] += 1
+
+        if not conflicted:
+            break
+        stats['conflict_rounds'] += 1
+        if round_idx == MAX_CONFLICT_ROUNDS:
+            error = RuntimeError(f"{MAX_CONFLICT_ROUNDS}회 재스케줄 후에도 충돌")
+            for (source_label, target_label), keyed_rows in _iter_label_batches(conflicted, pairs, batch_size):
+                item = _failed_batch(source_label, target_label,
+                                     [k for k, _ in keyed_rows], [r for _, r in keyed_rows], error)
+                item['error_code'] = 'ConflictException'
+                failed.append(item)
+            break
+        print(f"🔄 충돌 {len(conflicted)} pairs 재스케줄 (round {stats['conflict_rounds']})")
+        pair_keys = conflicted
+
+    return {'stats': stats, 'failed': failed}
+
+
+def print_sharded_stats(result):
+    stats = result['stats']
+    print(f"  Relationship pairs: {stats['pairs']} | waves: {stats['waves']} | batches: {stats['batches']}")
+    print(f"  저장: {stats['total']} (기존: {stats['existing']}, 신규: {stats['new']}) | 누락(끝점 없음): {stats['missing']}")
+    print(f"  충돌: {stats['conflicts']} batches (재스케줄 {stats['conflict_rounds']}회) | 에러: {stats['errors']}")
+    for item in result['failed']:
+        print(f"  ❌ {item['error_code']}: {len(item['keys'])} pairs - {item['error'][:200]}")
@@ -0,0 +1,207 @@
+"""
+Chunk 벡터 인덱싱 write-behind 큐
+- 그래프 writer는 (chunk_hash, chunk_id, text)를 큐에 넣고 바로 Neptune 쓰기로 진행
+- 별도 consumer 스레드가 배치 단위로 임베딩(동시 호출)한 뒤 helpers.bulk로 한 번에 색인
+- 큐 크기가 제한되어 있어 임베딩이 밀리면 enqueue가 대기 (backpressure)
+- flush()로 지금까지 넣은 chunk가 모두 색인될 때까지 대기, 프로세스 종료 시 자동 flush
+- 색인에 실패한 chunk는 실패 핸들러(set_failed_batch_handler)로 넘겨 저널에 기록 → index_chunks로 다시 색인
+"""
+import atexit
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from opensearchpy import helpers
+
+from opensearch.opensearch_con import get_opensearch_client
+from opensearch.opensearch_search import get_embedder
+
+CHUNK_INDEX_NAME = "chunks"
+BATCH_SIZE = 32
+MAX_QUEUE_SIZE = 256
+EMBED_WORKERS = 8
+# 배치가 다 차지 않아도 이 시간(초) 동안 새 chunk가 없으면 모인 만큼 색인
+FLUSH_INTERVAL = 1.0
+
+
+class ChunkIndexWriter:
+    """
+    chunks 인덱스용 write-behind writer.
+    같은 chunk_hash는 한 번만 색인합니다 (Neptune 쓰기 재시도로 다시 들어와도 임베딩을 반복하지 않음).
+    """
+
+    def __init__(self, index_name: str = CHUNK_INDEX_NAME, batch_size: int = BATCH_SIZE,
+                 max_queue_size: int = MAX_QUEUE_SIZE, embed_workers: int = EMBED_WORKERS):
+        self.index_name = index_name
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._seen = set()
+        self._seen_lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        # on_failed(rows, error_code, error) - rows: [{'chunk_hash', 'chunk_id', 'text'}]
+        self.on_failed = None
+        self.stats = {'enqueued': 0, 'skipped': 0, 'indexed': 0, 'failed': 0, 'batches': 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._consume, name="chunk-index-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def enqueue(self, chunk_hash: str, chunk_id: str, text: str):
+        """chunk를 색인 큐에 넣습니다. 큐가 가득 차면 자리가 날 때까지 대기합니다."""
+        with self._seen_lock:
+            if chunk_hash in self._seen:
+                self.stats['skipped'] += 1
+                return
+            self._seen.add(chunk_hash)
+            self.stats['enqueued'] += 1
+        self.start()
+        self._queue.put((chunk_hash, chunk_id, text))
+
+    def flush(self):
+        """지금까지 enqueue된 chunk가 모두 색인(또는 실패 처리)될 때까지 대기합니다."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._stopped.set()
+
+    def _consume(self):
+        with ThreadPoolExecutor(max_workers=self.embed_workers) as executor:
+            while not self._stopped.is_set():
+                try:
+                    batch = [self._queue.get(timeout=FLUSH_INTERVAL)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._index_batch(batch, executor)
+                except Exception as e:
+                    self.stats['failed'] += len(batch)
+                    print(f"   ❌ Chunk 배치 색인 오류 ({len(batch)}개): {e}")
+                    self._handle_failed(batch, type(e).__name__, str(e))
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+    def _bulk_index(self, batch: list, executor: ThreadPoolExecutor) -> tuple:
+        """배치를 임베딩 후 bulk 색인하고 (성공 수, bulk 에러 리스트)를 반환합니다."""
+        embedder = get_embedder()
+        vectors = list(executor.map(embedder.embed_text, [text for _, _, text in batch]))
+
+        actions = [
+            {
+                "_index": self.index_name,
+                "_id": chunk_hash,
+                "_source": {
+                    "chunk": {
+                        "context": text,
+                        "context_vec": context_vec,
+                        "neptune_id": chunk_id
+                    }
+                }
+            }
+            for (chunk_hash, chunk_id, text), context_vec in zip(batch, vectors)
+        ]
+        return helpers.bulk(get_opensearch_client(), actions, raise_on_error=False, refresh=False)
+
+    def _index_batch(self, batch: list, executor: ThreadPoolExecutor):
+        success, errors = self._bulk_index(batch, executor)
+        self.stats['indexed'] += success
+        self.stats['failed'] += len(errors)
+        self.stats['batches'] += 1
+        print(f"   📦 Chunks bulk indexed: {success}/{len(batch)}")
+        for error in errors[:3]:
+            print(f"   ❌ Chunk 색인 실패: {error}")
+        if errors:
+            failed_ids = {_error_doc_id(error) for error in errors}
+            self._handle_failed([item for item in batch if item[0] in failed_ids],
+                                "BulkIndexError", str(errors[0])[:500])
+
+    def _handle_failed(self, batch: list, error_code: str, error: str):
+        """
+        실패한 chunk를 중복 목록에서 빼고 (같은 프로세스에서 다시 enqueue 가능),
+        실패 핸들러가 있으면 넘겨서 replay로 다시 색인할 수 있게 합니다.
+        """
+        with self._seen_lock:
+            for chunk_hash, _, _ in batch:
+                self._seen.discard(chunk_hash)
+        if self.on_failed is None or not batch:
+            return
+        rows = [{'chunk_hash': chunk_hash, 'chunk_id': chunk_id, 'text': text} for chunk_hash, chunk_id, text in batch]
+        try:
+            self.on_failed(rows, error_code, error)
+        except Exception as e:
+            print(f"   ❌ Chunk 색인 실패 기록 오류 ({len(rows)}개): {e}")
+
+    def index_now(self, rows: list) -> int:
+        """
+        큐를 거치지 않고 바로 색인합니다 (replay용). 하나라도 실패하면 예외를 올립니다.
+
+        Args:
+            rows: [{'chunk_hash', 'chunk_id', 'text'}]
+        """
+        batch = [(row['chunk_hash'], row['chunk_id'], row['text']) for row in rows]
+        with ThreadPoolExecutor(max_workers=self.embed_workers) as executor:
+            success, errors = self._bulk_index(batch, executor)
+        self.stats['indexed'] += success
+        if errors:
+            raise RuntimeError(f"Chunk 색인 실패 {len(errors)}/{len(batch)}: {str(errors[0])[:300]}")
+        with self._seen_lock:
+            self._seen.update(chunk_hash for chunk_hash, _, _ in batch)
+        return success
+
+    def print_stats(self):
+        s = self.stats
+        print(f"📦 Chunk index: 색인 {s['indexed']} / 요청 {s['enqueued']} "
+              f"(중복 생략 {s['skipped']}, 실패 {s['failed']}, batches {s['batches']})")
+
+
+def _error_doc_id(error: dict):
+    """helpers.bulk 에러 항목 ({'index': {'_id', ...}})의 문서 ID"""
+    return next(iter(error.values()), {}).get('_id')
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_chunk_index_writer() -> ChunkIndexWriter:
+    """프로세스 공용 ChunkIndexWriter (종료 시 남은 chunk를 flush)"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ChunkIndexWriter()
+                atexit.register(_writer.close)
+    return _writer
+
+
+def enqueue_chunk_index(chunk_hash: str, chunk_id: str, text: str):
+    """save_chunk_to_opensearch의 write-behind 버전 - 임베딩/색인을 기다리지 않고 반환"""
+    get_chunk_index_writer().enqueue(chunk_hash, chunk_id, text)
+
+
+def set_failed_batch_handler(handler):
+    """색인에 실패한 chunk 배치를 받을 핸들러 (rows, error_code, error)를 등록합니다."""
+    get_chunk_index_writer().on_failed = handler
+
+
+def index_chunks(rows: list) -> int:
+    """실패 저널의 chunk 배치를 바로 다시 색인합니다 (실패 시 예외)."""
+    return get_chunk_index_writer().index_now(rows)
+
+
+def flush_chunk_index():
+    """색인 큐가 빌 때까지 대기하고 결과를 출력합니다 (파이프라인 종료 전 barrier)."""
+    if _writer is not None:
+        _writer.flush()
+        _writer.print_stats()
@@ -2,13 +2,23 @@
 Save to Neptune Pipeline (병렬 버전 - 10 workers + 재시도)
 Flow:
 1. Read chunks from step/chunkings
-2. Save entities to Neptune (병렬)
-3. Save relationships to Neptune (병렬)
+2. 코퍼스 전체를 (type, name) / 엔티티 쌍 단위로 집계 (chunk 출처 포함)
+3. Save chunks → entities (엔티티당 1번) → relationships (쌍당 1번, 샤딩 병렬)
+
+Usage:
+    python save_to_neptune_fast.py                           # 집계 후 저장 (기본)
+    python save_to_neptune_fast.py --per-chunk               # chunk 단위 엔티티 저장 + 샤딩 관계 저장
+    python save_to_neptune_fast.py --per-chunk --per-chunk-rel  # 관계도 chunk 단위 병렬 + 충돌 재시도
+    python save_to_neptune_fast.py status                    # 실패 저널 요약
+    python save_to_neptune_fast.py replay                    # 실패 저널의 배치만 다시 쓰기
+
+재시도는 에러 코드(충돌/스로틀링/일시적 오류)에 따라 배치 단위 지수 backoff + jitter로 하고,
+끝내 실패한 배치는 step/run_journal/neptune_failed.jsonl에 기록되어 replay로 복구합니다.
+chunk 벡터 색인(OpenSearch)에 실패한 배치도 같은 저널에 기록되어 replay 시 다시 색인합니다.
 """
 import json
 import os
 import sys
-import time
 import random
 import traceback
 from pathlib import Path
@@ -18,10 +28,34 @@ import threading
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from opensearch.opensearch_con import get_opensearch_client
+from neptune.neptune_con import print_cypher_stats, get_error_code
+from neptune.query_templates import print_template_stats
+from neptune.failed_writes import (
+    FailedWriteJournal,
+    call_with_backoff,
+    print_failed_journal_status,
+    DEFAULT_FAILED_JOURNAL_PATH,
+    KIND_CHUNK_ENTITIES,
+    KIND_CHUNK_RELATIONSHIPS,
+    KIND_CHUNK_ROWS,
+    KIND_ENTITY_ROWS,
+    KIND_RELATIONSHIP_ROWS,
+    KIND_CHUNK_INDEX
+)
+from neptune.sharded_writer import write_relationships_sharded, write_pairs_sharded, print_sharded_stats
+from utils.chunk_aggregation import (
+    resolve_chunk_entities,
+    resolve_chunk_relationships,
+    aggregate_chunks,
+    print_aggregate_stats
+)
 from opensearch.opensearch_search import delete_chunk_index_opensearch
+from opensearch.chunk_index_writer import enqueue_chunk_index, flush_chunk_index, set_failed_batch_handler
 from neptune.cyper_queries import (
-    import_nodes_with_dynamic_label,
-    import_relationships_with_dynamic_label,
+    import_nodes_batched,
+    import_relationships_batched,
+    build_chunk_rows,
+    build_aggregated_entity_rows,
     delete_all_nodes_and_relationships,
     get_database_stats
 )
@@ -30,12 +64,15 @@ SCRIPT_DIR = Path(__file__).parent.resolve()
 CHUNK_DIR = SCRIPT_DIR / "step" / "chunkings"
 MAX_WORKERS = 40
 MAX_WORKERS_ENTITY = 20
-MAX_WORKERS_REL = 1
-MAX_RETRIES = 5
-
-# 실패 큐
-failed_queue = []
-failed_queue_lock = threading.Lock()
+# 관계 writer 샤드 수 (샤딩 모드) / 워커 수 (--per-chunk-rel 모드)
+MAX_WORKERS_REL = 10
+FAILED_JOURNAL_PATH = DEFAULT_FAILED_JOURNAL_PATH
+# 집계 모드 UNWIND 배치 크기
+CHUNK_BATCH_SIZE = 100
+ENTITY_BATCH_SIZE = 50
+
+# 실패 배치 저널 (backoff 재시도 후에도 실패한 배치 → replay로 복구)
+failed_journal = None
 stats_lock = threading.Lock()
 total_stats = {
     'chunks_processed': 0, 'chunks_failed': 0,
@@ -59,109 +96,118 @@ def read_chunks_from_dir(chunk_dir: Path) -> list:
     return chunks
 
 
+def get_failed_journal() -> FailedWriteJournal:
+    global failed_journal
+    if failed_journal is None:
+        failed_journal = FailedWriteJournal(FAILED_JOURNAL_PATH)
+    return failed_journal
+
+
+def journal_chunk_index_failure(rows, error_code, error):
+    """chunk 색인(OpenSearch) 실패 배치를 실패 저널에 기록 (Neptune 쓰기가 성공해도 replay로 다시 색인)"""
+    get_failed_journal().record_failed_batch(KIND_CHUNK_INDEX, {'chunks': rows}, error_code, error, retryable=True)
+    print(f"   📒 Chunk 색인 실패 {len(rows)}개 → 실패 저널에 기록")
+
+
+def defer_failed_chunk_mentions(rows_by_label, failed_chunk_ids):
+    """
+    __Chunk__ 노드 저장에 실패한 chunk의 mention을 엔티티 row에서 떼어 실패 저널(entity_rows)에 기록합니다.
+    그대로 쓰면 upsert의 MATCH (c:__Chunk__)에서 MENTIONS / description이 조용히 빠지고,
+    chunk 배치 replay로는 복구되지 않습니다. 엔티티 노드 자체는 (mention이 없어도) 지금 만들어 관계가 연결되게 합니다.
+
+    Returns:
+        dict: {label: rows} - 지금 쓸 row (실패 chunk의 mention 제외)
+    """
+    remaining, deferred_count = {}, 0
+    for label, rows in rows_by_label.items():
+        deferred = []
+        for row in rows:
+            mentions = [m for m in row['mentions'] if m['chunk_id'] not in failed_chunk_ids]
+            if len(mentions) < len(row['mentions']):
+                deferred.append({**row, 'mentions': [m for m in row['mentions'] if m['chunk_id'] in failed_chunk_ids]})
+            remaining.setdefault(label, []).append({**row, 'mentions': mentions})
+        for start in range(0, len(deferred), ENTITY_BATCH_SIZE):
+            get_failed_journal().record_failed_batch(
+                KIND_ENTITY_ROWS, {'label': label, 'rows': deferred[start:start + ENTITY_BATCH_SIZE]},
+                "ChunkRowsFailed", f"{len(failed_chunk_ids)} chunk rows failed before entity upsert", retryable=True
+            )
+        deferred_count += len(deferred)
+    if deferred_count:
+        print(f"   📒 실패한 chunk에 mention이 있는 엔티티 {deferred_count}개 → 실패 저널에 기록 (chunk replay 후 다시 씀)")
+    return remaining
+
+
 def process_entities(idx: int, total: int, chunk: dict) -> bool:
     """엔티티만 저장 (1단계)"""
     chunk_id = chunk.get('chunk_id', 'unknown')
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            chunk_hash = chunk.get('chunk_hash', '')
-            movie_id = chunk.get('movie_id', '')
-            reviewer = chunk.get('reviewer', '')
-            user_query = chunk.get('user_query', '')
-            entities = chunk.get('entities', [])
-            entity_resolution = chunk.get('entity_resolution', {})
-
-            resolved_entities = []
-            for ent in entities:
-                original_name = ent.get('entity_name', '')
-                resolution = entity_resolution.get(original_name, {})
-                resolved_name = resolution.get('resolved_name', original_name)
-                resolved_ent = ent.copy()
-                resolved_ent['entity_name'] = resolved_name
-                resolved_entities.append(resolved_ent)
-
-            e_total, e_existing, e_new = 0, 0, 0
-            if resolved_entities:
-                save_result = import_nodes_with_dynamic_label(
-                    resolved_entities, movie_id, reviewer, chunk_id, user_query, chunk_hash
-                )
-                es = save_result.get('stats', {})
-                e_total = es.get('total', len(resolved_entities))
-                e_existing = es.get('existing', 0)
-                e_new = es.get('new', 0)
-
-            with stats_lock:
-                total_stats['chunks_processed'] += 1
-                total_stats['entities_saved'] += e_total
-                total_stats['entities_existing'] += e_existing
-                total_stats['entities_new'] += e_new
+    key = f"{KIND_CHUNK_ENTITIES}:{chunk_id}"
+    resolved_entities = resolve_chunk_entities(chunk)
 
-            print(f"✅ [{idx}/{total}] {chunk_id} | entities: {e_total}")
-            return True
+    e_total, e_existing, e_new = 0, 0, 0
+    if resolved_entities:
+        try:
+            save_result = call_with_backoff(
+                f"[{idx}/{total}] {chunk_id}", import_nodes_batched,
+                resolved_entities, chunk.get('movie_id', ''), chunk.get('reviewer', ''),
+                chunk_id, chunk.get('user_query', ''), chunk.get('chunk_hash', '')
+            )
         except Exception as e:
-            err_msg = str(e)
-            if "ConcurrentModification" in err_msg and attempt < MAX_RETRIES:
-                wait = attempt * 0.5
-                print(f"⚠️ [{idx}/{total}] {chunk_id} | 충돌, {wait}s 후 재시도 ({attempt}/{MAX_RETRIES})")
-                time.sleep(wait)
-                continue
             with stats_lock:
                 total_stats['chunks_failed'] += 1
-            print(f"❌ [{idx}/{total}] {chunk_id} | 에러: {e}")
-            with failed_queue_lock:
-                failed_queue.append(chunk)
+            get_failed_journal().record_failure(KIND_CHUNK_ENTITIES, {'filepath': chunk['_filepath']}, e, key=key)
+            print(f"❌ [{idx}/{total}] {chunk_id} | {get_error_code(e)}: {e} → 실패 저널에 기록")
             return False
+        es = save_result.get('stats', {})
+        e_total = es.get('total', len(resolved_entities))
+        e_existing = es.get('existing', 0)
+        e_new = es.get('new', 0)
+    get_failed_journal().record_success(key)
+
+    with stats_lock:
+        total_stats['chunks_processed'] += 1
+        total_stats['entities_saved'] += e_total
+        total_stats['entities_existing'] += e_existing
+        total_stats['entities_new'] += e_new
+
+    print(f"✅ [{idx}/{total}] {chunk_id} | entities: {e_total}")
+    return True
 
 
 def process_relationships(idx: int, total: int, chunk: dict) -> bool:
     """관계만 저장 (2단계)"""
     chunk_id = chunk.get('chunk_id', 'unknown')
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            relationships = chunk.get('relationships', [])
-            entity_resolution = chunk.get('entity_resolution', {})
-
-            resolved_relationships = []
-            for rel in relationships:
-                resolved_rel = rel.copy()
-                src_name = rel.get('source_entity', '')
-                src_res = entity_resolution.get(src_name, {})
-                resolved_rel['source_entity'] = src_res.get('resolved_name', src_name)
-                tgt_name = rel.get('target_entity', '')
-                tgt_res = entity_resolution.get(tgt_name, {})
-                resolved_rel['target_entity'] = tgt_res.get('resolved_name', tgt_name)
-                resolved_relationships.append(resolved_rel)
-
-            r_total, r_existing, r_new = 0, 0, 0
-            if resolved_relationships:
-                rel_result = import_relationships_with_dynamic_label(resolved_relationships)
-                rs = rel_result.get('stats', {})
-                r_total = rs.get('total', len(resolved_relationships))
-                r_existing = rs.get('existing', 0)
-                r_new = rs.get('new', 0)
+    key = f"{KIND_CHUNK_RELATIONSHIPS}:{chunk_id}"
+    resolved_relationships = resolve_chunk_relationships(chunk)
 
-            with stats_lock:
-                total_stats['relationships_saved'] += r_total
-                total_stats['relationships_existing'] += r_existing
-                total_stats['relationships_new'] += r_new
-
-            print(f"🔗 [{idx}/{total}] {chunk_id} | rels: {r_total}")
-            return True
+    r_total, r_existing, r_new = 0, 0, 0
+    if resolved_relationships:
+        try:
+            rel_result = call_with_backoff(
+                f"[{idx}/{total}] {chunk_id}", import_relationships_batched, resolved_relationships, chunk_id
+            )
         except Exception as e:
-            err_msg = str(e)
-            if "ConcurrentModification" in err_msg and attempt < MAX_RETRIES:
-                wait = attempt * 0.5
-                print(f"⚠️ [{idx}/{total}] {chunk_id} | 충돌, {wait}s 후 재시도 ({attempt}/{MAX_RETRIES})")
-                time.sleep(wait)
-                continue
-            with failed_queue_lock:
-                failed_queue.append(chunk)
-            print(f"❌ [{idx}/{total}] {chunk_id} | 에러: {e}")
+            get_failed_journal().record_failure(
+                KIND_CHUNK_RELATIONSHIPS, {'filepath': chunk['_filepath']}, e, key=key
+            )
+            print(f"❌ [{idx}/{total}] {chunk_id} | {get_error_code(e)}: {e} → 실패 저널에 기록")
             return False
+        rs = rel_result.get('stats', {})
+        r_total = rs.get('total', len(resolved_relationships))
+        r_existing = rs.get('existing', 0)
+        r_new = rs.get('new', 0)
+    get_failed_journal().record_success(key)
+
+    with stats_lock:
+        total_stats['relationships_saved'] += r_total
+        total_stats['relationships_existing'] += r_existing
+        total_stats['relationships_new'] += r_new
 
+    print(f"🔗 [{idx}/{total}] {chunk_id} | rels: {r_total}")
+    return True
 
-def run_parallel_with_retry(chunks, process_fn, label, workers):
-    """병렬 실행 + 실패 큐 재처리"""
+
+def run_parallel(chunks, process_fn, workers):
+    """병렬 실행 (재시도는 배치 단위 backoff, 최종 실패는 실패 저널로)"""
     random.shuffle(chunks)
     with ThreadPoolExecutor(max_workers=workers) as executor:
         futures = {
@@ -171,38 +217,147 @@ def run_parallel_with_retry(chunks, process_fn, label, workers):
         for future in as_completed(futures):
             future.result()
 
-    retry_round = 1
-    while failed_queue:
-        retry_chunks = list(failed_queue)
-        failed_queue.clear()
-        random.shuffle(retry_chunks)
-        print(f"\n🔄 {label} 실패 큐 재처리 (round {retry_round}, {len(retry_chunks)}개)")
-        time.sleep(2)
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = {
-                executor.submit(process_fn, i, len(retry_chunks), chunk): chunk
-                for i, chunk in enumerate(retry_chunks, 1)
-            }
-            for future in as_completed(futures):
-                future.result()
-        retry_round += 1
-        if retry_round > 5:
-            print(f"⚠️ {label} 재처리 5회 초과, 남은 실패: {len(failed_queue)}개")
-            break
-
-
-def run(clean_database: bool = True):
+
+def journal_sharded_failures(result):
+    """샤딩 writer에서 끝내 실패한 관계 배치를 실패 저널에 기록"""
+    for item in result['failed']:
+        get_failed_journal().record_failed_batch(
+            KIND_RELATIONSHIP_ROWS,
+            {'source_label': item['source_label'], 'target_label': item['target_label'], 'rows': item['rows']},
+            item['error_code'], item['error']
+        )
+
+
+def save_relationships_sharded(chunks):
+    """모든 chunk의 관계를 한 번에 모아 노드가 겹치지 않는 샤드별 writer로 저장 (2단계)"""
+    chunk_relationships = [
+        (chunk.get('chunk_id', ''), resolve_chunk_relationships(chunk)) for chunk in chunks
+    ]
+    print(f"🔗 Relationship mentions: {sum(len(rels) for _, rels in chunk_relationships)}")
+
+    result = write_relationships_sharded(chunk_relationships, num_shards=MAX_WORKERS_REL)
+    journal_sharded_failures(result)
+    rs = result['stats']
+    total_stats['relationships_saved'] += rs['total']
+    total_stats['relationships_existing'] += rs['existing']
+    total_stats['relationships_new'] += rs['new']
+    print_sharded_stats(result)
+    return result
+
+
+def save_aggregated(chunks):
+    """
+    코퍼스 전체를 먼저 집계한 뒤 엔티티당 1번, 관계 쌍당 1번만 기록합니다.
+    같은 엔티티가 N개 chunk에 나와도 description 문자열을 N번 다시 쓰지 않습니다.
+    """
+    print(f"\n{'='*60}")
+    print("🧮 집계: (type, name) / 엔티티 쌍 단위")
+    print('='*60)
+    aggregate = aggregate_chunks(chunks)
+    print_aggregate_stats(aggregate, chunks)
+
+    # === 1단계: Chunk (OpenSearch + Neptune base 노드) ===
+    print(f"\n{'='*60}")
+    print(f"📄 1단계: Chunk 저장 ({len(aggregate['chunks'])}개)")
+    print('='*60)
+    # OpenSearch 색인은 write-behind 큐로 넘기고 Neptune 쓰기와 동시에 진행 (run 끝에서 flush)
+    for chunk in aggregate['chunks']:
+        enqueue_chunk_index(chunk['chunk_hash'], chunk['chunk_id'], chunk['text'])
+
+    # MOVIE / REVIEWER 노드를 공유하므로 chunk 배치는 순차 실행
+    chunk_rows = build_chunk_rows(aggregate['chunks'])
+    failed_chunk_ids = set()
+    for start in range(0, len(chunk_rows), CHUNK_BATCH_SIZE):
+        batch = chunk_rows[start:start + CHUNK_BATCH_SIZE]
+        result = get_failed_journal().run(KIND_CHUNK_ROWS, {'rows': batch}, label=f"Chunk {start}")
+        if result is None:
+            total_stats['chunks_failed'] += len(batch)
+            failed_chunk_ids.update(row['chunk_id'] for row in batch)
+        else:
+            total_stats['chunks_processed'] += len(result.get('results', []))
+    print(f"  Chunk 결과: 저장 {total_stats['chunks_processed']}, 실패 {total_stats['chunks_failed']}")
+
+    # === 2단계: Entity (엔티티당 1번) ===
+    rows_by_label = build_aggregated_entity_rows(aggregate['entities'])
+    if failed_chunk_ids:
+        rows_by_label = defer_failed_chunk_mentions(rows_by_label, failed_chunk_ids)
+    batches = []
+    for label, rows in rows_by_label.items():
+        for start in range(0, len(rows), ENTITY_BATCH_SIZE):
+            batches.append((label, rows[start:start + ENTITY_BATCH_SIZE]))
+
+    print(f"\n{'='*60}")
+    print(f"📦 2단계: Entity 저장 ({len(aggregate['entities'])}개, {len(batches)} batches, {MAX_WORKERS_ENTITY} workers)")
+    print('='*60)
+
+    def save_entity_batch(label, rows):
+        result = get_failed_journal().run(
+            KIND_ENTITY_ROWS, {'label': label, 'rows': rows}, label=f"{label} ({len(rows)} rows)"
+        )
+        if result is None:
+            return
+        saved = result.get('results', [])
+        with stats_lock:
+            for row in saved:
+                total_stats['entities_existing' if row.get('is_existing') else 'entities_new'] += 1
+                total_stats['entities_saved'] += 1
+        print(f"✅ {label} | entities: {len(saved)}")
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS_ENTITY) as executor:
+        futures = [executor.submit(save_entity_batch, label, rows) for label, rows in batches]
+        for future in as_completed(futures):
+            future.result()
+
+    # === 3단계: Relationship (쌍당 1번, 샤딩) ===
+    print(f"\n{'='*60}")
+    print(f"🔗 3단계: Relationship 저장 ({len(aggregate['relationships'])} pairs, {MAX_WORKERS_REL} shards)")
+    print('='*60)
+    result = write_pairs_sharded(aggregate['relationships'], num_shards=MAX_WORKERS_REL)
+    journal_sharded_failures(result)
+    rs = result['stats']
+    total_stats['relationships_saved'] += rs['total']
+    total_stats['relationships_existing'] += rs['existing']
+    total_stats['relationships_new'] += rs['new']
+    print_sharded_stats(result)
+
+
+def save_per_chunk(chunks, per_chunk_rel=False):
+    """chunk 단위로 엔티티를 저장한 뒤 관계를 저장합니다 (이전 방식)."""
+    # === 1단계: Entity 저장 ===
+    print(f"\n{'='*60}")
+    print(f"📦 1단계: Entity 저장 ({MAX_WORKERS_ENTITY} workers)")
+    print('='*60)
+    run_parallel(list(chunks), process_entities, MAX_WORKERS_ENTITY)
+
+    print(f"\n  Entity 결과: 저장 {total_stats['entities_saved']}, 처리 {total_stats['chunks_processed']}, 실패 {total_stats['chunks_failed']}")
+
+    # === 2단계: Relationship 저장 ===
+    print(f"\n{'='*60}")
+    if per_chunk_rel:
+        print(f"🔗 2단계: Relationship 저장 (chunk 단위, {MAX_WORKERS_REL} workers)")
+        print('='*60)
+        run_parallel(list(chunks), process_relationships, MAX_WORKERS_REL)
+    else:
+        print(f"🔗 2단계: Relationship 저장 (샤딩, {MAX_WORKERS_REL} shards)")
+        print('='*60)
+        save_relationships_sharded(chunks)
+
+
+def run(clean_database: bool = True, per_chunk: bool = False, per_chunk_rel: bool = False):
     print("=" * 60)
     print("🚀 Save to Neptune Pipeline (Entity → Relationship 순차)")
     print("=" * 60)
 
     stats = get_database_stats()
     print(f"� Neptune: {stats['total_nodes']} nodes, {stats['total_relationships']} relationships")
+    set_failed_batch_handler(journal_chunk_index_failure)
 
     if clean_database:
         delete_all_nodes_and_relationships()
         print("🗑️ Database cleaned")
         delete_chunk_index_opensearch()
+        # DB를 비웠으므로 이전 실행의 실패 배치는 더 이상 replay 대상이 아님
+        Path(FAILED_JOURNAL_PATH).unlink(missing_ok=True)
 
     chunks = read_chunks_from_dir(CHUNK_DIR)
     print(f"📝 Loaded Chunks: {len(chunks)}")
@@ -210,22 +365,10 @@ def run(clean_database: bool = True):
         print("⚠️ No chunks found to process")
         return
 
-    # === 1단계: Entity 저장 ===
-    print(f"\n{'='*60}")
-    print(f"📦 1단계: Entity 저장 ({MAX_WORKERS_ENTITY} workers)")
-    print('='*60)
-    run_parallel_with_retry(list(chunks), process_entities, "Entity", MAX_WORKERS_ENTITY)
-
-    print(f"\n  Entity 결과: 저장 {total_stats['entities_saved']}, 처리 {total_stats['chunks_processed']}, 실패 {total_stats['chunks_failed']}")
-
-    # 실패 큐 초기화
-    failed_queue.clear()
-
-    # === 2단계: Relationship 저장 ===
-    print(f"\n{'='*60}")
-    print(f"🔗 2단계: Relationship 저장 ({MAX_WORKERS_REL} workers)")
-    print('='*60)
-    run_parallel_with_retry(list(chunks), process_relationships, "Relationship", MAX_WORKERS_REL)
+    if per_chunk:
+        save_per_chunk(chunks, per_chunk_rel)
+    else:
+        save_aggregated(chunks)
 
     print(f"\n{'='*60}")
     print("🎯 완료!")
@@ -233,9 +376,38 @@ def run(clean_database: bool = True):
     print(f"  Entities: {total_stats['entities_saved']} (기존: {total_stats['entities_existing']}, 신규: {total_stats['entities_new']})")
     print(f"  Relationships: {total_stats['relationships_saved']} (기존: {total_stats['relationships_existing']}, 신규: {total_stats['relationships_new']})")
 
+    # Neptune 쓰기가 끝나도 색인 큐에 남은 chunk가 있으면 모두 색인될 때까지 대기
+    flush_chunk_index()
+    print_cypher_stats()
+    print_template_stats()
+
+    journal = get_failed_journal()
+    if journal.failed_entries():
+        print_failed_journal_status(journal)
+        print("   👉 python save_to_neptune_fast.py replay 로 실패 배치만 다시 쓸 수 있습니다")
+
     final = get_database_stats()
     print(f"\n📊 Final Neptune: {final['total_nodes']} nodes, {final['total_relationships']} relationships")
 
 
+def replay_failed():
+    """실패 저널의 배치만 다시 씁니다 (DB는 비우지 않음)."""
+    print("=" * 60)
+    print("🔁 Replay failed Neptune writes")
+    print("=" * 60)
+    journal = get_failed_journal()
+    set_failed_batch_handler(journal_chunk_index_failure)
+    result = journal.replay()
+    print(f"\n  재시도 {result['replayed']} → 성공 {result['done']}, 실패 {result['failed']}")
+    flush_chunk_index()
+    print_cypher_stats()
+    print_failed_journal_status(journal)
+
+
 if __name__ == "__main__":
-    run(clean_database=True)
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        replay_failed()
+    elif len(sys.argv) > 1 and sys.argv[1] == "status":
+        print_failed_journal_status(get_failed_journal())
+    else:
+        run(clean_database=True, per_chunk="--per-chunk" in sys.argv, per_chunk_rel="--per-chunk-rel" in sys.argv)
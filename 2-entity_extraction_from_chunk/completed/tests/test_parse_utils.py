@@ -0,0 +1,43 @@
+"""
+utils.parse_utils 파싱 테스트
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.parse_utils import parse_compact_extraction_output, parse_combined_extraction_output
+
+
+def test_compact_keeps_trailing_parenthesis_in_description():
+    output = "E|1|코브|MOVIE_CHARACTER|꿈 도둑 (주인공)\nE|2|인셉션|MOVIE|영화\nR|1|2|주인공으로 등장 (설정)|9\n<END>"
+    entities, relationships = parse_compact_extraction_output(output)
+
+    assert entities[0]["entity_description"] == "꿈 도둑 (주인공)"
+    assert relationships[0]["relationship_description"] == "주인공으로 등장 (설정)"
+
+
+def test_compact_strips_one_enclosing_pair():
+    output = "(E|1|코브|MOVIE_CHARACTER|꿈 도둑 (주인공))\n(E|2|인셉션|MOVIE|영화)"
+    entities, _ = parse_compact_extraction_output(output)
+
+    assert entities[0]["entity_name"] == "코브"
+    assert entities[0]["entity_description"] == "꿈 도둑 (주인공)"
+    assert entities[1]["entity_description"] == "영화"
+
+
+def test_combined_keeps_parenthesis_inside_synonyms():
+    output = (
+        '("synonym"|기생충|MOVIE|Parasite,기생충 (2019),패러사이트)##\n'
+        '("synonym"|송강호|ACTOR|Song Kang-ho,송 강호)##\n'
+        '("entity"|기생충|MOVIE|봉준호 감독의 영화)##\n'
+        '("entity"|송강호|ACTOR|배우)##<END>'
+    )
+    entities, _, synonyms = parse_combined_extraction_output(output)
+
+    assert synonyms[0]["synonyms"] == ["Parasite", "기생충 (2019)", "패러사이트"]
+    assert synonyms[1]["synonyms"] == ["Song Kang-ho", "송 강호"]
+    assert [e["entity_name"] for e in entities] == ["기생충", "송강호"]
@@ -0,0 +1,160 @@
+"""
+Chunk 집계 유틸리티
+- entity_resolution을 적용한 chunk들을 코퍼스 단위로 한 번에 집계
+- (type, name)별 엔티티 description / chunk 출처, 정규화된 엔티티 쌍별 관계 description / strength / chunk 출처
+- Neptune 쓰기(UNWIND 배치)와 bulk load 파일 생성에서 공통으로 사용
+"""
+from typing import Dict, List, Tuple
+
+
+def resolve_chunk_entities(chunk: dict) -> List[dict]:
+    """chunk의 entities에 entity_resolution(resolved_name)을 적용합니다."""
+    entity_resolution = chunk.get('entity_resolution', {})
+    resolved_entities = []
+    for ent in chunk.get('entities', []):
+        original_name = ent.get('entity_name', '')
+        resolution = entity_resolution.get(original_name, {})
+        resolved_ent = ent.copy()
+        resolved_ent['entity_name'] = resolution.get('resolved_name', original_name)
+        resolved_entities.append(resolved_ent)
+    return resolved_entities
+
+
+def resolve_chunk_relationships(chunk: dict) -> List[dict]:
+    """chunk의 relationships 양 끝 이름에 entity_resolution(resolved_name)을 적용합니다."""
+    entity_resolution = chunk.get('entity_resolution', {})
+    resolved_relationships = []
+    for rel in chunk.get('relationships', []):
+        resolved_rel = rel.copy()
+        src_name = rel.get('source_entity', '')
+        resolved_rel['source_entity'] = entity_resolution.get(src_name, {}).get('resolved_name', src_name)
+        tgt_name = rel.get('target_entity', '')
+        resolved_rel['target_entity'] = entity_resolution.get(tgt_name, {}).get('resolved_name', tgt_name)
+        resolved_relationships.append(resolved_rel)
+    return resolved_relationships
+
+
+def canonical_pair(rel: dict) -> Tuple[str, str, str, str]:
+    """
+    관계의 정규화된 키 (source_name, source_type, target_name, target_type).
+    (name, type)이 작은 쪽을 source로 두어 같은 쌍은 항상 같은 방향이 됩니다.
+    """
+    source = (rel.get('source_entity', ''), rel.get('source_type', ''))
+    target = (rel.get('target_entity', ''), rel.get('target_type', ''))
+    if target < source:
+        source, target = target, source
+    return source + target
+
+
+def parse_strength(value) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def aggregate_relationship_pairs(relationships: List[dict], chunk_id: str = None, pairs: Dict = None) -> Dict:
+    """
+    관계 리스트를 정규화된 엔티티 쌍으로 묶습니다 (description 중복 제거, strength는 최대값).
+    중복 제거 후 남은 description은 처음 가져온 chunk의 chunk_descriptions에 기록합니다.
+
+    Args:
+        relationships: resolve된 relationship 리스트
+        chunk_id: 출처 chunk id (있으면 chunk_ids에 기록, chunk_descriptions의 key)
+        pairs: 누적할 기존 집계 (코퍼스 단위 집계 시)
+
+    Returns:
+        dict: {(source_name, source_type, target_name, target_type):
+               {'descriptions': [...], 'strength': float, 'chunk_ids': [...],
+                'chunk_descriptions': {chunk_id: [...]}}}
+    """
+    if pairs is None:
+        pairs = {}
+    for rel in relationships:
+        key = canonical_pair(rel)
+        description = rel.get('relationship_description', '')
+        strength = parse_strength(rel.get('relationship_strength', 0))
+
+        if key not in pairs:
+            pairs[key] = {'descriptions': [], 'strength': strength, 'chunk_ids': [], 'chunk_descriptions': {}}
+        pair = pairs[key]
+        if description not in pair['descriptions']:
+            pair['descriptions'].append(description)
+            pair['chunk_descriptions'].setdefault(chunk_id or '', []).append(description)
+        pair['strength'] = max(pair['strength'], strength)
+        if chunk_id and chunk_id not in pair['chunk_ids']:
+            pair['chunk_ids'].append(chunk_id)
+    return pairs
+
+
+def format_chunk_ids(chunk_ids) -> str:
+    """
+    RELATIONSHIP의 chunk_ids 속성 값 ('|c1|c2|').
+    Neptune은 배열 속성을 지원하지 않으므로 구분자 문자열로 저장하고 CONTAINS '|id|'로 검사합니다.
+    """
+    return '|' + ''.join(f"{chunk_id}|" for chunk_id in chunk_ids)
+
+
+def aggregate_chunks(chunks: List[dict]) -> dict:
+    """
+    resolve된 chunk 전체를 한 번 훑어 그래프 쓰기 단위로 집계합니다.
+
+    Returns:
+        dict: {
+            'chunks': [{'chunk_id', 'chunk_hash', 'movie_id', 'reviewer', 'text'}],
+            'movies': {movie_id: [chunk_id, ...]},
+            'reviewers': {reviewer: [chunk_id, ...]},
+            'entities': {(entity_type, entity_name):
+                         {'descriptions': [...], 'chunk_ids': [...],
+                          'chunk_descriptions': {chunk_id: [...]}}},
+            'relationships': {(source_name, source_type, target_name, target_type):
+                              {'descriptions': [...], 'strength': float, 'chunk_ids': [...],
+                               'chunk_descriptions': {chunk_id: [...]}}}
+        }
+    """
+    aggregate = {'chunks': [], 'movies': {}, 'reviewers': {}, 'entities': {}, 'relationships': {}}
+
+    for chunk in chunks:
+        chunk_id = chunk.get('chunk_id', '')
+        movie_id = chunk.get('movie_id', '')
+        reviewer = chunk.get('reviewer', '')
+
+        aggregate['chunks'].append({
+            'chunk_id': chunk_id,
+            'chunk_hash': chunk.get('chunk_hash', ''),
+            'movie_id': movie_id,
+            'reviewer': reviewer,
+            'text': chunk.get('user_query', '')
+        })
+        aggregate['movies'].setdefault(movie_id, []).append(chunk_id)
+        aggregate['reviewers'].setdefault(reviewer, []).append(chunk_id)
+
+        for ent in resolve_chunk_entities(chunk):
+            key = (ent.get('entity_type', 'UNKNOWN'), ent.get('entity_name', ''))
+            description = ent.get('entity_description', '')
+            entity = aggregate['entities'].setdefault(
+                key, {'descriptions': [], 'chunk_ids': [], 'chunk_descriptions': {}}
+            )
+            entity['descriptions'].append(description)
+            if chunk_id not in entity['chunk_ids']:
+                entity['chunk_ids'].append(chunk_id)
+            entity['chunk_descriptions'].setdefault(chunk_id, []).append(description)
+
+        aggregate_relationship_pairs(
+            resolve_chunk_relationships(chunk), chunk_id=chunk_id, pairs=aggregate['relationships']
+        )
+
+    return aggregate
+
+
+def print_aggregate_stats(aggregate: dict, chunks: List[dict] = None):
+    """집계 결과 요약 출력 (mention 수 대비 쓰기 단위 수)"""
+    mentions = sum(len(e['descriptions']) for e in aggregate['entities'].values())
+    rel_mentions = sum(len(c.get('relationships', [])) for c in chunks) if chunks else None
+    print(f"   📦 Chunks: {len(aggregate['chunks'])} | Movies: {len(aggregate['movies'])} | "
+          f"Reviewers: {len(aggregate['reviewers'])}")
+    print(f"   🧩 Entities: {len(aggregate['entities'])} (mentions: {mentions})")
+    if rel_mentions is not None:
+        print(f"   🔗 Relationships: {len(aggregate['relationships'])} (mentions: {rel_mentions})")
+    else:
+        print(f"   🔗 Relationships: {len(aggregate['relationships'])}")
@@ -4,47 +4,124 @@
 import os
 from datetime import datetime
 from strands import Agent
-from strands.models import BedrockModel
+from utils.bedrock_pool import get_bedrock_model, complete
+from utils.parse_utils import ExtractionStreamParser
 
+# 기본 설정
+DEFAULT_MODEL_ID = "global.anthropic.claude-opus-4-5-20251101-v1:0"
+DEFAULT_REGION = "us-west-2"
+DEFAULT_TEMPERATURE = 0.3
 
-def load_graph_extraction_prompt():
+
+GRAPH_EXTRACTION_PROMPT = 'graph_extraction.md'
+# entity에 로컬 id를 붙이고 relationship은 id로만 참조하는 짧은 출력 형식
+GRAPH_EXTRACTION_COMPACT_PROMPT = 'graph_extraction_compact.md'
+# 동의어 + entity/relationship을 한 번에 추출 (1-entity_setting 동의어 호출과 통합)
+GRAPH_SYNONYM_EXTRACTION_PROMPT = 'graph_synonym_extraction.md'
+
+
+def load_graph_extraction_prompt(compact=False):
     """Load the graph extraction prompt from file"""
-    prompt_path = os.path.join(os.path.dirname(__file__), '..', 'prompts', 'graph_extraction.md')
+    prompt_name = GRAPH_EXTRACTION_COMPACT_PROMPT if compact else GRAPH_EXTRACTION_PROMPT
+    prompt_path = os.path.join(os.path.dirname(__file__), '..', 'prompts', prompt_name)
     with open(prompt_path, 'r', encoding='utf-8') as f:
         return f.read()
 
 
-def extract_entities(payload):
+def build_extraction_prompt(payload, compact=False):
+    """
+    payload의 텍스트로 graph extraction 프롬프트를 구성합니다.
+    compact=True면 compact 출력 형식 프롬프트를 사용합니다.
+    """
+    # Get user query from payload
+    user_query = payload.get("user_query", "")
+    
+    # Load prompt template
+    prompt_template = load_graph_extraction_prompt(compact)
+    
+    # Format prompt with current time
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    formatted_prompt = prompt_template.format(CURRENT_TIME=current_time)
+    
+    return f"{formatted_prompt}\n\nText:\n{user_query}"
+
+
+def extract_entities(payload, compact=False):
     """
     Extract entities from user queries using graph extraction prompt
     
     Args:
         payload: dict with "user_query" key containing the text to extract entities from
+        compact: True면 compact 형식으로 출력 (parse_compact_extraction_output으로 파싱)
     
     Returns:
         AgentResult with extracted entities
     """
-    bedrock_model = BedrockModel(
-        model_id="global.anthropic.claude-opus-4-5-20251101-v1:0",
-        region_name="us-west-2",
-        temperature=0.3,
-    )
+    full_prompt = build_extraction_prompt(payload, compact)
+    
+    # 스레드별로 재사용되는 Agent로 단발 호출 (호출별 입력/출력 토큰은 get_token_stats()에 집계)
+    response = complete(full_prompt, DEFAULT_MODEL_ID, DEFAULT_REGION, DEFAULT_TEMPERATURE)
+    
+    return response
 
-    agent = Agent(model=bedrock_model)
-        
-    # Get user query from payload
-    user_query = payload.get("user_query", "")
+
+def extract_entities_and_synonyms(payload):
+    """
+    하나의 LLM 호출로 동의어와 entity/relationship을 함께 추출합니다.
     
-    # Load prompt template
-    prompt_template = load_graph_extraction_prompt()
+    Args:
+        payload: {
+            "user_query": str,     # chunk 텍스트
+            "movie_context": str   # movie_cast 기반 영화 정보 컨텍스트
+        }
     
-    # Format prompt with current time
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted_prompt = prompt_template.format(CURRENT_TIME=current_time)
+    Returns:
+        AgentResult (parse_combined_extraction_output으로 파싱)
+    """
+    prompt_path = os.path.join(os.path.dirname(__file__), '..', 'prompts', GRAPH_SYNONYM_EXTRACTION_PROMPT)
+    with open(prompt_path, 'r', encoding='utf-8') as f:
+        prompt_template = f.read()
     
-    full_prompt = f"{formatted_prompt}\n\nText:\n{user_query}"
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    formatted_prompt = prompt_template.format(
+        CURRENT_TIME=current_time,
+        MOVIE_CONTEXT=payload.get("movie_context", "")
+    )
     
-    # Extract entities using the agent
-    response = agent(full_prompt)
+    # 스레드별로 재사용되는 Agent로 단발 호출 (호출별 토큰은 get_token_stats()에 집계)
+    response = complete(f"{formatted_prompt}\n\nText:\n{payload.get('user_query', '')}",
+                        DEFAULT_MODEL_ID, DEFAULT_REGION, DEFAULT_TEMPERATURE)
     
     return response
+
+
+def stream_extract_entities(payload, on_record=None):
+    """
+    스트리밍으로 엔티티/관계를 추출합니다.
+    모델 토큰이 도착하는 대로 파싱하여, 레코드가 닫힐 때마다 on_record 콜백을 호출합니다.
+    
+    Args:
+        payload: dict with "user_query" key containing the text to extract entities from
+        on_record: 완성된 레코드(dict)를 받는 콜백 - 모델 응답이 끝나기 전에 호출됨
+    
+    Returns:
+        tuple: (entities, relationships) - parse_extraction_output과 동일한 형태
+    """
+    parser = ExtractionStreamParser(on_record=on_record)
+
+    def stream_handler(**kwargs):
+        # strands callback: 텍스트 델타는 "data" 키로 전달됨
+        data = kwargs.get("data")
+        if data:
+            parser.feed(data)
+
+    # 콜백이 호출마다 다르므로 Agent는 새로 만들고, 모델(클라이언트)만 재사용
+    bedrock_model = get_bedrock_model(DEFAULT_MODEL_ID, DEFAULT_REGION, DEFAULT_TEMPERATURE)
+    agent = Agent(model=bedrock_model, callback_handler=stream_handler)
+    
+    full_prompt = build_extraction_prompt(payload)
+    
+    agent(full_prompt)
+    parser.close()
+    
+    return parser.entities, parser.relationships
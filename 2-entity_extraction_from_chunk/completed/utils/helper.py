@@ -213,6 +213,35 @@ def get_context_from_review_file(review_filepath: str) -> Tuple[str, str, str, s
     return context, transcript, movie['title'], reviewer['name']
 
 
+def build_context_from_cast(cast_data: dict) -> str:
+    """movie_cast JSON에서 context 문자열 생성 (1-entity_setting 동의어 파이프라인과 동일)"""
+    title = cast_data["movie_title"]
+    directors = cast_data.get("director", [])
+    cast = cast_data.get("cast", [])
+
+    parts = [f"영화 {title}의 주요 등장인물과 배우 정보:", ""]
+    for c in cast:
+        parts.append(f"- {c['character']}: {c['actor']}이 연기한 캐릭터")
+
+    parts.append("")
+    parts.append(f"영화: {title}")
+    if directors:
+        parts.append(f"감독: {directors[0]['name']}")
+    parts.append(f"총 {len(cast)}명의 배우가 {len(cast)}개의 캐릭터를 연기했습니다.")
+
+    return "\n".join(parts)
+
+
+def load_movie_contexts(cast_dir) -> Dict[str, str]:
+    """movie_cast 디렉토리의 JSON들로 {movie_title: context} 생성 (chunk의 movie_id로 조회)"""
+    contexts = {}
+    for cast_file in sorted(Path(cast_dir).glob("*.json")):
+        with open(cast_file, 'r', encoding='utf-8') as f:
+            cast_data = json.load(f)
+        contexts[cast_data["movie_title"]] = build_context_from_cast(cast_data)
+    return contexts
+
+
 def get_all_review_files() -> List[Path]:
     """모든 리뷰 파일 경로 반환"""
     return list(REVIEWS_DIR.glob("*.json"))
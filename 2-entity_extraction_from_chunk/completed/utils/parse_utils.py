@@ -135,6 +135,65 @@ def parse_search_context(output_str):
     return entities
 
 
+def _parse_strength(value):
+    """relationship_strength 토큰을 숫자로 변환합니다 (실패 시 원본 문자열 유지)."""
+    try:
+        strength = float(value)
+        if strength.is_integer():
+            strength = int(strength)
+    except ValueError:
+        strength = value
+    return strength
+
+
+def _build_extraction_record(tokens):
+    """
+    필드 토큰 리스트를 entity / relationship 레코드 dict로 변환합니다.
+
+    Parameters:
+        tokens: tuple delimiter로 분리된 필드 리스트 (첫 번째는 "entity" 또는 "relationship")
+
+    Returns:
+        dict or None: 인식할 수 없는 레코드면 None
+    """
+    # The first token should be "entity" or "relationship".
+    rec_type = tokens[0].strip(' "\'').lower()
+
+    if rec_type == "entity" and len(tokens) == 4:
+        return {
+            "record_type": "entity",
+            "entity_name": tokens[1],
+            "entity_type": tokens[2],
+            "entity_description": tokens[3]
+        }
+    elif rec_type == "entity":
+        # 디버깅: 왜 파싱 안 되는지 출력
+        print(f"   ⚠️ Entity 파싱 실패 (tokens={len(tokens)}): {tokens[:2] if tokens else 'empty'}")
+    elif rec_type == "relationship" and len(tokens) == 7:
+        # New format: ("relationship"|<source_entity>|<source_type>|<target_entity>|<target_type>|<description>|<strength>)
+        return {
+            "record_type": "relationship",
+            "source_entity": tokens[1],
+            "source_type": tokens[2],
+            "target_entity": tokens[3],
+            "target_type": tokens[4],
+            "relationship_description": tokens[5],
+            "relationship_strength": _parse_strength(tokens[6])
+        }
+    elif rec_type == "relationship" and len(tokens) == 5:
+        # Legacy format fallback
+        return {
+            "record_type": "relationship",
+            "source_entity": tokens[1],
+            "source_type": "",
+            "target_entity": tokens[2],
+            "target_type": "",
+            "relationship_description": tokens[3],
+            "relationship_strength": _parse_strength(tokens[4])
+        }
+    return None
+
+
 def parse_extraction_output(output_str, record_delimiter=None, tuple_delimiter=None):
     """
     Parse a structured output string containing "entity", "relationship" records into separate lists.
@@ -209,58 +268,294 @@ def parse_extraction_output(output_str, record_delimiter=None, tuple_delimiter=N
         if not tokens:
             continue
 
-        # The first token should be "entity" or "relationship".
-        rec_type = tokens[0].strip(' "\'').lower()
-
-        if rec_type == "entity" and len(tokens) == 4:
-            record = {
-                "record_type": "entity",
-                "entity_name": tokens[1],
-                "entity_type": tokens[2],
-                "entity_description": tokens[3]
-            }
+        record = _build_extraction_record(tokens)
+        if record is None:
+            continue
+        if record["record_type"] == "entity":
             entities.append(record)
-        elif rec_type == "entity":
-            # 디버깅: 왜 파싱 안 되는지 출력
-            print(f"   ⚠️ Entity 파싱 실패 (tokens={len(tokens)}): {tokens[:2] if tokens else 'empty'}")
-        elif rec_type == "relationship" and len(tokens) == 7:
-            # New format: ("relationship"|<source_entity>|<source_type>|<target_entity>|<target_type>|<description>|<strength>)
-            try:
-                strength = float(tokens[6])
-                if strength.is_integer():
-                    strength = int(strength)
-            except ValueError:
-                strength = tokens[6]
-            record = {
-                "record_type": "relationship",
-                "source_entity": tokens[1],
-                "source_type": tokens[2],
-                "target_entity": tokens[3],
-                "target_type": tokens[4],
-                "relationship_description": tokens[5],
-                "relationship_strength": strength
-            }
-            relationships.append(record)
-        elif rec_type == "relationship" and len(tokens) == 5:
-            # Legacy format fallback
-            try:
-                strength = float(tokens[4])
-                if strength.is_integer():
-                    strength = int(strength)
-            except ValueError:
-                strength = tokens[4]
-            record = {
-                "record_type": "relationship",
-                "source_entity": tokens[1],
-                "source_type": "",
-                "target_entity": tokens[2],
-                "target_type": "",
-                "relationship_description": tokens[3],
-                "relationship_strength": strength
-            }
+        else:
             relationships.append(record)
     
     return entities, relationships
 
 
+# ("entity"| 또는 ("relationship"| 레코드 시작 마커
+RECORD_START_MARKERS = ('("entity"|', '("relationship"|')
+# 레코드를 닫는 ')' 뒤에 올 수 있는 토큰
+RECORD_TERMINATORS = ("##", "<END>") + RECORD_START_MARKERS
+_RECORD_START_PATTERN = re.compile(r'\("(?:entity|relationship)"\|')
+_MAX_MARKER_LEN = max(len(m) for m in RECORD_START_MARKERS)
+
+
+class ExtractionStreamParser:
+    """
+    스트리밍 모델 토큰을 받아 ("entity"|...) / ("relationship"|...) 레코드가 닫히는 즉시 반환하는 증분 파서
+
+    parse_extraction_output과 같은 dict 형태를 만들지만, 전체 응답을 기다리거나 구분자를 추측하지 않습니다.
+    레코드는 닫는 ')' 뒤에 ##, <END>, 다음 레코드 시작 마커, 또는 스트림 종료가 올 때 확정됩니다.
+    따라서 설명 안의 괄호나 줄바꿈 구분, 구분자 없이 이어붙인 출력도 처리합니다.
+
+    사용 예:
+        parser = ExtractionStreamParser(on_record=handle)
+        for token in stream:
+            parser.feed(token)
+        parser.close()
+        entities, relationships = parser.entities, parser.relationships
+    """
+
+    def __init__(self, tuple_delimiter="|", on_record=None):
+        """
+        Parameters:
+            tuple_delimiter: 레코드 내부 필드 구분자
+            on_record: 레코드가 완성될 때마다 호출되는 콜백 (record dict 인자)
+        """
+        self.tuple_delimiter = tuple_delimiter
+        self.on_record = on_record
+        self.entities = []
+        self.relationships = []
+        self.dropped = 0
+        self._buffer = ""
+        self._in_record = False
+        self._scan_pos = 0
+
+    def feed(self, text):
+        """
+        스트림 조각을 추가하고, 이번에 완성된 레코드 리스트를 반환합니다.
+        """
+        if not text:
+            return []
+        self._buffer += text
+        return self._drain(final=False)
+
+    def close(self):
+        """
+        스트림 종료: 남은 버퍼에서 마지막 레코드를 확정하고 반환합니다.
+        """
+        records = self._drain(final=True)
+        self._buffer = ""
+        self._in_record = False
+        self._scan_pos = 0
+        return records
+
+    def _drain(self, final):
+        emitted = []
+        while True:
+            if not self._in_record:
+                match = _RECORD_START_PATTERN.search(self._buffer)
+                if not match:
+                    # 마커가 잘려 들어왔을 수 있으므로 꼬리만 남겨둠
+                    if final:
+                        self._buffer = ""
+                    else:
+                        self._buffer = self._buffer[-(_MAX_MARKER_LEN - 1):]
+                    break
+                self._buffer = self._buffer[match.start():]
+                self._in_record = True
+                self._scan_pos = match.end()
+
+            end = self._find_record_end(final)
+            if end is None:
+                break
+
+            body = self._buffer[1:end]
+            self._buffer = self._buffer[end + 1:]
+            self._in_record = False
+
+            record = self._emit(body)
+            if record is not None:
+                emitted.append(record)
+        return emitted
+
+    def _find_record_end(self, final):
+        """
+        현재 레코드를 닫는 ')' 위치를 찾습니다. 아직 판단할 수 없으면 None을 반환합니다.
+        """
+        buffer = self._buffer
+        last_close = None
+        pos = self._scan_pos
+        while True:
+            idx = buffer.find(")", pos)
+            if idx == -1:
+                break
+            # ')' 뒤 공백을 건너뛰고 종료 토큰 길이만큼만 확인
+            j = idx + 1
+            while j < len(buffer) and buffer[j].isspace():
+                j += 1
+            rest = buffer[j:j + _MAX_MARKER_LEN]
+            if not rest:
+                if final:
+                    return idx
+                # 다음 토큰이 와야 레코드 종료 여부를 알 수 있음
+                self._scan_pos = idx
+                return None
+            if rest.startswith(RECORD_TERMINATORS):
+                return idx
+            at_end = j + len(rest) == len(buffer)
+            if not final and at_end and any(t.startswith(rest) for t in RECORD_TERMINATORS):
+                self._scan_pos = idx
+                return None
+            # 설명 안의 괄호 - 계속 탐색
+            last_close = idx
+            pos = idx + 1
+
+        if final:
+            if last_close is not None:
+                # 뒤에 붙은 부가 설명은 버리고 마지막 ')'에서 레코드를 닫음
+                return last_close
+            # 닫히지 않은 레코드 (잘린 출력)
+            self.dropped += 1
+            self._buffer = ""
+            self._in_record = False
+            return None
+
+        self._scan_pos = len(buffer)
+        return None
+
+    def _emit(self, body):
+        tokens = [token.strip() for token in body.strip().split(self.tuple_delimiter)]
+        record = _build_extraction_record(tokens)
+        if record is None:
+            self.dropped += 1
+            return None
+        if record["record_type"] == "entity":
+            self.entities.append(record)
+        else:
+            self.relationships.append(record)
+        if self.on_record is not None:
+            self.on_record(record)
+        return record
+
+
+def iter_extraction_records(text_stream, tuple_delimiter="|"):
+    """
+    텍스트 조각 iterable을 받아 entity / relationship 레코드를 완성되는 순서대로 yield 합니다.
+
+    Parameters:
+        text_stream: 모델 스트림 토큰 등 문자열 조각의 iterable
+        tuple_delimiter: 레코드 내부 필드 구분자
+
+    Yields:
+        dict: parse_extraction_output과 동일한 형태의 레코드
+    """
+    parser = ExtractionStreamParser(tuple_delimiter=tuple_delimiter)
+    for text in text_stream:
+        yield from parser.feed(text)
+    yield from parser.close()
+
+
+def parse_compact_extraction_output(output_str, tuple_delimiter="|"):
+    """
+    compact 형식(prompts/graph_extraction_compact.md) 출력을 parse_extraction_output과 같은 형태로 확장합니다.
+
+    The expected format is one record per line:
+        E|<id>|<entity_name>|<entity_type>|<entity_description>
+        R|<source_id>|<target_id>|<relationship_description>|<relationship_strength>
+
+    relationship은 로컬 id로 entity를 참조하므로, id를 entity name/type으로 되돌려 채웁니다.
+    정의되지 않은 id를 참조하는 relationship은 버립니다.
+
+    Parameters:
+        output_str: The complete string output or AgentResult object.
+        tuple_delimiter: 필드 구분자
+
+    Returns:
+        Tuple[List[dict], List[dict]]: A tuple of (entities, relationships)
+    """
+    # Convert AgentResult to string if needed
+    try:
+        output_str = output_str['text']
+    except (KeyError, TypeError):
+        output_str = str(output_str)
+
+    output_str = output_str.replace("<END>", "")
+
+    entities = []
+    relationships = []
+    entity_by_id = {}
+    pending_relationships = []
+
+    # 모델이 ## 구분자를 섞어 쓰는 경우도 레코드 경계로 취급
+    for line in re.split(r'\n|##', output_str):
+        line = line.strip()
+        # 레코드 전체를 감싼 괄호 한 쌍만 제거 (설명 끝의 ")"는 유지)
+        if line.startswith('(') and line.endswith(')'):
+            line = line[1:-1].strip()
+        if not line:
+            continue
+        tokens = [token.strip() for token in line.split(tuple_delimiter)]
+        rec_type = tokens[0].strip(' "\'').upper()
+
+        if rec_type == "E" and len(tokens) >= 5:
+            entity = {
+                "record_type": "entity",
+                "entity_name": tokens[2],
+                "entity_type": tokens[3],
+                # 설명 안의 구분자는 다시 합침
+                "entity_description": tuple_delimiter.join(tokens[4:])
+            }
+            entity_by_id[tokens[1]] = entity
+            entities.append(entity)
+        elif rec_type == "R" and len(tokens) >= 5:
+            pending_relationships.append(tokens)
+        elif rec_type in ("E", "R"):
+            print(f"   ⚠️ Compact 레코드 파싱 실패 (tokens={len(tokens)}): {tokens[:2]}")
+
+    # E 레코드가 뒤에 나와도 참조할 수 있도록 id 매핑 후 확장
+    for tokens in pending_relationships:
+        source = entity_by_id.get(tokens[1])
+        target = entity_by_id.get(tokens[2])
+        if source is None or target is None:
+            print(f"   ⚠️ Relationship이 알 수 없는 id를 참조: {tokens[1]} → {tokens[2]}")
+            continue
+        relationships.append({
+            "record_type": "relationship",
+            "source_entity": source["entity_name"],
+            "source_type": source["entity_type"],
+            "target_entity": target["entity_name"],
+            "target_type": target["entity_type"],
+            "relationship_description": tuple_delimiter.join(tokens[3:-1]),
+            "relationship_strength": _parse_strength(tokens[-1])
+        })
+
+    return entities, relationships
+
+
+# 동의어 목록은 레코드를 닫는 ")" (뒤에 ## / 줄바꿈 / <END> / 끝)까지 - 동의어 안의 ")"에서 잘리지 않음
+_SYNONYM_RECORD_PATTERN = re.compile(r'\("synonym"\|([^|]+)\|([^|]+)\|(.+?)\)[ \t]*(?=##|\r?\n|<END>|$)')
+
+
+def parse_combined_extraction_output(output_str):
+    """
+    동의어 + 그래프 통합 추출(prompts/graph_synonym_extraction.md) 출력을 파싱합니다.
+
+    The expected records are:
+        ("synonym"|<entity_name>|<entity_type>|<synonym1,synonym2,...>)
+        ("entity"|...) / ("relationship"|...)  - parse_extraction_output과 동일
+
+    Parameters:
+        output_str: The complete string output or AgentResult object.
+
+    Returns:
+        Tuple[List[dict], List[dict], List[dict]]: (entities, relationships, synonyms)
+            synonyms 각 항목: {"entity_name": str, "entity_type": str, "synonyms": list}
+            (1-entity_setting의 parse_synonym_output과 같은 형태)
+    """
+    # Convert AgentResult to string if needed
+    try:
+        output_str = output_str['text']
+    except (KeyError, TypeError):
+        output_str = str(output_str)
+
+    synonyms = []
+    for name, entity_type, synonyms_str in _SYNONYM_RECORD_PATTERN.findall(output_str):
+        synonyms.append({
+            "entity_name": name.strip(),
+            "entity_type": entity_type.strip(),
+            "synonyms": [syn.strip() for syn in synonyms_str.split(',') if syn.strip()]
+        })
+
+    # synonym 레코드는 _build_extraction_record에서 무시되지만, 첫 entity 앞 텍스트로 잘리도록 제거
+    graph_output = _SYNONYM_RECORD_PATTERN.sub('', output_str)
+    entities, relationships = parse_extraction_output(graph_output)
 
+    return entities, relationships, synonyms
@@ -0,0 +1,132 @@
+"""
+Run Journal 유틸리티
+- 장시간 파이프라인 실행의 작업 단위(chunk 등)별 상태를 append-only JSONL로 기록
+- 상태: pending → in_flight → done / failed (attempts 카운트 포함)
+- 프로세스가 중간에 죽어도 마지막으로 기록된 상태가 남으므로 --resume으로 나머지만 처리 가능
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+STATUS_PENDING = "pending"
+STATUS_IN_FLIGHT = "in_flight"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+STATUSES = (STATUS_PENDING, STATUS_IN_FLIGHT, STATUS_DONE, STATUS_FAILED)
+
+
+class RunJournal:
+    """
+    key별 최신 상태를 유지하는 append-only 실행 기록.
+
+    한 줄에 하나의 이벤트를 기록하고 매번 fsync하므로, 크래시 후에도
+    마지막으로 기록된 상태까지는 보존됩니다. 마지막 줄이 잘려 있으면 무시합니다.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = self.load()
+
+    def load(self) -> dict:
+        """저널 파일을 읽어 key별 최신 entry를 반환합니다."""
+        entries = {}
+        if not self.path.exists():
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # 크래시로 잘린 마지막 줄
+                    continue
+                entries[event['key']] = event
+        return entries
+
+    def mark(self, key: str, status: str, **fields) -> dict:
+        """
+        key의 상태를 기록합니다. in_flight로 바뀔 때마다 attempts가 1 증가합니다.
+
+        Args:
+            key: 작업 단위 식별자 (예: chunk_id)
+            status: pending / in_flight / done / failed
+            **fields: 함께 기록할 추가 정보 (error, filepath 등)
+        """
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status: {status}")
+
+        with self._lock:
+            event = self._build_event(key, status, **fields)
+            self._append([event])
+            return event
+
+    def _build_event(self, key: str, status: str, **fields) -> dict:
+        previous = self._entries.get(key, {})
+        attempts = previous.get('attempts', 0)
+        if status == STATUS_IN_FLIGHT:
+            attempts += 1
+
+        return {
+            'key': key,
+            'status': status,
+            'attempts': attempts,
+            'updated_at': datetime.now().isoformat(),
+            **fields
+        }
+
+    def _append(self, events: list):
+        """이벤트들을 한 번에 기록하고 fsync는 한 번만 합니다 (lock 안에서 호출)."""
+        if not events:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for event in events:
+            self._entries[event['key']] = event
+
+    def get(self, key: str) -> dict:
+        return self._entries.get(key)
+
+    def status_of(self, key: str) -> str:
+        entry = self._entries.get(key)
+        return entry['status'] if entry else None
+
+    def register(self, keys) -> int:
+        """처음 보는 key들을 pending으로 등록하고 등록 수를 반환합니다 (fsync 한 번)."""
+        with self._lock:
+            new_keys = list(dict.fromkeys(k for k in keys if k not in self._entries))
+            self._append([self._build_event(key, STATUS_PENDING) for key in new_keys])
+        return len(new_keys)
+
+    def remaining(self, keys) -> list:
+        """done이 아닌 key 목록 (pending, failed, 크래시로 남은 in_flight 포함)"""
+        return [k for k in keys if self.status_of(k) != STATUS_DONE]
+
+    def summary(self, keys=None) -> dict:
+        """
+        상태별 개수와 총 시도 횟수.
+        keys를 주면 아직 등록되지 않은 key도 pending으로 셉니다 (저널에는 기록하지 않음).
+        """
+        entries = list(self._entries.values())
+        if keys is not None:
+            unregistered = dict.fromkeys(k for k in keys if k not in self._entries)
+            entries += [{'status': STATUS_PENDING, 'attempts': 0} for _ in unregistered]
+
+        counts = {status: 0 for status in STATUSES}
+        attempts = 0
+        for entry in entries:
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+            attempts += entry.get('attempts', 0)
+        return {'total': len(entries), 'attempts': attempts, **counts}
+
+    def failed_entries(self) -> list:
+        return [e for e in self._entries.values() if e['status'] == STATUS_FAILED]
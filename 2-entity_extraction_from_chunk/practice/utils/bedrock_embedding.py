@@ -1,8 +1,8 @@
 import json
 import os
-import boto3
 from typing import List, Union
 from botocore.exceptions import ClientError
+from utils.bedrock_pool import get_bedrock_runtime_client
 
 
 class BedrockEmbedding:
@@ -12,10 +12,8 @@ class BedrockEmbedding:
         self.region_name = region_name or os.environ.get("AWS_DEFAULT_REGION", "us-west-2")
         self.model_id = "amazon.titan-embed-text-v2:0"
         
-        self.bedrock_client = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=self.region_name
-        )
+        # 리전별 공유 클라이언트 재사용 (인스턴스마다 클라이언트/TLS 연결을 새로 만들지 않음)
+        self.bedrock_client = get_bedrock_runtime_client(self.region_name)
     
     def embed_text(self, text: Union[str, List[str]], dimensions: int = 1024, normalize: bool = True):
         """Create embeddings using Amazon Titan Embed Text v2"""
@@ -1,20 +1,27 @@
 """
 1단계: Entity Summarization
-- Neptune에서 요약이 필요한 엔티티 조회
-- LLM으로 description들을 요약
-- Neptune에 summary 저장
+- Neptune에서 요약이 필요한 엔티티 조회 (description fingerprint가 summary_src_hash와 다른 엔티티만, --force면 전부)
+- LLM으로 description들을 요약 (SummaryEngine으로 동시 실행, in-flight / 초당 호출 수 제한)
+  짧은 description 1~2개뿐인 엔티티는 LLM 없이 바로 summary 생성 (utils.summarizer fast path)
+- Neptune에 summary / neptune_id를 label별 UNWIND 배치로 저장
+- 저장된 summary는 바로 EntitySummaryIndexWriter로 흘려보내 임베딩 + OpenSearch bulk 업데이트
+  (entity_to_opensearch를 따로 실행할 필요 없음, --no-index면 Neptune에만 저장)
 """
-import json
 import re
+import sys
 import uuid
-from datetime import datetime
-from utils.generate_entity import get_bedrock_agent
-from utils.parse_utils import parse_summary_output
+from utils.bedrock_pool import print_token_stats
+from utils.parse_utils import parse_description_list
+from utils.summarizer import summarize_descriptions, print_summary_path_stats
+from utils.summary_engine import SummaryEngine, print_engine_stats
+from neptune.query_templates import is_entity_label
 from neptune.cyper_queries import (
-    get_all_entities_for_summary,
-    save_entity_summary,
-    execute_cypher
+    iter_entities_for_summary,
+    save_entity_summaries_batched
 )
+from opensearch.opensearch_con import get_opensearch_client
+from opensearch.opensearch_search import validate_opensearch_index, refresh_opensearch_index
+from opensearch.entity_index_writer import EntitySummaryIndexWriter
 
 
 def generate_neptune_id(name, entity_type):
@@ -26,136 +33,129 @@ def generate_neptune_id(name, entity_type):
     return f"{clean_name}_{entity_type}_{unique_id}"
 
 
-def update_entity_neptune_id(entity_name, entity_type, neptune_id=None):
-    """Neptune에서 엔티티에 neptune_id 속성 추가 (기존 ID가 있으면 유지)"""
-    check_query = f"""
-    MATCH (n:{entity_type} {{name: $entity_name}})
-    RETURN n.name AS name, n.neptune_id AS existing_neptune_id
-    """
-    check_result = execute_cypher(check_query, entity_name=entity_name)
-    
-    if check_result and 'results' in check_result and check_result['results']:
-        existing_id = check_result['results'][0].get('existing_neptune_id')
-        if existing_id:
-            return {"existing_id": existing_id, "created_new": False}
-    
-    if not neptune_id:
-        neptune_id = generate_neptune_id(entity_name, entity_type)
-    
-    update_query = f"""
-    MATCH (n:{entity_type} {{name: $entity_name}})
-    SET n.neptune_id = $neptune_id
-    RETURN n.name AS name, n.neptune_id AS neptune_id
-    """
-    result = execute_cypher(update_query, entity_name=entity_name, neptune_id=neptune_id)
-    return {"neptune_id": neptune_id, "created_new": True, "result": result}
-
-
 def load_summarize_prompt():
     """Load the summarization prompt from file"""
     with open('./prompts/summarization.md', 'r', encoding='utf-8') as f:
         return f.read()
 
 
-def run_entity_summarization():
+def summarize_entity(entity, prompt_template):
+    """
+    엔티티 하나를 요약합니다 (작업 스레드에서 실행).
+
+    Returns:
+        tuple: (entity_type, {'name', 'summary', 'summary_src_hash', 'neptune_id'})
+               - description이 없거나 label이 ENTITY_LABELS에 없으면 None (LLM 호출 / 쓰기 없이 건너뜀)
+
+    Raises:
+        ValueError: LLM 응답 파싱 실패 / summary 없음
+    """
+    entity_name = entity.get("name", "")
+    entity_type_list = entity.get("entity_type", [])
+    entity_type = entity_type_list[0] if entity_type_list else "UNKNOWN"
+    if not is_entity_label(entity_type):
+        print(f"   ⚠️ {entity_name} ({entity_type}): 허용되지 않은 label. 건너뜀.")
+        return None
+
+    description_list = parse_description_list(entity.get("description", []))
+    if not description_list:
+        print(f"   ⚠️ {entity_name} ({entity_type}): description이 없습니다. 건너뜀.")
+        return None
+
+    summary = summarize_descriptions(entity_name, description_list, prompt_template)
+
+    print(f"   📝 {entity_name} ({entity_type})")
+    return entity_type, {
+        'name': entity_name,
+        'summary': summary,
+        'summary_src_hash': entity.get("description_hash"),
+        # 기존 neptune_id가 있으면 쿼리에서 유지됨
+        'neptune_id': entity.get("neptune_id") or generate_neptune_id(entity_name, entity_type)
+    }
+
+
+def save_entity_summary_rows(entity_type, rows, index_writer=None):
+    """
+    label별 summary 배치를 저장하고 저장된 개수를 반환 (SummaryEngine flush 함수).
+    index_writer가 있으면 저장된 엔티티를 (확정된 neptune_id와 함께) 색인 큐에 넣습니다.
+    """
+    result = save_entity_summaries_batched(entity_type, rows, strict=True)
+    saved = {row['name']: row['neptune_id'] for row in result.get('results', [])}
+    if index_writer is not None:
+        for row in rows:
+            if row['name'] in saved:
+                index_writer.enqueue({**row, 'label': entity_type, 'neptune_id': saved[row['name']]})
+    return len(saved)
+
+
+def get_index_writer(index_name):
+    """엔티티 인덱스 매핑을 확인하고 색인 writer를 만듭니다 (검증 실패 시 None → Neptune에만 저장)."""
+    if not validate_opensearch_index(get_opensearch_client(), index_name):
+        print("⚠️ OpenSearch 색인 없이 Neptune에만 저장합니다 (나중에 entity_to_opensearch.py 실행)")
+        return None
+    return EntitySummaryIndexWriter(index_name)
+
+
+def run_entity_summarization(force=False, index_to_opensearch=True, index_name="entities"):
     """
     Entity Summarization 실행
-    1. Neptune에서 요약이 필요한 엔티티 조회
-    2. LLM으로 description 요약
-    3. Neptune에 summary 저장
+    1. Neptune에서 요약이 필요한 엔티티 조회 (force=True면 description이 바뀌지 않은 엔티티도 다시 요약)
+    2. LLM으로 description 요약 (동시 실행)
+    3. Neptune에 summary / neptune_id 배치 저장
+    4. 저장된 summary를 임베딩하여 OpenSearch에 bulk 업데이트 (index_to_opensearch=True)
     """
     print("=" * 60)
     print("🚀 Entity Summarization Start")
     print("=" * 60)
     
-    # Bedrock Agent 초기화
-    agent = get_bedrock_agent()
+    index_writer = get_index_writer(index_name) if index_to_opensearch else None
     
-    # Neptune에서 요약이 필요한 엔티티 조회
-    results = get_all_entities_for_summary()
+    # Neptune에서 요약이 필요한 엔티티를 페이지 단위로 조회하며 바로 요약 (전체 목록을 미리 받지 않음)
+    scan_stats = {'unchanged': 0}
+    entities = iter_entities_for_summary(force=force, stats=scan_stats)
     
-    if not results or 'results' not in results or not results['results']:
+    prompt_template = load_summarize_prompt()
+    engine = SummaryEngine(
+        work_fn=lambda entity: summarize_entity(entity, prompt_template),
+        flush_fn=lambda entity_type, rows: save_entity_summary_rows(entity_type, rows, index_writer)
+    )
+    print(f"⚙️ in-flight {engine.max_in_flight} | flush {engine.flush_size}건 단위 | "
+          f"OpenSearch 색인 {'on' if index_writer else 'off'}")
+    try:
+        stats = engine.run(entities, describe=lambda entity: entity.get("name", ""))
+    finally:
+        # 저장까지 끝난 summary는 조회가 중간에 실패해도 색인
+        if index_writer is not None:
+            index_writer.close()
+    total = stats['total']
+    
+    if scan_stats['unchanged']:
+        print(f"⏭️ description이 바뀌지 않은 엔티티: {scan_stats['unchanged']}개 (건너뜀)")
+    if not total:
         print("⚠️ 요약이 필요한 엔티티가 없습니다.")
         return
     
-    entities = results['results']
-    total = len(entities)
-    print(f"📋 요약이 필요한 엔티티: {total}개")
-    
-    success_count = 0
-    fail_count = 0
-    
-    for i, entity in enumerate(entities, 1):
-        entity_name = entity.get("name", "")
-        entity_type_list = entity.get("entity_type", [])
-        entity_type = entity_type_list[0] if entity_type_list else "UNKNOWN"
-        
-        print(f"\n[{i}/{total}] 📝 {entity_name} ({entity_type})")
-        
-        # description 파싱
-        description_list = entity.get("description", [])
-        if isinstance(description_list, str):
-            try:
-                description_list = json.loads(description_list)
-            except:
-                description_list = [description_list]
-        
-        if not description_list:
-            print("   ⚠️ description이 없습니다. 건너뜀.")
-            continue
-        
-        # 프롬프트 생성
-        prompt_template = load_summarize_prompt()
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        formatted_prompt = prompt_template.format(
-            CURRENT_TIME=current_time,
-            ENTITY_NAME=entity_name,
-            DESCRIPTION_LIST=",".join(description_list)
-        )
-        
-        # LLM 호출
-        try:
-            response = agent(formatted_prompt)
-            parsed = parse_summary_output(response)
-            
-            if not parsed:
-                print("   ❌ 파싱 실패")
-                fail_count += 1
-                continue
-            
-            summary = parsed.get("summary")
-            if not summary:
-                print("   ❌ summary가 없습니다")
-                fail_count += 1
-                continue
-            
-            # Neptune에 summary 저장
-            save_entity_summary(entity_name, summary, entity_type)
-            
-            # Neptune ID 업데이트
-            id_result = update_entity_neptune_id(entity_name, entity_type)
-            
-            if id_result.get("created_new"):
-                print(f"   ✅ 저장 완료 (새 Neptune ID: {id_result.get('neptune_id')})")
-            else:
-                print(f"   ✅ 저장 완료 (기존 Neptune ID: {id_result.get('existing_id')})")
-            
-            success_count += 1
-            
-        except Exception as e:
-            print(f"   ❌ 오류: {e}")
-            fail_count += 1
+    if index_writer is not None:
+        refresh_opensearch_index(get_opensearch_client(), index_name)
     
     # 결과 요약
     print("\n" + "=" * 60)
     print("🎉 Entity Summarization Complete!")
     print("=" * 60)
-    print(f"✅ 성공: {success_count}개")
-    print(f"❌ 실패: {fail_count}개")
+    print_engine_stats(stats)
+    print_summary_path_stats()
+    print_token_stats("Summarization LLM")
+    if index_writer is not None:
+        index_writer.print_stats()
+    print(f"✅ 성공: {stats['saved']}개")
+    print(f"❌ 실패: {stats['failed'] + stats['save_failed']}개")
     print(f"📊 총 처리: {total}개")
     
-    return {"success": success_count, "failed": fail_count, "total": total}
+    return {"success": stats['saved'], "failed": stats['failed'] + stats['save_failed'], "total": total}
 
 
 if __name__ == "__main__":
-    run_entity_summarization()
+    run_entity_summarization(
+        force='--force' in sys.argv[1:],
+        index_to_opensearch='--no-index' not in sys.argv[1:]
+    )
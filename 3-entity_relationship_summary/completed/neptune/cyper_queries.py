@@ -2,8 +2,17 @@
 Neptune Cypher 쿼리 유틸리티
 - 3-entity_relationship_summary에서 사용하는 함수만 포함
 """
-from neptune.neptune_con import execute_cypher
-import json
+from neptune.neptune_con import (
+    execute_cypher,
+    execute_cypher_strict,
+    iter_cypher,
+    NEPTUNE_PAGE_SIZE,
+    DESCRIPTION_STORAGE,
+    DESCRIPTION_STORAGE_MENTIONS
+)
+from neptune.query_templates import register_template
+from utils.parse_utils import parse_description_list
+from utils.summary_fingerprint import description_fingerprint
 
 
 def save_entity_summary(entity_name, summary, entity_type=None):
@@ -25,54 +34,250 @@ def save_entity_summary(entity_name, summary, entity_type=None):
     return execute_cypher(query, entity_name=entity_name, summary=summary)
 
 
-def get_all_entities_for_summary():
-    """Get all entities that need summarization (have description but no summary)."""
+SAVE_ENTITY_SUMMARY_ROWS = register_template('save_entity_summary_rows', """
+    UNWIND $rows AS row
+    MATCH (n:{label} {{name: row.name}})
+    SET n.summary = row.summary,
+        n.summary_src_hash = row.summary_src_hash,
+        n.neptune_id = coalesce(n.neptune_id, row.neptune_id),
+        n.embedded_src_hash = null
+    RETURN n.name AS name, n.neptune_id AS neptune_id
+    """)
+
+
+def save_entity_summaries_batched(label, rows, strict=False):
+    """
+    같은 label 엔티티들의 summary / summary_src_hash / neptune_id를 UNWIND 한 번으로 저장합니다.
+    neptune_id는 기존 값이 있으면 유지합니다 (check + set을 한 쿼리로).
+    summary가 새로 써졌으므로 embedded_src_hash를 지워 재임베딩 대상으로 만듭니다
+    (--force로 description은 그대로인데 summary만 바뀐 경우 summary_src_hash가 같아 건너뛰지 않도록).
+    색인까지 하는 경우 EntitySummaryIndexWriter가 임베딩 후 다시 기록합니다.
+
+    Args:
+        label: 엔티티 label
+        rows: [{'name', 'summary', 'summary_src_hash', 'neptune_id'}]
+        strict: True면 실패 시 예외를 올림
+
+    Returns:
+        dict: results - 저장된 엔티티별 {name, neptune_id}
+
+    Raises:
+        UnknownLabelError: ENTITY_LABELS에 없는 label (호출 전에 is_entity_label로 걸러야 함)
+    """
+    query = SAVE_ENTITY_SUMMARY_ROWS.render(label=label)
+    if strict:
+        return execute_cypher_strict(query, rows=rows)
+    return execute_cypher(query, rows=rows)
+
+
+def _iter_changed(rows, description_key, force=False, stats=None):
+    """
+    description을 리스트로 바꾸고 fingerprint(description_hash)를 붙인 뒤,
+    저장된 summary_src_hash와 다른 항목만 yield합니다 (같으면 이미 같은 입력으로 요약됨).
+    건너뛴 개수는 stats['unchanged']에 누적합니다.
+    """
+    for item in rows:
+        item[description_key] = parse_description_list(item.get(description_key))
+        if not item[description_key]:
+            continue
+        item['description_hash'] = description_fingerprint(item[description_key])
+        if force or item.get('summary_src_hash') != item['description_hash']:
+            yield item
+        elif stats is not None:
+            stats['unchanged'] = stats.get('unchanged', 0) + 1
+
+
+def _collect_results(iterator, force=False):
+    """제너레이터 결과를 기존 execute_cypher 형식({'results', 'unchanged'})으로 모읍니다 (실패 시 None)."""
+    stats = {'unchanged': 0}
+    try:
+        results = list(iterator(force=force, stats=stats))
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+    return {'results': results, 'unchanged': stats['unchanged']}
+
+
+def iter_entities_for_summary(force=False, stats=None, page_size=NEPTUNE_PAGE_SIZE):
+    """
+    요약이 필요한 엔티티를 id 순 페이지로 조회하며 하나씩 yield합니다.
+    description fingerprint가 저장된 summary_src_hash와 다른(새로 생겼거나 description이 바뀐) 엔티티만 반환하고,
+    force=True면 description이 있는 모든 엔티티를 반환합니다.
+    """
+    if DESCRIPTION_STORAGE == DESCRIPTION_STORAGE_MENTIONS:
+        yield from iter_entities_for_summary_from_mentions(force, stats, page_size)
+        return
+
     query = """
     MATCH (n)
-    WHERE n.name IS NOT NULL 
+    WHERE id(n) > $cursor
+      AND n.name IS NOT NULL 
       AND n.description IS NOT NULL 
-      AND (n.summary IS NULL OR n.summary = '')
       AND NOT n:__Chunk__ 
       AND NOT n:MOVIE 
       AND NOT n:REVIEWER
-    RETURN n.name AS name, labels(n) AS entity_type, n.description AS description, n.neptune_id AS neptune_id
+    RETURN id(n) AS node_id, n.name AS name, labels(n) AS entity_type, n.description AS description,
+           n.neptune_id AS neptune_id, n.summary_src_hash AS summary_src_hash
+    ORDER BY node_id
+    LIMIT $limit
     """
-    return execute_cypher(query)
+    yield from _iter_changed(iter_cypher(query, page_size, cursor_key='node_id'), 'description', force, stats)
+
+
+def iter_entities_for_summary_from_mentions(force=False, stats=None, page_size=NEPTUNE_PAGE_SIZE):
+    """
+    DESCRIPTION_STORAGE=mentions용: chunk별 MENTIONS 엣지에 나뉘어 저장된 description을 엔티티별로 모읍니다.
+    엔티티를 먼저 id 순으로 한 페이지만큼 고른 뒤 그 엔티티들의 MENTIONS만 collect합니다.
+    """
+    query = """
+    MATCH (n)
+    WHERE id(n) > $cursor
+      AND n.name IS NOT NULL
+      AND NOT n:__Chunk__
+      AND NOT n:MOVIE
+      AND NOT n:REVIEWER
+    WITH n ORDER BY id(n) LIMIT $limit
+    OPTIONAL MATCH (:__Chunk__)-[m:MENTIONS]->(n)
+    WITH n, collect(m.description) AS description_parts
+    RETURN id(n) AS node_id, n.name AS name, labels(n) AS entity_type, n.neptune_id AS neptune_id,
+           n.summary_src_hash AS summary_src_hash, description_parts
+    ORDER BY node_id
+    """
+
+    def rows():
+        for item in iter_cypher(query, page_size, cursor_key='node_id'):
+            description_list = []
+            for part in item.pop('description_parts', []):
+                description_list.extend(parse_description_list(part))
+            item['description'] = description_list
+            yield item
 
+    yield from _iter_changed(rows(), 'description', force, stats)
 
-def get_all_relationships_for_summary():
-    """Get all relationships that need summarization."""
+
+def iter_relationships_for_summary(force=False, stats=None, page_size=NEPTUNE_PAGE_SIZE):
+    """
+    요약이 필요한 관계를 관계 id 순 페이지로 조회하며 하나씩 yield합니다.
+    엔티티와 같이 description fingerprint가 r.summary_src_hash와 다른 관계만 반환합니다 (force=True면 전부).
+    """
     query = """
     MATCH (s)-[r:RELATIONSHIP]-(t)
     WHERE id(s) < id(t)
+      AND id(r) > $cursor
       AND r.description IS NOT NULL
-      AND (r.summary IS NULL OR r.summary = '')
-    RETURN labels(s) AS source_type, s.name AS source,
+    RETURN id(r) AS rel_id,
+           labels(s) AS source_type, s.name AS source,
            labels(t) AS target_type, t.name AS target,
-           r.description AS description_list, r.strength AS strength
-    """
-    result = execute_cypher(query)
-    
-    # Parse description_list from JSON string to list
-    if result and 'results' in result:
-        for item in result['results']:
-            desc = item.get('description_list', '[]')
-            if isinstance(desc, str):
-                try:
-                    item['description_list'] = json.loads(desc)
-                except:
-                    item['description_list'] = [desc]
-    
-    return result
-
-
-def save_relationship_summary(source_entity, target_entity, summary, source_type=None, target_type=None):
-    """Save relationship summary to Neptune graph."""
+           r.description AS description_list, r.strength AS strength,
+           r.summary_src_hash AS summary_src_hash
+    ORDER BY rel_id
+    LIMIT $limit
+    """
+    yield from _iter_changed(iter_cypher(query, page_size, cursor_key='rel_id'), 'description_list', force, stats)
+
+
+def get_all_entities_for_summary(force=False):
+    """Get all entities that need summarization (iter_entities_for_summary 결과를 한 번에 반환)."""
+    return _collect_results(iter_entities_for_summary, force)
+
+
+def get_all_entities_for_summary_from_mentions(force=False):
+    """DESCRIPTION_STORAGE=mentions용 get_all_entities_for_summary"""
+    return _collect_results(iter_entities_for_summary_from_mentions, force)
+
+
+def get_all_relationships_for_summary(force=False):
+    """Get all relationships that need summarization (iter_relationships_for_summary 결과를 한 번에 반환)."""
+    return _collect_results(iter_relationships_for_summary, force)
+
+
+def save_relationship_summary(source_entity, target_entity, summary, source_type=None, target_type=None,
+                              summary_src_hash=None):
+    """Save relationship summary (and the fingerprint of the descriptions it was built from) to Neptune graph."""
     query = """
     MATCH (s)-[r:RELATIONSHIP]-(t)
     WHERE (s.name = $source_entity AND t.name = $target_entity) 
        OR (s.name = $target_entity AND t.name = $source_entity)
-    SET r.summary = $summary
+    SET r.summary = $summary,
+        r.summary_src_hash = $summary_src_hash
     RETURN s.name AS source, t.name AS target, r.summary AS summary
     """
-    return execute_cypher(query, source_entity=source_entity, target_entity=target_entity, summary=summary)
+    return execute_cypher(query, source_entity=source_entity, target_entity=target_entity, summary=summary,
+                          summary_src_hash=summary_src_hash)
+
+
+SAVE_RELATIONSHIP_SUMMARY_ROWS = register_template('save_relationship_summary_rows', """
+    UNWIND $rows AS row
+    MATCH (s:{source_label} {{name: row.source}})-[r:RELATIONSHIP]-(t:{target_label} {{name: row.target}})
+    WHERE id(r) = row.rel_id
+    SET r.summary = row.summary,
+        r.summary_src_hash = row.summary_src_hash
+    RETURN DISTINCT row.rel_id AS rel_id, row.source AS source, row.target AS target
+    """)
+
+
+def save_relationship_summaries_batched(source_label, target_label, rows, strict=False):
+    """
+    같은 label 쌍 관계들의 summary / summary_src_hash를 UNWIND 한 번으로 저장합니다.
+    양 끝점을 label + name으로 고정해서 찾으므로 label 인덱스를 사용하고,
+    이름만 같은 다른 타입의 엔티티 관계를 잘못 갱신하지 않습니다.
+    같은 두 엔티티 사이의 병렬 관계는 각자 다른 description으로 요약되므로,
+    조회 때 받은 관계 id(rel_id)로 요약한 그 관계에만 씁니다.
+
+    Args:
+        source_label, target_label: 양 끝점 label
+        rows: [{'rel_id', 'source', 'target', 'summary', 'summary_src_hash'}]
+        strict: True면 실패 시 예외를 올림
+
+    Returns:
+        dict: results - 저장된 관계별 {rel_id, source, target}
+
+    Raises:
+        UnknownLabelError: ENTITY_LABELS에 없는 label
+    """
+    query = SAVE_RELATIONSHIP_SUMMARY_ROWS.render(source_label=source_label, target_label=target_label)
+    if strict:
+        return execute_cypher_strict(query, rows=rows)
+    return execute_cypher(query, rows=rows)
+
+
+def get_entities_to_embed(force=False):
+    """
+    OpenSearch 재임베딩이 필요한 요약 엔티티 조회.
+    마지막으로 임베딩한 summary의 fingerprint(embedded_src_hash)가 현재 summary_src_hash와 다른 엔티티만 반환합니다.
+    summary를 다시 저장하면 embedded_src_hash가 지워지므로 (save_entity_summaries_batched) 새 summary도 포함됩니다.
+    """
+    query = f"""
+    MATCH (n)
+    WHERE n.name IS NOT NULL 
+      AND n.summary IS NOT NULL 
+      AND NOT n:__Chunk__
+      {"" if force else "AND (n.embedded_src_hash IS NULL OR n.embedded_src_hash <> coalesce(n.summary_src_hash, ''))"}
+    RETURN n.name AS name, labels(n) AS entity_type, n.summary AS summary, n.neptune_id AS neptune_id,
+           coalesce(n.summary_src_hash, '') AS summary_src_hash
+    ORDER BY n.name
+    """
+    return execute_cypher(query)
+
+
+MARK_ENTITIES_EMBEDDED = register_template('mark_entities_embedded', """
+    UNWIND $rows AS row
+    MATCH (n:{label} {{name: row.name}})
+    SET n.embedded_src_hash = row.summary_src_hash
+    RETURN count(n) AS marked
+    """)
+
+
+def mark_entities_embedded(label, rows):
+    """
+    임베딩이 끝난 엔티티에 embedded_src_hash를 기록합니다 (label별 UNWIND 배치).
+
+    Args:
+        label: 엔티티 label
+        rows: [{'name', 'summary_src_hash'}] - 임베딩할 때 읽은 summary_src_hash
+
+    Raises:
+        UnknownLabelError: ENTITY_LABELS에 없는 label
+    """
+    query = MARK_ENTITIES_EMBEDDED.render(label=label)
+    return execute_cypher(query, rows=rows)
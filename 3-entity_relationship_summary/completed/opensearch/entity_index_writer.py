@@ -0,0 +1,141 @@
+"""
+엔티티 summary 임베딩/색인 write-behind 큐
+- 요약 엔진이 Neptune에 저장한 summary를 큐에 넣으면, 별도 consumer 스레드가 배치 단위로 처리
+  1. msearch 한 번으로 배치의 OpenSearch 문서 ID 조회 (엔티티별 search 왕복 제거)
+  2. summary 임베딩 (동시 호출)
+  3. helpers.bulk update로 summary / summary_vec / neptune_id 반영
+  4. 반영된 엔티티에 embedded_src_hash 기록 (label별 UNWIND, entity_to_opensearch 재실행 시 건너뜀)
+- 큐 크기가 제한되어 있어 임베딩이 밀리면 enqueue가 대기 (backpressure)
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from opensearchpy import helpers
+
+from neptune.cyper_queries import mark_entities_embedded
+from opensearch.opensearch_con import get_opensearch_client
+from opensearch.opensearch_search import lookup_entity_doc_ids
+from utils.bedrock_embedding import BedrockEmbedding
+
+ENTITY_INDEX_NAME = "entities"
+BATCH_SIZE = 32
+MAX_QUEUE_SIZE = 256
+EMBED_WORKERS = 8
+EMBEDDING_DIMENSION = 1024
+# 배치가 다 차지 않아도 이 시간(초) 동안 새 summary가 없으면 모인 만큼 색인
+FLUSH_INTERVAL = 1.0
+
+
+class EntitySummaryIndexWriter:
+    """
+    entities 인덱스의 summary / summary_vec 업데이트용 write-behind writer.
+    enqueue되는 row: {'label', 'name', 'summary', 'neptune_id', 'summary_src_hash'}
+    """
+
+    def __init__(self, index_name: str = ENTITY_INDEX_NAME, batch_size: int = BATCH_SIZE,
+                 max_queue_size: int = MAX_QUEUE_SIZE, embed_workers: int = EMBED_WORKERS):
+        self.index_name = index_name
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._stopped = threading.Event()
+        self.stats = {'enqueued': 0, 'updated': 0, 'not_found': 0, 'failed': 0, 'batches': 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._consume, name="entity-index-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def enqueue(self, row: dict):
+        """summary를 색인 큐에 넣습니다. 큐가 가득 차면 자리가 날 때까지 대기합니다."""
+        self.start()
+        self.stats['enqueued'] += 1
+        self._queue.put(row)
+
+    def flush(self):
+        """지금까지 enqueue된 summary가 모두 색인(또는 실패 처리)될 때까지 대기합니다."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._stopped.set()
+
+    def _consume(self):
+        with ThreadPoolExecutor(max_workers=self.embed_workers) as executor:
+            while not self._stopped.is_set():
+                try:
+                    batch = [self._queue.get(timeout=FLUSH_INTERVAL)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._index_batch(batch, executor)
+                except Exception as e:
+                    self.stats['failed'] += len(batch)
+                    print(f"   ❌ 엔티티 배치 색인 오류 ({len(batch)}개): {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+    def _index_batch(self, batch: list, executor: ThreadPoolExecutor):
+        client = get_opensearch_client()
+        doc_ids = lookup_entity_doc_ids(client, self.index_name, [(row['name'], row['label']) for row in batch])
+
+        found = [(row, doc_id) for row, doc_id in zip(batch, doc_ids) if doc_id]
+        self.stats['not_found'] += len(batch) - len(found)
+        if not found:
+            return
+
+        embedder = BedrockEmbedding()
+        vectors = list(executor.map(embedder.embed_text, [row['summary'] for row, _ in found]))
+
+        actions, indexed = [], []
+        for (row, doc_id), summary_vec in zip(found, vectors):
+            if not isinstance(summary_vec, list) or len(summary_vec) != EMBEDDING_DIMENSION:
+                self.stats['failed'] += 1
+                print(f"   ❌ 벡터 오류: {row['name']}")
+                continue
+            actions.append({
+                "_op_type": "update",
+                "_index": self.index_name,
+                "_id": doc_id,
+                "doc": {
+                    "entity": {
+                        "summary": row['summary'],
+                        "summary_vec": summary_vec,
+                        "neptune_id": row['neptune_id']
+                    }
+                }
+            })
+            indexed.append((doc_id, row))
+
+        success, errors = helpers.bulk(client, actions, raise_on_error=False, refresh=False)
+        self.stats['updated'] += success
+        self.stats['failed'] += len(errors)
+        self.stats['batches'] += 1
+        print(f"   📦 Entities bulk updated: {success}/{len(batch)}")
+        for error in errors[:3]:
+            print(f"   ❌ 엔티티 색인 실패: {error}")
+
+        failed_ids = {next(iter(error.values()), {}).get('_id') for error in errors}
+        embedded_rows = {}
+        for doc_id, row in indexed:
+            if doc_id not in failed_ids:
+                embedded_rows.setdefault(row['label'], []).append(
+                    {'name': row['name'], 'summary_src_hash': row.get('summary_src_hash') or ''}
+                )
+        for label, rows in embedded_rows.items():
+            mark_entities_embedded(label, rows)
+
+    def print_stats(self):
+        s = self.stats
+        print(f"📦 Entity index: 업데이트 {s['updated']} / 요청 {s['enqueued']} "
+              f"(문서 없음 {s['not_found']}, 실패 {s['failed']}, batches {s['batches']})")
@@ -47,3 +47,54 @@ def refresh_opensearch_index(opensearch_client, index_name: str):
         print("🔄 인덱스 refresh 완료")
     except Exception as e:
         print(f"⚠️ 인덱스 refresh 실패: {e}")
+
+
+def build_entity_lookup_query(entity_name: str, entity_type: str) -> dict:
+    """entity.name + entity_type으로 엔티티 문서를 찾는 쿼리 (이름 exact match 우선)"""
+    return {
+        "query": {
+            "bool": {
+                "must": [
+                    {
+                        "bool": {
+                            "should": [
+                                {"term": {"entity.name.keyword": {"value": entity_name, "boost": 3.0}}},
+                                {"match": {"entity.name": {"query": entity_name, "operator": "and", "boost": 2.0}}}
+                            ]
+                        }
+                    },
+                    {"term": {"entity.entity_type": entity_type}}
+                ]
+            }
+        },
+        "size": 1,
+        "min_score": 3.4,
+        "_source": ["entity.name"]
+    }
+
+
+def lookup_entity_doc_ids(opensearch_client, index_name: str, entities: list) -> list:
+    """
+    (name, entity_type) 리스트의 문서 ID를 msearch 한 번으로 조회합니다.
+    이름이 정확히 일치하는 문서만 인정하고, 없으면 None.
+
+    Returns:
+        list: entities와 같은 순서의 doc_id (또는 None)
+    """
+    if not entities:
+        return []
+    body = []
+    for entity_name, entity_type in entities:
+        body.append({"index": index_name})
+        body.append(build_entity_lookup_query(entity_name, entity_type))
+    responses = opensearch_client.msearch(body=body).get('responses', [])
+
+    doc_ids = []
+    for (entity_name, _), response in zip(entities, responses):
+        doc_id = None
+        for hit in response.get('hits', {}).get('hits', []):
+            if hit['_source'].get('entity', {}).get('name') == entity_name:
+                doc_id = hit['_id']
+                break
+        doc_ids.append(doc_id)
+    return doc_ids
@@ -1,15 +1,18 @@
 """
 2단계: Relationship Summarization
-- Neptune에서 요약이 필요한 관계 조회
-- LLM으로 description들을 요약
-- Neptune에 relationship summary 저장
+- Neptune에서 요약이 필요한 관계 조회 (description fingerprint가 summary_src_hash와 다른 관계만, --force면 전부)
+- LLM으로 description들을 요약 (SummaryEngine으로 동시 실행, in-flight / 초당 호출 수 제한)
+  짧은 description 1~2개뿐인 관계는 LLM 없이 summary 생성
+- Neptune에 relationship summary를 (source label, target label)별 UNWIND 배치로 저장
 """
-from datetime import datetime
-from utils.generate_entity import get_bedrock_agent
-from utils.parse_utils import parse_summary_output
+import sys
+from utils.bedrock_pool import print_token_stats
+from utils.summarizer import summarize_descriptions, print_summary_path_stats
+from utils.summary_engine import SummaryEngine, print_engine_stats
+from neptune.query_templates import is_entity_label
 from neptune.cyper_queries import (
-    get_all_relationships_for_summary,
-    save_relationship_summary
+    iter_relationships_for_summary,
+    save_relationship_summaries_batched
 )
 
 
@@ -19,94 +22,94 @@ def load_summarize_prompt():
         return f.read()
 
 
-def run_relationship_summarization():
+def summarize_relationship(rel, prompt_template):
+    """
+    관계 하나를 요약합니다 (작업 스레드에서 실행).
+
+    Returns:
+        tuple: ((source_type, target_type), {'rel_id', 'source', 'target', 'summary', 'summary_src_hash'})
+               - description이 없거나 끝점 label이 ENTITY_LABELS에 없으면 None
+
+    Raises:
+        ValueError: LLM 응답 파싱 실패 / summary 없음
+    """
+    source = rel.get("source", "")
+    target = rel.get("target", "")
+    source_type_list = rel.get("source_type", [])
+    target_type_list = rel.get("target_type", [])
+    source_type = source_type_list[0] if source_type_list else "UNKNOWN"
+    target_type = target_type_list[0] if target_type_list else "UNKNOWN"
+    if not (is_entity_label(source_type) and is_entity_label(target_type)):
+        print(f"   ⚠️ {source} ({source_type}) → {target} ({target_type}): 허용되지 않은 label. 건너뜀.")
+        return None
+
+    description_list = rel.get("description_list", [])
+    if not description_list:
+        print(f"   ⚠️ {source} → {target}: description이 없습니다. 건너뜀.")
+        return None
+
+    summary = summarize_descriptions(f"{source} - {target}", description_list, prompt_template)
+
+    print(f"   🔗 {source} ({source_type}) → {target} ({target_type})")
+    return (source_type, target_type), {
+        'rel_id': rel.get("rel_id"),
+        'source': source,
+        'target': target,
+        'summary': summary,
+        'summary_src_hash': rel.get("description_hash")
+    }
+
+
+def save_relationship_summary_rows(labels, rows):
+    """label 쌍별 summary 배치를 저장하고 저장된 개수를 반환 (SummaryEngine flush 함수)"""
+    source_label, target_label = labels
+    result = save_relationship_summaries_batched(source_label, target_label, rows, strict=True)
+    return len(result.get('results', []))
+
+
+def run_relationship_summarization(force=False):
     """
     Relationship Summarization 실행
-    1. Neptune에서 요약이 필요한 관계 조회
-    2. LLM으로 description 요약
-    3. Neptune에 relationship summary 저장
+    1. Neptune에서 요약이 필요한 관계 조회 (force=True면 description이 바뀌지 않은 관계도 다시 요약)
+    2. LLM으로 description 요약 (동시 실행)
+    3. Neptune에 relationship summary 배치 저장
     """
     print("=" * 60)
     print("🚀 Relationship Summarization Start")
     print("=" * 60)
     
-    # Bedrock Agent 초기화
-    agent = get_bedrock_agent()
+    # Neptune에서 요약이 필요한 관계를 페이지 단위로 조회하며 바로 요약 (전체 목록을 미리 받지 않음)
+    scan_stats = {'unchanged': 0}
+    relationships = iter_relationships_for_summary(force=force, stats=scan_stats)
     
-    # Neptune에서 요약이 필요한 관계 조회
-    results = get_all_relationships_for_summary()
+    prompt_template = load_summarize_prompt()
+    engine = SummaryEngine(
+        work_fn=lambda rel: summarize_relationship(rel, prompt_template),
+        flush_fn=save_relationship_summary_rows
+    )
+    print(f"⚙️ in-flight {engine.max_in_flight} | flush {engine.flush_size}건 단위")
+    stats = engine.run(relationships, describe=lambda rel: f"{rel.get('source', '')} → {rel.get('target', '')}")
+    total = stats['total']
     
-    if not results or 'results' not in results or not results['results']:
+    if scan_stats['unchanged']:
+        print(f"⏭️ description이 바뀌지 않은 관계: {scan_stats['unchanged']}개 (건너뜀)")
+    if not total:
         print("⚠️ 요약이 필요한 관계가 없습니다.")
         return
     
-    relationships = results['results']
-    total = len(relationships)
-    print(f"📋 요약이 필요한 관계: {total}개")
-    
-    success_count = 0
-    fail_count = 0
-    
-    for i, rel in enumerate(relationships, 1):
-        source = rel.get("source", "")
-        target = rel.get("target", "")
-        source_type_list = rel.get("source_type", [])
-        target_type_list = rel.get("target_type", [])
-        source_type = source_type_list[0] if source_type_list else "UNKNOWN"
-        target_type = target_type_list[0] if target_type_list else "UNKNOWN"
-        
-        print(f"\n[{i}/{total}] 🔗 {source} ({source_type}) → {target} ({target_type})")
-        
-        # description_list 가져오기
-        description_list = rel.get("description_list", [])
-        if not description_list:
-            print("   ⚠️ description이 없습니다. 건너뜀.")
-            continue
-        
-        # 프롬프트 생성
-        prompt_template = load_summarize_prompt()
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        formatted_prompt = prompt_template.format(
-            CURRENT_TIME=current_time,
-            ENTITY_NAME=f"{source} - {target}",
-            DESCRIPTION_LIST=",".join(description_list)
-        )
-        
-        # LLM 호출
-        try:
-            response = agent(formatted_prompt)
-            parsed = parse_summary_output(response)
-            
-            if not parsed:
-                print("   ❌ 파싱 실패")
-                fail_count += 1
-                continue
-            
-            summary = parsed.get("summary")
-            if not summary:
-                print("   ❌ summary가 없습니다")
-                fail_count += 1
-                continue
-            
-            # Neptune에 relationship summary 저장
-            result = save_relationship_summary(source, target, summary, source_type, target_type)
-            print(f"   ✅ 저장 완료")
-            success_count += 1
-            
-        except Exception as e:
-            print(f"   ❌ 오류: {e}")
-            fail_count += 1
-    
     # 결과 요약
     print("\n" + "=" * 60)
     print("🎉 Relationship Summarization Complete!")
     print("=" * 60)
-    print(f"✅ 성공: {success_count}개")
-    print(f"❌ 실패: {fail_count}개")
+    print_engine_stats(stats)
+    print_summary_path_stats()
+    print_token_stats("Summarization LLM")
+    print(f"✅ 성공: {stats['saved']}개")
+    print(f"❌ 실패: {stats['failed'] + stats['save_failed']}개")
     print(f"📊 총 처리: {total}개")
     
-    return {"success": success_count, "failed": fail_count, "total": total}
+    return {"success": stats['saved'], "failed": stats['failed'] + stats['save_failed'], "total": total}
 
 
 if __name__ == "__main__":
-    run_relationship_summarization()
+    run_relationship_summarization(force='--force' in sys.argv[1:])
@@ -0,0 +1,62 @@
+"""
+utils.summarizer 파티션 / map-reduce 종료 테스트
+
+Usage:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# utils.summarizer → utils.generate_entity → strands / boto3
+pytest.importorskip("boto3")
+pytest.importorskip("strands")
+
+from utils import summarizer
+
+
+PROMPT_TEMPLATE = "{CURRENT_TIME} {ENTITY_NAME} {DESCRIPTION_LIST}"
+
+
+@pytest.mark.parametrize("max_prompt_tokens", [6000, 101, 100, 20, 3])
+def test_partition_packs_two_descriptions_per_partition(monkeypatch, max_prompt_tokens):
+    monkeypatch.setattr(summarizer, "SUMMARY_MAX_PROMPT_TOKENS", max_prompt_tokens)
+    descriptions = ["가" * 50000 for _ in range(7)]
+
+    partitions = summarizer.partition_descriptions(descriptions, PROMPT_TEMPLATE)
+
+    assert sum(len(p) for p in partitions) == len(descriptions)
+    assert all(len(p) >= 2 for p in partitions[:-1])
+    assert len(partitions) <= (len(descriptions) + 1) // 2
+
+
+def test_partition_two_clipped_descriptions_fit_budget(monkeypatch):
+    monkeypatch.setattr(summarizer, "SUMMARY_MAX_PROMPT_TOKENS", 6000)
+    budget = 6000 - summarizer.estimate_tokens(PROMPT_TEMPLATE)
+
+    partitions = summarizer.partition_descriptions(["가" * 50000, "나" * 50000], PROMPT_TEMPLATE)
+
+    assert len(partitions) == 1
+    assert sum(summarizer.estimate_tokens(d) + 1 for d in partitions[0]) <= budget
+
+
+def test_map_reduce_terminates_with_long_partial_summaries(monkeypatch):
+    monkeypatch.setattr(summarizer, "SUMMARY_MAX_PROMPT_TOKENS", 200)
+    calls = []
+
+    def fake_summarize_once(name, description_list, prompt_template):
+        calls.append(len(description_list))
+        if len(calls) > 100:
+            raise AssertionError("map-reduce가 끝나지 않음")
+        return "요약" * 10000  # 항상 예산을 넘는 부분 summary
+
+    monkeypatch.setattr(summarizer, "_summarize_once", fake_summarize_once)
+    partitions = summarizer.partition_descriptions(["설명" * 5000 for _ in range(16)], PROMPT_TEMPLATE)
+
+    summary = summarizer._map_reduce("코브", partitions, PROMPT_TEMPLATE)
+
+    assert summary
+    assert calls[-1] >= 1
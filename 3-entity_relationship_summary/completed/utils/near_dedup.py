@@ -0,0 +1,102 @@
+"""
+near-duplicate description 제거
+- 같은 리뷰어의 여러 chunk에서 거의 같은 문장으로 반복 추출된 description을 요약 프롬프트 전에 하나로 합침
+- 1차: 정규화 텍스트(소문자, 문장부호/공백 제거) 해시가 같으면 중복
+- 2차: 문자 3-gram MinHash + LSH banding으로 후보를 찾고, 추정 Jaccard 유사도가 임계값 이상이면 중복
+- 중복 묶음에서는 가장 긴 description을 남김 (정보 손실 최소화), 순서는 처음 등장 위치 기준
+- 외부 라이브러리 없이 동작 (엔티티당 수백 개 수준)
+"""
+import os
+import re
+import zlib
+
+NEAR_DUP_THRESHOLD = float(os.environ.get('NEAR_DUP_THRESHOLD', '0.8'))
+SHINGLE_SIZE = 3
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# 고정 seed의 (a, b) 계수 - 실행마다 같은 signature
+_PERMUTATIONS = [
+    (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode()))
+    for i in range(NUM_PERM)
+]
+_NORMALIZE_PATTERN = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """비교용 정규화: 소문자 + 문장부호/공백 제거"""
+    return _NORMALIZE_PATTERN.sub('', str(text).casefold())
+
+
+def _shingles(normalized: str) -> set:
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(normalized: str) -> tuple:
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in _shingles(normalized)]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(signature_a: tuple, signature_b: tuple) -> float:
+    """두 MinHash signature의 추정 Jaccard 유사도"""
+    return sum(1 for x, y in zip(signature_a, signature_b) if x == y) / NUM_PERM
+
+
+def collapse_near_duplicates(description_list, threshold: float = NEAR_DUP_THRESHOLD) -> list:
+    """
+    거의 같은 description을 하나로 합친 리스트를 반환합니다.
+
+    Args:
+        description_list: description 문자열 리스트
+        threshold: 이 값 이상의 추정 Jaccard 유사도면 중복으로 처리
+
+    Returns:
+        list: 남은 description (처음 등장 순서)
+    """
+    kept = []          # 묶음별 대표 description
+    by_normalized = {}  # 정규화 텍스트 → kept index
+    signatures = []    # kept index → signature
+    buckets = {}       # (band, band hash) → [kept index]
+
+    for description in description_list:
+        normalized = normalize_text(description)
+        if not normalized:
+            continue
+
+        match = by_normalized.get(normalized)
+        signature = None
+        if match is None:
+            signature = minhash_signature(normalized)
+            candidates = set()
+            for band in range(NUM_BANDS):
+                key = (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+                candidates.update(buckets.get(key, ()))
+            for idx in sorted(candidates):
+                if estimate_similarity(signature, signatures[idx]) >= threshold:
+                    match = idx
+                    break
+
+        if match is not None:
+            # 더 긴 쪽을 대표로 (중복 묶음의 정보를 최대한 유지)
+            if len(description) > len(kept[match]):
+                kept[match] = description
+            by_normalized[normalized] = match
+            continue
+
+        idx = len(kept)
+        kept.append(description)
+        by_normalized[normalized] = idx
+        signatures.append(signature)
+        for band in range(NUM_BANDS):
+            key = (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+            buckets.setdefault(key, []).append(idx)
+
+    return kept
@@ -41,6 +41,19 @@ def parse_summary_output(output):
         return None
 
 
+def parse_description_list(description_list):
+    """
+    Neptune에서 읽은 description(JSON 문자열 또는 리스트)을 리스트로 변환합니다.
+    """
+    if isinstance(description_list, str):
+        try:
+            parsed = json.loads(description_list)
+        except json.JSONDecodeError:
+            return [description_list]
+        return parsed if isinstance(parsed, list) else [parsed]
+    return description_list or []
+
+
 def parse_extraction_output(output_str, record_delimiter=None, tuple_delimiter=None):
     """
     Parse a structured output string containing "entity", "relationship" records into separate lists.
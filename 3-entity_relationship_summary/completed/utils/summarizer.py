@@ -0,0 +1,238 @@
+"""
+description 리스트 요약
+- 엔티티/관계 요약이 공통으로 사용하는 요약 함수
+- 프롬프트 전에 거의 같은 description을 하나로 합침 (utils.near_dedup) → 절약된 입력 토큰을 엔티티별로 출력
+- fast path: 중복 제거 후 description이 적고 짧으면 LLM 없이 이어 붙여 summary로 사용
+- 그 외에는 summarization.md 프롬프트로 LLM 호출 (대화 기록 없는 단발 호출)
+- description이 프롬프트 예산(SUMMARY_MAX_PROMPT_TOKENS)을 넘으면 map-reduce:
+  예산 안에 들어가도록 나눈 파티션을 병렬로 요약(map)하고, 부분 summary들을 다시 요약(reduce)
+  → 프롬프트 크기에 상한이 있고, mention 수가 늘어도 지연 시간은 단계 수(log)만큼만 증가
+- 경로(fast / llm / map_reduce)별 호출 수와 지연 시간 분포를 집계
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.generate_entity import call_llm
+from utils.near_dedup import collapse_near_duplicates
+from utils.parse_utils import parse_summary_output
+
+# fast path 조건: 중복 제거 후 description 수와 전체 글자 수가 모두 이하일 때
+FAST_PATH_MAX_DESCRIPTIONS = int(os.environ.get('FAST_PATH_MAX_DESCRIPTIONS', '2'))
+FAST_PATH_MAX_CHARS = int(os.environ.get('FAST_PATH_MAX_CHARS', '300'))
+
+# 프롬프트 1개의 토큰 상한 (템플릿 포함) / 한국어·영어 혼합 텍스트 기준 토큰당 글자 수 추정치
+SUMMARY_MAX_PROMPT_TOKENS = int(os.environ.get('SUMMARY_MAX_PROMPT_TOKENS', '6000'))
+CHARS_PER_TOKEN = 2
+# map 단계에서 한 엔티티의 파티션을 동시에 요약하는 스레드 수
+MAP_MAX_WORKERS = int(os.environ.get('SUMMARY_MAP_MAX_WORKERS', '4'))
+
+PATH_FAST = 'fast'
+PATH_LLM = 'llm'
+PATH_MAP_REDUCE = 'map_reduce'
+
+_latencies = {PATH_FAST: [], PATH_LLM: [], PATH_MAP_REDUCE: []}
+_latencies_lock = threading.Lock()
+_dedup_stats = {'items': 0, 'collapsed_items': 0, 'descriptions_before': 0, 'descriptions_after': 0,
+                'tokens_before': 0, 'tokens_after': 0}
+_map_executor = None
+_map_executor_lock = threading.Lock()
+
+
+def dedupe_descriptions(description_list) -> list:
+    """앞뒤 공백을 정리하고 같은 description(대소문자 무시)은 처음 것만 남깁니다 (순서 유지)."""
+    seen = set()
+    deduped = []
+    for description in description_list:
+        text = str(description).strip()
+        key = text.casefold()
+        if text and key not in seen:
+            seen.add(key)
+            deduped.append(text)
+    return deduped
+
+
+def fast_summary(description_list):
+    """
+    LLM 없이 만들 수 있는 summary를 반환합니다 (조건을 넘으면 None).
+    """
+    if len(description_list) > FAST_PATH_MAX_DESCRIPTIONS:
+        return None
+    if sum(len(d) for d in description_list) > FAST_PATH_MAX_CHARS:
+        return None
+    return " ".join(description_list)
+
+
+def _record_latency(path: str, started: float):
+    with _latencies_lock:
+        _latencies[path].append(time.perf_counter() - started)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def partition_descriptions(description_list, prompt_template: str) -> list:
+    """
+    description들을 프롬프트 예산 안에 들어가는 파티션으로 순서대로 나눕니다.
+    description 하나는 (추정 토큰 + 구분자)가 예산의 절반 이하가 되도록 잘라서 2개가 한 파티션에 들어가고,
+    예산이 아주 작아도 마지막 파티션 외에는 최소 2개씩 채웁니다
+    (파티션 수 <= ceil(항목 수 / 2) → reduce 단계마다 항목 수가 줄어 반드시 끝남).
+    """
+    budget = max(SUMMARY_MAX_PROMPT_TOKENS - estimate_tokens(prompt_template), 2)
+    # estimate_tokens의 +1과 구분자 1토큰을 빼야 2개 합이 budget을 넘지 않음
+    max_chars = max(budget // 2 - 2, 1) * CHARS_PER_TOKEN
+
+    partitions, current, used = [], [], 0
+    for description in description_list:
+        description = description[:max_chars]
+        tokens = estimate_tokens(description) + 1  # 구분자 ","
+        if len(current) >= 2 and used + tokens > budget:
+            partitions.append(current)
+            current, used = [], 0
+        current.append(description)
+        used += tokens
+    if current:
+        partitions.append(current)
+    return partitions
+
+
+def collapse_descriptions(name: str, description_list) -> list:
+    """
+    exact / near-duplicate description을 합치고, 줄어든 개수와 절약된 토큰(추정)을 기록합니다.
+    """
+    before = [str(d) for d in description_list]
+    after = collapse_near_duplicates(dedupe_descriptions(before))
+
+    tokens_before = sum(estimate_tokens(d) for d in before)
+    tokens_after = sum(estimate_tokens(d) for d in after)
+    with _latencies_lock:
+        _dedup_stats['items'] += 1
+        _dedup_stats['collapsed_items'] += len(after) < len(before)
+        _dedup_stats['descriptions_before'] += len(before)
+        _dedup_stats['descriptions_after'] += len(after)
+        _dedup_stats['tokens_before'] += tokens_before
+        _dedup_stats['tokens_after'] += tokens_after
+    if len(after) < len(before):
+        print(f"   🧹 {name}: description {len(before)} → {len(after)} "
+              f"(입력 토큰 약 {tokens_before - tokens_after:,} 절약)")
+    return after
+
+
+def _get_map_executor() -> ThreadPoolExecutor:
+    global _map_executor
+    if _map_executor is None:
+        with _map_executor_lock:
+            if _map_executor is None:
+                _map_executor = ThreadPoolExecutor(max_workers=MAP_MAX_WORKERS, thread_name_prefix="summary-map")
+    return _map_executor
+
+
+def _summarize_once(name: str, description_list, prompt_template: str) -> str:
+    """프롬프트 1개로 요약 (예산 안에 들어가는 description 리스트)"""
+    formatted_prompt = prompt_template.format(
+        CURRENT_TIME=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        ENTITY_NAME=name,
+        DESCRIPTION_LIST=",".join(description_list)
+    )
+    response = call_llm(formatted_prompt)
+    parsed = parse_summary_output(response)
+    if not parsed:
+        raise ValueError("파싱 실패")
+    summary = parsed.get("summary")
+    if not summary:
+        raise ValueError("summary가 없습니다")
+    return summary
+
+
+def _map_reduce(name: str, partitions: list, prompt_template: str) -> str:
+    """파티션별 부분 summary를 병렬로 만들고, 한 프롬프트에 들어갈 때까지 다시 나눠 요약합니다."""
+    while len(partitions) > 1:
+        partials = list(_get_map_executor().map(
+            lambda partition: _summarize_once(name, partition, prompt_template), partitions
+        ))
+        partitions = partition_descriptions(partials, prompt_template)
+    return _summarize_once(name, partitions[0], prompt_template)
+
+
+def summarize_descriptions(name: str, description_list, prompt_template: str) -> str:
+    """
+    description 리스트를 summary 문자열로 만듭니다.
+
+    Args:
+        name: 프롬프트의 ENTITY_NAME (관계는 "source - target")
+        description_list: description 리스트
+        prompt_template: summarization.md 내용
+
+    Raises:
+        ValueError: LLM 응답 파싱 실패 / summary 없음
+    """
+    started = time.perf_counter()
+    description_list = collapse_descriptions(name, description_list)
+
+    summary = fast_summary(description_list)
+    if summary is not None:
+        _record_latency(PATH_FAST, started)
+        return summary
+
+    partitions = partition_descriptions(description_list, prompt_template)
+    if len(partitions) == 1:
+        summary = _summarize_once(name, partitions[0], prompt_template)
+        _record_latency(PATH_LLM, started)
+    else:
+        summary = _map_reduce(name, partitions, prompt_template)
+        _record_latency(PATH_MAP_REDUCE, started)
+    return summary
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def get_summary_path_stats() -> dict:
+    """경로별 호출 수와 지연 시간(초) p50 / p90 / p99 / max"""
+    stats = {}
+    with _latencies_lock:
+        snapshot = {path: sorted(values) for path, values in _latencies.items()}
+    for path, values in snapshot.items():
+        stats[path] = {'count': len(values)}
+        if values:
+            stats[path].update({
+                'p50': _percentile(values, 0.50),
+                'p90': _percentile(values, 0.90),
+                'p99': _percentile(values, 0.99),
+                'max': values[-1]
+            })
+    return stats
+
+
+def get_dedup_stats() -> dict:
+    with _latencies_lock:
+        return dict(_dedup_stats)
+
+
+def reset_summary_path_stats():
+    with _latencies_lock:
+        for values in _latencies.values():
+            values.clear()
+        for key in _dedup_stats:
+            _dedup_stats[key] = 0
+
+
+def print_summary_path_stats():
+    stats = get_summary_path_stats()
+    total = sum(s['count'] for s in stats.values())
+    if not total:
+        return
+    dedup = get_dedup_stats()
+    print(f"🧹 Description dedup: {dedup['descriptions_before']:,} → {dedup['descriptions_after']:,}개 "
+          f"({dedup['collapsed_items']}/{dedup['items']}건에서 중복 제거, "
+          f"입력 토큰 약 {dedup['tokens_before'] - dedup['tokens_after']:,} 절약)")
+    saved = stats[PATH_FAST]['count']
+    print(f"⚡ Fast path: {saved}/{total}건 LLM 호출 생략 ({saved / total * 100:.1f}%)")
+    for path, s in stats.items():
+        if s['count']:
+            print(f"   {path:<10} {s['count']:>6}건 | p50 {s['p50'] * 1000:,.0f}ms | p90 {s['p90'] * 1000:,.0f}ms | "
+                  f"p99 {s['p99'] * 1000:,.0f}ms | max {s['max'] * 1000:,.0f}ms")
@@ -0,0 +1,144 @@
+"""
+동시 요약 엔진
+- 요약 작업(LLM 호출)을 스레드 풀에서 실행하되 동시에 진행 중인 작업 수를 max_in_flight로 제한
+- 초당 시작 횟수를 RateLimiter로 제한 (Bedrock 스로틀링 방지)
+- 완료된 결과는 그룹(label 등)별 버퍼에 모았다가 flush_size마다 flush 함수(UNWIND 배치 쓰기)로 기록
+- 작업 함수는 작업 스레드에서, flush 함수는 호출한 스레드에서만 실행됨
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+SUMMARY_MAX_IN_FLIGHT = int(os.environ.get('SUMMARY_MAX_IN_FLIGHT', '16'))
+# 초당 LLM 호출 시작 수 (0이면 제한 없음)
+SUMMARY_RATE_PER_SEC = float(os.environ.get('SUMMARY_RATE_PER_SEC', '8'))
+SUMMARY_FLUSH_SIZE = int(os.environ.get('SUMMARY_FLUSH_SIZE', '50'))
+
+
+class RateLimiter:
+    """호출 간 최소 간격(1 / rate_per_sec)을 보장하는 스레드 안전 limiter"""
+
+    def __init__(self, rate_per_sec: float = SUMMARY_RATE_PER_SEC):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec and rate_per_sec > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class SummaryEngine:
+    """
+    work_fn(item) -> (group, row) | None 을 동시에 실행하고,
+    row를 group별로 모아 flush_fn(group, rows) -> 저장된 개수 로 배치 기록합니다.
+    work_fn이 None을 반환하면 건너뜀(skipped), 예외를 올리면 실패(failed)로 집계합니다.
+    """
+
+    def __init__(self, work_fn, flush_fn, max_in_flight: int = SUMMARY_MAX_IN_FLIGHT,
+                 rate_per_sec: float = SUMMARY_RATE_PER_SEC, flush_size: int = SUMMARY_FLUSH_SIZE):
+        self.work_fn = work_fn
+        self.flush_fn = flush_fn
+        self.max_in_flight = max_in_flight
+        self.flush_size = flush_size
+        self.rate_limiter = RateLimiter(rate_per_sec)
+        self._buffers = {}
+        self.stats = {'total': 0, 'summarized': 0, 'skipped': 0, 'failed': 0,
+                      'saved': 0, 'save_failed': 0, 'flushes': 0, 'elapsed': 0.0}
+
+    def _run_one(self, item):
+        self.rate_limiter.acquire()
+        return self.work_fn(item)
+
+    def _collect(self, future, item, describe):
+        try:
+            result = future.result()
+        except Exception as e:
+            self.stats['failed'] += 1
+            print(f"   ❌ {describe(item)} | 오류: {e}")
+            return
+        if result is None:
+            self.stats['skipped'] += 1
+            return
+
+        group, row = result
+        self.stats['summarized'] += 1
+        buffer = self._buffers.setdefault(group, [])
+        buffer.append(row)
+        if len(buffer) >= self.flush_size:
+            self._flush(group)
+
+    def _flush(self, group):
+        rows = self._buffers.pop(group, [])
+        if not rows:
+            return
+        self.stats['flushes'] += 1
+        name = "-".join(group) if isinstance(group, tuple) else group
+        try:
+            saved = self.flush_fn(group, rows)
+        except Exception as e:
+            saved = 0
+            print(f"   ❌ {name} {len(rows)}건 저장 실패: {e}")
+        self.stats['saved'] += saved
+        self.stats['save_failed'] += len(rows) - saved
+        print(f"   💾 {name}: {saved}/{len(rows)}건 저장 "
+              f"(진행 {self.stats['summarized'] + self.stats['skipped'] + self.stats['failed']}/{self.stats['total']})")
+
+    def run(self, items, describe=str) -> dict:
+        """
+        items 전체를 처리하고 남은 버퍼까지 flush한 뒤 통계를 반환합니다.
+        items가 제너레이터(페이지 단위 조회 등)면 in-flight 자리가 날 때마다 하나씩 꺼내므로,
+        첫 페이지부터 바로 요약이 시작되고 전체 목록을 메모리에 올리지 않습니다.
+
+        Args:
+            items: 작업 목록 또는 iterable
+            describe: 에러 로그용 item 표시 함수
+        """
+        started = time.time()
+        done_marker = object()
+        read_error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            pending = {}
+            iterator = iter(items)
+            while True:
+                # in-flight 한도까지만 꺼내서 제출 (나머지는 대기열에 쌓지 않음)
+                while read_error is None and len(pending) < self.max_in_flight:
+                    try:
+                        item = next(iterator, done_marker)
+                    except Exception as e:
+                        # 조회가 중간에 실패해도 진행 중인 작업은 마무리하고 저장
+                        read_error = e
+                        print(f"   ❌ 작업 목록 조회 오류: {e}")
+                        break
+                    if item is done_marker:
+                        break
+                    self.stats['total'] += 1
+                    pending[executor.submit(self._run_one, item)] = item
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._collect(future, pending.pop(future), describe)
+
+        for group in list(self._buffers):
+            self._flush(group)
+        self.stats['elapsed'] = time.time() - started
+        if read_error is not None:
+            raise read_error
+        return self.stats
+
+
+def print_engine_stats(stats: dict):
+    elapsed = stats['elapsed']
+    rate = stats['summarized'] / elapsed if elapsed else 0.0
+    print(f"⏱️ {elapsed:.1f}s | 요약 {stats['summarized']} ({rate:.2f}/s) | 건너뜀 {stats['skipped']} | "
+          f"실패 {stats['failed']}")
+    print(f"💾 Neptune 저장 {stats['saved']} (실패 {stats['save_failed']}, flush {stats['flushes']}회)")
@@ -0,0 +1,16 @@
+"""
+요약 입력 fingerprint
+- description 리스트의 해시를 summary 옆(summary_src_hash)에 저장해 두고,
+  다음 실행에서 해시가 같은 엔티티/관계는 요약(및 재임베딩)을 건너뜀
+- chunk 적재 순서나 MENTIONS collect 순서가 달라도 같은 값이 나오도록 정렬 후 해시
+"""
+import hashlib
+import json
+
+
+def description_fingerprint(description_list) -> str:
+    """description 리스트(순서 / 앞뒤 공백 / 중복 무관)의 해시"""
+    normalized = sorted({str(d).strip() for d in description_list if str(d).strip()})
+    payload = json.dumps(normalized, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
@@ -3,7 +3,7 @@ Bedrock Agent 유틸리티
 - LLM 호출을 위한 공통 함수
 """
 from strands import Agent
-from strands.models import BedrockModel
+from utils.bedrock_pool import get_bedrock_model
 
 # 기본 설정
 DEFAULT_MODEL_ID = "global.anthropic.claude-opus-4-5-20251101-v1:0"
@@ -27,11 +27,8 @@ def get_bedrock_agent(
     Returns:
         Agent: Strands Agent 인스턴스
     """
-    bedrock_model = BedrockModel(
-        model_id=model_id,
-        region_name=region_name,
-        temperature=temperature,
-    )
+    # 모델(boto3 클라이언트)은 스레드별로 재사용하고 Agent만 새로 생성
+    bedrock_model = get_bedrock_model(model_id, region_name, temperature)
     return Agent(model=bedrock_model)
 
 
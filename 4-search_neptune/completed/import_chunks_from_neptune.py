@@ -1,6 +1,6 @@
 """
 Neptune __Chunk__ 노드를 읽어 Bedrock 임베딩 생성 후 OpenSearch chunks 인덱스에 저장
-- Neptune에서 __Chunk__ 노드 전체 조회
+- Neptune에서 __Chunk__ 노드를 id 순 페이지(BATCH_SIZE) 단위로 조회, 첫 페이지부터 바로 임베딩 시작
 - 각 chunk의 text를 Bedrock Titan으로 임베딩
 - OpenSearch chunks 인덱스에 저장 (context, context_vec, neptune_id)
 - 병렬 처리 (ThreadPoolExecutor)
@@ -14,7 +14,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from neptune.neptune_con import execute_cypher
+from neptune.neptune_con import execute_cypher, iter_cypher_pages
 from opensearch.opensearch_con import get_opensearch_client
 from utils.bedrock_embedding import BedrockEmbedding
 
@@ -26,28 +26,39 @@ print_lock = threading.Lock()
 stats = {'success': 0, 'error': 0}
 
 
-def fetch_all_chunks() -> list:
-    """Neptune에서 모든 __Chunk__ 노드를 가져옵니다."""
-    print("📦 Neptune에서 __Chunk__ 노드 조회 중...")
-
-    # 전체 개수 확인
+def count_chunks() -> int:
+    """__Chunk__ 노드 수"""
     count_result = execute_cypher("MATCH (c:__Chunk__) RETURN count(c) as cnt")
-    total = 0
-    if count_result and 'results' in count_result:
-        total = count_result['results'][0].get('cnt', 0)
-    print(f"   총 __Chunk__ 노드: {total}개")
+    if count_result and count_result.get('results'):
+        return count_result['results'][0].get('cnt', 0)
+    return 0
+
 
-    # 전체 조회 (id, text, neptune_id)
+def iter_chunk_pages(page_size: int = BATCH_SIZE):
+    """__Chunk__ 노드(id, text, neptune_id)를 id 순으로 page_size개씩 yield합니다."""
     query = """
     MATCH (c:__Chunk__)
+    WHERE id(c) > $cursor
     RETURN c.id AS id, c.text AS text, id(c) AS neptune_id
+    ORDER BY neptune_id
+    LIMIT $limit
     """
-    result = execute_cypher(query)
-    if not result or 'results' not in result:
-        print("❌ __Chunk__ 조회 실패")
+    yield from iter_cypher_pages(query, page_size, cursor_key='neptune_id')
+
+
+def fetch_all_chunks() -> list:
+    """Neptune에서 모든 __Chunk__ 노드를 가져옵니다 (페이지 단위 조회 후 합침)."""
+    print("📦 Neptune에서 __Chunk__ 노드 조회 중...")
+    print(f"   총 __Chunk__ 노드: {count_chunks()}개")
+
+    chunks = []
+    try:
+        for page in iter_chunk_pages():
+            chunks.extend(page)
+    except Exception as e:
+        print(f"❌ __Chunk__ 조회 실패: {e}")
         return []
 
-    chunks = result['results']
     print(f"   조회 완료: {len(chunks)}개")
     return chunks
 
@@ -100,14 +111,13 @@ def run():
     print(f"   Workers: {MAX_WORKERS}")
     print("=" * 60)
 
-    # 1. Neptune에서 __Chunk__ 조회
-    chunks = fetch_all_chunks()
-    if not chunks:
+    # 1. Neptune __Chunk__ 개수 확인 (본문은 4단계에서 페이지 단위로 조회)
+    total = count_chunks()
+    print(f"📦 Neptune __Chunk__ 노드: {total}개")
+    if not total:
         print("⚠️ 처리할 chunk가 없습니다.")
         return
 
-    total = len(chunks)
-
     # 2. OpenSearch 클라이언트 + 임베딩 클라이언트
     opensearch_client = get_opensearch_client()
     embedder = BedrockEmbedding()
@@ -120,19 +130,30 @@ def run():
     except:
         print("📊 OpenSearch chunks 인덱스 없음 또는 비어있음")
 
-    # 4. 병렬 임베딩 + 인덱싱
+    # 4. 페이지 조회 + 병렬 임베딩 + 인덱싱
     print(f"\n{'='*60}")
-    print(f"📦 임베딩 생성 + OpenSearch 인덱싱 ({MAX_WORKERS} workers)")
+    print(f"📦 임베딩 생성 + OpenSearch 인덱싱 ({MAX_WORKERS} workers, 페이지 {BATCH_SIZE}개)")
     print("=" * 60)
 
     start_time = time.time()
 
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(process_chunk, i, total, chunk, opensearch_client, embedder): chunk
-            for i, chunk in enumerate(chunks, 1)
-        }
-        for future in as_completed(futures):
+        # 현재 페이지를 처리하는 동안 다음 페이지를 조회 (메모리에는 최대 두 페이지)
+        previous = []
+        idx = 0
+        try:
+            for page in iter_chunk_pages():
+                futures = [
+                    executor.submit(process_chunk, idx + i, total, chunk, opensearch_client, embedder)
+                    for i, chunk in enumerate(page, 1)
+                ]
+                idx += len(page)
+                for future in as_completed(previous):
+                    future.result()
+                previous = futures
+        except Exception as e:
+            print(f"❌ __Chunk__ 페이지 조회 실패 ({idx}개 이후): {e}")
+        for future in as_completed(previous):
             future.result()
 
     elapsed = time.time() - start_time
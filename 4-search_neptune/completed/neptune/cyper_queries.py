@@ -1,7 +1,7 @@
 """
 Neptune Cypher 쿼리 유틸리티
 """
-from neptune.neptune_con import execute_cypher
+from neptune.neptune_con import execute_cypher, iter_cypher, NEPTUNE_PAGE_SIZE
 import uuid
 import re
 import json
@@ -281,13 +281,25 @@ def save_entity_summary(entity_name, summary, entity_type=None):
     return execute_cypher(query, entity_name=entity_name, summary=summary)
 
 
-def get_all_nodes():
-    """Get all nodes with their labels and properties."""
+def iter_all_nodes(page_size=NEPTUNE_PAGE_SIZE):
+    """Yield all nodes with their labels and properties, paged by node id."""
     query = """
     MATCH (n)
-    RETURN labels(n) AS labels, properties(n) AS properties
+    WHERE id(n) > $cursor
+    RETURN id(n) AS node_id, labels(n) AS labels, properties(n) AS properties
+    ORDER BY node_id
+    LIMIT $limit
     """
-    return execute_cypher(query)
+    return iter_cypher(query, page_size, cursor_key='node_id')
+
+
+def get_all_nodes():
+    """Get all nodes with their labels and properties."""
+    try:
+        return {'results': list(iter_all_nodes())}
+    except Exception as e:
+        print(f"❌ 노드 조회 실패: {e}")
+        return None
 
 
 def get_all_nodes_by_label(label):
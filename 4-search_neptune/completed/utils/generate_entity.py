@@ -3,7 +3,7 @@ Bedrock Agent 유틸리티 - 엔티티 추출
 """
 from datetime import datetime
 from strands import Agent
-from strands.models import BedrockModel
+from utils.bedrock_pool import get_agent, get_bedrock_model
 
 # 기본 설정
 DEFAULT_MODEL_ID = "global.anthropic.claude-opus-4-5-20251101-v1:0"
@@ -17,11 +17,8 @@ def get_bedrock_agent(
     temperature: float = DEFAULT_TEMPERATURE
 ) -> Agent:
     """Bedrock Agent 인스턴스 생성"""
-    bedrock_model = BedrockModel(
-        model_id=model_id,
-        region_name=region_name,
-        temperature=temperature,
-    )
+    # 모델(boto3 클라이언트)은 스레드별로 재사용하고 Agent만 새로 생성
+    bedrock_model = get_bedrock_model(model_id, region_name, temperature)
     return Agent(model=bedrock_model)
 
 
@@ -41,7 +38,8 @@ def extract_entity_from_search(payload):
     Returns:
         LLM 응답 (엔티티 목록)
     """
-    agent = get_bedrock_agent()
+    # 스레드별로 재사용되는 Agent (대화 기록은 비워진 상태)
+    agent = get_agent(DEFAULT_MODEL_ID, DEFAULT_REGION, DEFAULT_TEMPERATURE)
     
     user_context = payload.get("user_query", "")
     
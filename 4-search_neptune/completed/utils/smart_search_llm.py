@@ -8,8 +8,7 @@ import json
 from typing import Dict, Any, List
 from datetime import datetime
 
-from strands import Agent
-from strands.models import BedrockModel
+from utils.bedrock_pool import complete
 from utils.query_generator import generate_cypher_prompt
 from neptune.cyper_queries import execute_cypher
 from utils.parse_utils import parse_cypher_output
@@ -17,6 +16,7 @@ from utils.parse_utils import parse_cypher_output
 # 기본 설정
 DEFAULT_MODEL_ID = "global.anthropic.claude-opus-4-5-20251101-v1:0"
 DEFAULT_REGION = "us-west-2"
+DEFAULT_TEMPERATURE = 0.1
 
 
 class SmartGraphSearchLLM:
@@ -24,18 +24,21 @@ class SmartGraphSearchLLM:
     
     def __init__(self, model_id=DEFAULT_MODEL_ID, region=DEFAULT_REGION):
         """Initialize the SmartGraphSearchLLM with Bedrock model."""
-        self.bedrock_model = BedrockModel(
-            model_id=model_id,
-            region_name=region,
-            temperature=0.1,
-        )
-        self.agent = Agent(model=self.bedrock_model)
+        self.model_id = model_id
+        self.region = region
+    
+    def _complete(self, prompt: str):
+        """
+        대화 기록 없는 단발 LLM 호출.
+        Cypher 생성과 결과 요약이 한 Agent의 기록을 공유하면 검색할 때마다 이전 프롬프트가 다시 전송됨.
+        """
+        return complete(prompt, self.model_id, self.region, DEFAULT_TEMPERATURE)
     
     def generate_cypher_query(self, user_question: str) -> str:
         """Generate Cypher query from natural language question using LLM."""
         try:
             prompt = generate_cypher_prompt(user_question)
-            response = self.agent(prompt)
+            response = self._complete(prompt)
             parsed = parse_cypher_output(response)
             
             if parsed and 'cypher_query' in parsed:
@@ -80,7 +83,7 @@ class SmartGraphSearchLLM:
         """Generate natural language summary of query results using LLM."""
         try:
             prompt = self._create_summary_prompt(user_question, results, cypher_query)
-            summary = self.agent(prompt)
+            summary = self._complete(prompt)
             
             if hasattr(summary, 'text'):
                 return summary.text.strip()
@@ -1,13 +1,16 @@
 """
 Neptune Graph 검색 및 통계 확인
+- --cleanup: 중복 관계를 배치로 병합 (--dry-run이면 개수만 집계)
 """
 from neptune.cyper_queries import (
     count_nodes_by_label,
     count_relationships_by_type,
     find_duplicate_relationships,
+    cleanup_duplicate_relationships,
     get_database_stats
 )
 import json
+import sys
 
 
 def print_result(title, result):
@@ -43,6 +46,14 @@ def find_duplicates():
     return result
 
 
+def cleanup_duplicates(dry_run=False):
+    """Merge duplicate relationships in batches (dry_run: count only)."""
+    print(f"\n{'='*50}")
+    print(f" Duplicate Relationship Cleanup{' (dry-run)' if dry_run else ''}")
+    print('='*50)
+    return cleanup_duplicate_relationships(dry_run=dry_run)
+
+
 if __name__ == "__main__":
     print("\n" + "="*60)
     print(" Neptune Graph Search")
@@ -54,3 +65,7 @@ if __name__ == "__main__":
     
     # Find duplicates
     find_duplicates()
+    
+    # Merge duplicates
+    if '--cleanup' in sys.argv[1:]:
+        cleanup_duplicates(dry_run='--dry-run' in sys.argv[1:])
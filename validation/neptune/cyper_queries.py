@@ -1,6 +1,7 @@
-from neptune.neptune_con import execute_cypher
+from neptune.neptune_con import execute_cypher, execute_cypher_strict, iter_cypher, NEPTUNE_PAGE_SIZE
 import uuid
 import re
+import json
 
 
 def generate_neptune_id(name, entity_type):
@@ -288,13 +289,25 @@ def save_relationship_summary(source_entity, target_entity, summary, source_type
                          target_entity=target_entity, summary=summary)
 
 
-def get_all_nodes():
-    """Get all nodes with their labels and properties."""
+def iter_all_nodes(page_size=NEPTUNE_PAGE_SIZE):
+    """Yield all nodes with their labels and properties, paged by node id."""
     query = """
     MATCH (n)
-    RETURN labels(n) AS labels, properties(n) AS properties
+    WHERE id(n) > $cursor
+    RETURN id(n) AS node_id, labels(n) AS labels, properties(n) AS properties
+    ORDER BY node_id
+    LIMIT $limit
     """
-    return execute_cypher(query)
+    return iter_cypher(query, page_size, cursor_key='node_id')
+
+
+def get_all_nodes():
+    """Get all nodes with their labels and properties."""
+    try:
+        return {'results': list(iter_all_nodes())}
+    except Exception as e:
+        print(f"❌ 노드 조회 실패: {e}")
+        return None
 
 
 def get_all_nodes_by_label(label):
@@ -430,93 +443,147 @@ def find_duplicate_relationships():
     return execute_cypher(query)
 
 
-def cleanup_duplicate_relationships():
+DUPLICATE_CLEANUP_PAGE_SIZE = 500
+
+# 같은 두 엔티티 노드 사이(방향 무관)에 RELATIONSHIP이 2개 이상인 묶음.
+# 묶음 키는 이름이 아니라 노드 자체 (a, b) - 이름은 같고 label이 다른 엔티티는 따로 병합되고,
+# 이름이 같은 서로 다른 노드 쌍도 포함 (자기 자신으로 가는 관계만 제외).
+# 엔티티 쌍은 이름 순(같으면 id 순)으로 정규화하고, 병합된 관계도 a → b 방향으로 생성
+_DUPLICATE_GROUPS = """
+    MATCH (s)-[r:RELATIONSHIP]->(t)
+    WHERE id(s) <> id(t)
+    WITH CASE WHEN s.name < t.name OR (s.name = t.name AND id(s) < id(t)) THEN s ELSE t END AS a,
+         CASE WHEN s.name < t.name OR (s.name = t.name AND id(s) < id(t)) THEN t ELSE s END AS b,
+         r
+    WITH a, b, collect(r.description) AS descriptions, collect(r.strength) AS strengths,
+         collect(r.chunk_ids) AS chunk_ids, count(r) AS rel_count
+    WHERE rel_count > 1
     """
-    Clean up ALL duplicate relationships including bidirectional ones.
+
+
+def count_duplicate_relationships():
     """
-    # Get all relationships and group by entity pairs
-    query = """
-    MATCH (s)-[r:RELATIONSHIP]->(t)
-    RETURN s.name AS source, t.name AS target, labels(s)[0] AS source_type, labels(t)[0] AS target_type, 
-           r.description AS description, r.strength AS strength
+    중복 관계 묶음 수와 그 안의 관계 수를 서버에서 집계합니다 (dry-run용, 그래프 변경 없음).
+
+    Returns:
+        dict: {'groups', 'relationships', 'removable'} - removable은 병합 시 줄어드는 관계 수
     """
-    
-    all_rels = execute_cypher(query)
-    if not all_rels or 'results' not in all_rels:
-        return []
-    
-    # Group by normalized entity pairs
-    relationship_groups = {}
-    for rel in all_rels['results']:
-        source = rel['source']
-        target = rel['target']
-        source_type = rel['source_type']
-        target_type = rel['target_type']
-        description = rel['description']
-        strength = rel.get('strength', 0)
-        
-        # Normalize pair (alphabetical order)
-        if source < target:
-            key = (source, target, source_type, target_type)
-        else:
-            key = (target, source, target_type, source_type)
-        
-        if key not in relationship_groups:
-            relationship_groups[key] = []
-        relationship_groups[key].append({'description': description, 'strength': strength})
-    
-    # Process only groups with duplicates
-    results = []
-    for (entity1, entity2, type1, type2), rels in relationship_groups.items():
-        if len(rels) <= 1:
+    query = _DUPLICATE_GROUPS + """
+    RETURN count(*) AS groups, sum(rel_count) AS relationships
+    """
+    result = execute_cypher_strict(query)
+    row = (result.get('results') or [{}])[0]
+    groups = row.get('groups') or 0
+    relationships = row.get('relationships') or 0
+    return {'groups': groups, 'relationships': relationships, 'removable': relationships - groups}
+
+
+def _merge_descriptions(descriptions):
+    """관계별 description(JSON 문자열 리스트 / 문자열 / 리스트)을 하나의 중복 없는 리스트로 합칩니다."""
+    all_descriptions = []
+    for desc in descriptions:
+        if isinstance(desc, str):
+            try:
+                parsed = json.loads(desc)
+                if isinstance(parsed, list):
+                    all_descriptions.extend(parsed)
+                else:
+                    all_descriptions.append(parsed)
+            except ValueError:
+                all_descriptions.append(desc)
+        elif isinstance(desc, list):
+            all_descriptions.extend(desc)
+    return list(dict.fromkeys(all_descriptions))
+
+
+def _merge_chunk_ids(chunk_ids):
+    """관계별 chunk_ids('|c1|c2|')를 합친 값 (2단계 writer가 재실행 시 중복 description을 막는 키)"""
+    merged = []
+    for value in chunk_ids:
+        merged.extend(c for c in str(value or '').split('|') if c)
+    return '|' + ''.join(f"{chunk_id}|" for chunk_id in dict.fromkeys(merged))
+
+
+def _max_strength(strengths):
+    max_strength = 0.0
+    for strength in strengths:
+        try:
+            max_strength = max(max_strength, float(strength))
+        except (TypeError, ValueError):
             continue
-            
-        # Combine all descriptions
-        all_descriptions = []
-        max_strength = 0
-        
-        for rel in rels:
-            desc = rel['description']
-            if isinstance(desc, str):
-                try:
-                    import json
-                    parsed = json.loads(desc)
-                    if isinstance(parsed, list):
-                        all_descriptions.extend(parsed)
-                    else:
-                        all_descriptions.append(parsed)
-                except:
-                    all_descriptions.append(desc)
-            elif isinstance(desc, list):
-                all_descriptions.extend(desc)
-            
-            max_strength = max(max_strength, float(rel.get('strength', 0)))
-        
-        # Remove duplicates
-        unique_descriptions = list(dict.fromkeys(all_descriptions))
-        
-        import json
-        descriptions_str = json.dumps(unique_descriptions, ensure_ascii=False)
-        
-        # Delete ALL relationships between these entities (both directions)
-        delete_query = f"""
-        MATCH (a)-[r:RELATIONSHIP]-(b)
-        WHERE (a.name = $entity1 AND b.name = $entity2) OR (a.name = $entity2 AND b.name = $entity1)
-        DELETE r
-        """
-        execute_cypher(delete_query, entity1=entity1, entity2=entity2)
-        
-        # Create single relationship
-        create_query = f"""
-        MATCH (s:{type1} {{name: $entity1}})
-        MATCH (t:{type2} {{name: $entity2}})
-        CREATE (s)-[r:RELATIONSHIP {{description: $descriptions, strength: $strength}}]->(t)
-        """
-        result = execute_cypher(create_query, entity1=entity1, entity2=entity2,
-                               descriptions=descriptions_str, strength=max_strength)
-        results.append(result)
-    
-    return results
+    return max_strength
+
+
+def cleanup_duplicate_relationships(dry_run=False, page_size=DUPLICATE_CLEANUP_PAGE_SIZE):
+    """
+    Clean up ALL duplicate relationships including bidirectional ones.
+
+    중복 묶음은 서버 집계 쿼리로 page_size개씩 찾고, 페이지마다 UNWIND 한 번으로
+    쌍 사이의 관계를 모두 지운 뒤 description을 합친 관계 하나를 만듭니다.
+    병합된 관계는 chunk_ids를 합집합으로 물려받아 2단계 save_to_neptune_fast 재실행 시
+    이미 반영된 chunk의 description을 다시 붙이지 않습니다.
+    summary / summary_src_hash는 합쳐진 description과 맞지 않으므로 옮기지 않습니다 (무효화)
+    → 3단계 relationship_summarization.py가 병합된 관계를 다시 요약합니다.
+    병합된 묶음은 다음 조회에서 빠지므로 매번 첫 페이지를 다시 조회하며, 남은 묶음이 없으면 끝납니다.
+
+    Args:
+        dry_run: True면 병합하지 않고 중복 묶음 / 관계 수만 집계
+        page_size: 한 번에 병합할 중복 묶음 수
+
+    Returns:
+        dict: {'groups', 'relationships', 'removable'} (dry_run)
+              {'groups', 'removed', 'pages'} (병합)
+    """
+    if dry_run:
+        counts = count_duplicate_relationships()
+        print(f"🔍 [dry-run] 중복 묶음 {counts['groups']}개 | 관계 {counts['relationships']}개 "
+              f"→ 병합 시 {counts['removable']}개 제거")
+        return counts
+
+    find_query = _DUPLICATE_GROUPS + """
+    RETURN id(a) AS source_id, id(b) AS target_id, descriptions, strengths, chunk_ids, rel_count
+    LIMIT $limit
+    """
+    merge_query = """
+    UNWIND $rows AS row
+    MATCH (a) WHERE id(a) = row.source_id
+    MATCH (b) WHERE id(b) = row.target_id
+    MATCH (a)-[r:RELATIONSHIP]-(b)
+    DELETE r
+    WITH DISTINCT a, b, row
+    CREATE (a)-[:RELATIONSHIP {description: row.description, strength: row.strength, chunk_ids: row.chunk_ids}]->(b)
+    RETURN count(*) AS merged
+    """
+
+    stats = {'groups': 0, 'removed': 0, 'pages': 0}
+    while True:
+        groups = execute_cypher_strict(find_query, limit=page_size).get('results', [])
+        if not groups:
+            break
+
+        rows = [{
+            'source_id': group['source_id'],
+            'target_id': group['target_id'],
+            'description': json.dumps(_merge_descriptions(group['descriptions']), ensure_ascii=False),
+            'strength': _max_strength(group['strengths']),
+            'chunk_ids': _merge_chunk_ids(group.get('chunk_ids', []))
+        } for group in groups]
+        result = execute_cypher_strict(merge_query, rows=rows)
+        merged = (result.get('results') or [{}])[0].get('merged', 0)
+
+        stats['pages'] += 1
+        stats['groups'] += merged
+        stats['removed'] += sum(group['rel_count'] for group in groups) - merged
+        print(f"   🔗 페이지 {stats['pages']}: {merged}/{len(groups)}개 묶음 병합 (누적 {stats['groups']})")
+        if merged < len(groups):
+            # 병합되지 않은 묶음은 다음 조회에 다시 나오므로 반복하지 않고 중단
+            print(f"   ⚠️ {len(groups) - merged}개 묶음이 병합되지 않아 중단합니다.")
+            break
+
+    print(f"✅ 중복 관계 정리: {stats['groups']}개 묶음, 관계 {stats['removed']}개 제거 ({stats['pages']} pages)")
+    if stats['groups']:
+        print("   💡 병합된 관계는 summary가 비워졌습니다 - 3단계 relationship_summarization.py로 다시 요약하세요")
+    return stats
 
 
 
@@ -2,12 +2,19 @@
 Neptune Connection Module
 - AWS Secrets Manager에서 Neptune 엔드포인트 정보 로드
 - IAM 인증을 사용한 Neptune 연결
+- neptune-graph 클라이언트는 프로세스당 하나를 만들어 공유 (커넥션 풀 + keep-alive)
+- 쿼리별 지연 시간 통계 (get_cypher_stats / get_last_cypher_latency)
+- 전체 그래프 조회용 페이지 단위 제너레이터 (iter_cypher / iter_cypher_pages)
 """
 import os
 import json
+import threading
+import time
+from collections import deque
 import boto3
 from botocore.auth import SigV4Auth
 from botocore.awsrequest import AWSRequest
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import requests
 
@@ -15,10 +22,32 @@ import requests
 # AWS 리전 설정
 AWS_REGION = os.environ.get('AWS_REAL_REGION', 'us-west-2')
 
+# 동시 쿼리 수 (ThreadPoolExecutor workers 등) - 커넥션 풀 크기로 사용
+NEPTUNE_MAX_POOL_CONNECTIONS = int(os.environ.get('NEPTUNE_MAX_POOL_CONNECTIONS', '50'))
+NEPTUNE_READ_TIMEOUT = int(os.environ.get('NEPTUNE_READ_TIMEOUT', '300'))
+
+# 엔티티 description 저장 위치
+# - node: 엔티티 노드의 description(JSON 문자열)에 mention마다 이어붙임 (기본)
+# - mentions: chunk별 description을 (chunk)-[:MENTIONS]->(엔티티) 엣지에 저장 (mention당 고정 크기 쓰기)
+DESCRIPTION_STORAGE_NODE = 'node'
+DESCRIPTION_STORAGE_MENTIONS = 'mentions'
+DESCRIPTION_STORAGE = os.environ.get('DESCRIPTION_STORAGE', DESCRIPTION_STORAGE_NODE).lower()
+
+# iter_cypher 한 페이지의 row 수
+NEPTUNE_PAGE_SIZE = int(os.environ.get('NEPTUNE_PAGE_SIZE', '1000'))
+
 # 전역 변수
 _neptune_session = None
+_neptune_client = None
+_neptune_client_lock = threading.Lock()
 _secrets_cache = None
 
+# 쿼리 지연 시간 통계
+_cypher_stats_lock = threading.Lock()
+_cypher_latencies = deque(maxlen=10000)
+_cypher_stats = {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+_thread_local = threading.local()
+
 
 def get_secret(secret_name: str, region_name: str = "us-west-2") -> dict:
     """AWS Secrets Manager에서 시크릿을 가져옵니다."""
@@ -55,6 +84,7 @@ _neptune_config = get_neptune_config()
 NEPTUNE_ENDPOINT = _neptune_config['endpoint']
 NEPTUNE_PORT = _neptune_config['port']
 NEPTUNE_READ_ENDPOINT = _neptune_config['read_endpoint']
+NEPTUNE_GRAPH_ID = NEPTUNE_ENDPOINT.split('.')[0]  # g-ha4s00hi48
 
 
 def get_neptune_session():
@@ -68,6 +98,73 @@ def get_neptune_session():
     return _neptune_session
 
 
+def get_neptune_client_config() -> Config:
+    """커넥션 풀 + keep-alive + adaptive 재시도 + read timeout 설정"""
+    return Config(
+        max_pool_connections=NEPTUNE_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=10,
+        read_timeout=NEPTUNE_READ_TIMEOUT,
+        retries={'max_attempts': 5, 'mode': 'adaptive'}
+    )
+
+
+def get_neptune_client():
+    """공유 neptune-graph 클라이언트 (boto3 client는 thread-safe, 생성만 lock)"""
+    global _neptune_client
+    if _neptune_client is None:
+        with _neptune_client_lock:
+            if _neptune_client is None:
+                _neptune_client = get_neptune_session().client(
+                    'neptune-graph',
+                    region_name=AWS_REGION,
+                    config=get_neptune_client_config()
+                )
+    return _neptune_client
+
+
+def _record_cypher_latency(elapsed_ms: float, failed: bool):
+    _thread_local.last_latency_ms = elapsed_ms
+    with _cypher_stats_lock:
+        _cypher_latencies.append(elapsed_ms)
+        _cypher_stats['count'] += 1
+        _cypher_stats['total_ms'] += elapsed_ms
+        _cypher_stats['max_ms'] = max(_cypher_stats['max_ms'], elapsed_ms)
+        if failed:
+            _cypher_stats['errors'] += 1
+
+
+def get_last_cypher_latency() -> float:
+    """현재 스레드에서 마지막으로 실행한 쿼리의 지연 시간(ms)"""
+    return getattr(_thread_local, 'last_latency_ms', None)
+
+
+def get_cypher_stats() -> dict:
+    """누적 쿼리 수/에러 수와 지연 시간 통계(ms, 최근 10000건 기준 p50/p95/p99)"""
+    with _cypher_stats_lock:
+        stats = dict(_cypher_stats)
+        latencies = sorted(_cypher_latencies)
+    stats['avg_ms'] = stats['total_ms'] / stats['count'] if stats['count'] else 0.0
+    for name, q in (('p50_ms', 0.50), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+        stats[name] = latencies[min(int(len(latencies) * q), len(latencies) - 1)] if latencies else 0.0
+    return stats
+
+
+def reset_cypher_stats():
+    """쿼리 지연 시간 통계 초기화"""
+    with _cypher_stats_lock:
+        _cypher_latencies.clear()
+        _cypher_stats.update({'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+
+
+def print_cypher_stats(label: str = "Neptune"):
+    """쿼리 지연 시간 통계 출력"""
+    stats = get_cypher_stats()
+    print(f"⏱️ {label} queries: {stats['count']} (errors: {stats['errors']}) | "
+          f"avg {stats['avg_ms']:.1f}ms, p50 {stats['p50_ms']:.1f}ms, "
+          f"p95 {stats['p95_ms']:.1f}ms, p99 {stats['p99_ms']:.1f}ms, max {stats['max_ms']:.1f}ms")
+
+
 def sign_request(method: str, url: str, data: str = None) -> dict:
     """Sign request with SigV4 for IAM authentication."""
     session = get_neptune_session()
@@ -85,9 +182,10 @@ def sign_request(method: str, url: str, data: str = None) -> dict:
     return dict(request.headers)
 
 
-def execute_cypher(query: str, parameters: dict = None, **kwargs) -> dict:
+def execute_cypher_strict(query: str, parameters: dict = None, **kwargs) -> dict:
     """
     Execute a Cypher query against Neptune Analytics via SDK.
+    실패 시 예외를 그대로 올립니다 (재시도/충돌 처리가 필요한 쓰기 경로용).
     """
     # Merge parameters dict with kwargs
     all_params = {}
@@ -96,12 +194,12 @@ def execute_cypher(query: str, parameters: dict = None, **kwargs) -> dict:
     if kwargs:
         all_params.update(kwargs)
     
-    session = get_neptune_session()
-    client = session.client('neptune-graph', region_name=AWS_REGION)
+    client = get_neptune_client()
     
+    start = time.perf_counter()
     try:
         query_kwargs = {
-            'graphIdentifier': NEPTUNE_ENDPOINT.split('.')[0],  # g-ha4s00hi48
+            'graphIdentifier': NEPTUNE_GRAPH_ID,
             'queryString': query,
             'language': 'OPEN_CYPHER'
         }
@@ -110,13 +208,96 @@ def execute_cypher(query: str, parameters: dict = None, **kwargs) -> dict:
         
         response = client.execute_query(**query_kwargs)
         result = json.loads(response['payload'].read())
-        return result
+    except Exception:
+        _record_cypher_latency((time.perf_counter() - start) * 1000, failed=True)
+        raise
+    _record_cypher_latency((time.perf_counter() - start) * 1000, failed=False)
+    return result
+
+
+def execute_cypher(query: str, parameters: dict = None, **kwargs) -> dict:
+    """
+    Execute a Cypher query against Neptune Analytics via SDK.
+    실패 시 에러를 출력하고 None을 반환합니다.
+    """
+    try:
+        return execute_cypher_strict(query, parameters, **kwargs)
     except Exception as e:
         print(f"Error: {e}")
         print(f"Query: {query[:300]}")
         return None
 
 
+def iter_cypher_pages(query: str, page_size: int = NEPTUNE_PAGE_SIZE, cursor_key: str = None,
+                      parameters: dict = None, **kwargs):
+    """
+    전체 결과를 한 번에 받지 않고 페이지(row 리스트) 단위로 순서대로 yield합니다.
+    첫 페이지가 오면 바로 처리를 시작할 수 있고, 메모리에는 한 페이지만 유지됩니다.
+    페이지 조회가 실패하면 결과가 잘린 채 끝나지 않도록 예외를 올립니다.
+
+    - cursor_key 없음 (SKIP/LIMIT 창): 쿼리 끝에 SKIP $skip LIMIT $limit를 붙입니다.
+      쿼리는 결과 순서가 고정되도록 ORDER BY로 끝나야 합니다.
+    - cursor_key 있음 (정렬된 id 커서): 쿼리가 $cursor / $limit를 직접 사용해야 합니다.
+      예) MATCH (n) WHERE id(n) > $cursor RETURN id(n) AS node_id, ... ORDER BY node_id LIMIT $limit
+      다음 페이지는 마지막 row의 cursor_key 값 이후부터 조회합니다 (SKIP처럼 앞 row를 다시 읽지 않음).
+    """
+    params = dict(parameters or {}, **kwargs)
+    skip, cursor = 0, ''
+    while True:
+        if cursor_key:
+            result = execute_cypher_strict(query, params, cursor=cursor, limit=page_size)
+        else:
+            result = execute_cypher_strict(f"{query}\nSKIP $skip LIMIT $limit", params, skip=skip, limit=page_size)
+        rows = result.get('results', [])
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        skip += len(rows)
+        if cursor_key:
+            cursor = rows[-1][cursor_key]
+
+
+def iter_cypher(query: str, page_size: int = NEPTUNE_PAGE_SIZE, cursor_key: str = None,
+                parameters: dict = None, **kwargs):
+    """iter_cypher_pages의 row 단위 버전"""
+    for rows in iter_cypher_pages(query, page_size, cursor_key, parameters, **kwargs):
+        yield from rows
+
+
+def get_error_code(error: Exception) -> str:
+    """botocore ClientError의 에러 코드 (그 외 예외는 클래스 이름)"""
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code', 'ClientError')
+    return type(error).__name__
+
+
+def is_conflict_error(error: Exception) -> bool:
+    """같은 노드/엣지를 동시에 수정해서 난 충돌인지 (ConflictException / ConcurrentModification)"""
+    return get_error_code(error) in ('ConflictException', 'ConcurrentModificationException') \
+        or 'ConcurrentModification' in str(error)
+
+
+# 다시 시도하면 성공할 수 있는 에러 (충돌 / 스로틀링 / 일시적인 서버·네트워크 오류)
+RETRYABLE_ERROR_CODES = {
+    'ConflictException',
+    'ConcurrentModificationException',
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'InternalServerException',
+    'ServiceUnavailableException',
+    'ReadTimeoutError',
+    'ConnectTimeoutError',
+    'EndpointConnectionError',
+    'ConnectionClosedError',
+}
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """RETRYABLE_ERROR_CODES에 해당하는지 (쿼리 문법 / 검증 오류 등은 재시도하지 않음)"""
+    return is_conflict_error(error) or get_error_code(error) in RETRYABLE_ERROR_CODES
+
+
 def test_neptune_connection():
     """Test Neptune connection with a simple query."""
     print(f"🔧 Neptune Connection Configuration:")
@@ -8,6 +8,16 @@ from opensearch.opensearch_con import get_opensearch_client
 from utils.type import Document
 from utils.bedrock_embedding import BedrockEmbedding
 
+_embedder = None
+
+
+def get_embedder():
+    """검색마다 임베딩 클라이언트를 새로 만들지 않도록 모듈 단위로 재사용"""
+    global _embedder
+    if _embedder is None:
+        _embedder = BedrockEmbedding()
+    return _embedder
+
 
 def normalize_search_results(search_results):
         hits = (search_results["hits"]["hits"])
@@ -24,7 +34,7 @@ def vector_search_entities(query_text, index_name="entities", k=10, entity_type=
     OpenSearch 3.x KNN 검색
     """
     client = get_opensearch_client()
-    embedder = BedrockEmbedding()
+    embedder = get_embedder()
     
     try:
         # 쿼리 텍스트를 벡터로 변환
@@ -102,7 +112,7 @@ def hybrid_search_entities(query_text, index_name="movie_graph", k=10, entity_ty
     하이브리드 검색: 텍스트 검색 + 벡터 검색
     """
     client = get_opensearch_client()
-    embedder = BedrockEmbedding()
+    embedder = get_embedder()
     
     try:
         # 쿼리 텍스트를 벡터로 변환
@@ -3,8 +3,12 @@
 """
 import os
 from datetime import datetime
-from strands import Agent
-from strands.models import BedrockModel
+from utils.bedrock_pool import get_agent
+
+# 기본 설정
+DEFAULT_MODEL_ID = "us.anthropic.claude-sonnet-4-20250514-v1:0"
+DEFAULT_REGION = "us-west-2"
+DEFAULT_TEMPERATURE = 0.3
 
 
 def load_graph_extraction_prompt():
@@ -24,13 +28,8 @@ def extract_entities(payload):
     Returns:
         AgentResult with extracted entities
     """
-    bedrock_model = BedrockModel(
-        model_id="us.anthropic.claude-sonnet-4-20250514-v1:0",
-        region_name="us-west-2",
-        temperature=0.3,
-    )
-
-    agent = Agent(model=bedrock_model)
+    # 스레드별로 재사용되는 Agent (대화 기록은 비워진 상태)
+    agent = get_agent(DEFAULT_MODEL_ID, DEFAULT_REGION, DEFAULT_TEMPERATURE)
         
     # Get user query from payload
     user_query = payload.get("user_query", "")